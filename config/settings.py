@@ -146,7 +146,18 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]   # dev
 STATIC_ROOT = BASE_DIR / "staticfiles"     # prod (Render)
 
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Hashed, compressed files only outside DEBUG: the manifest exists after
+# collectstatic, and circuit_tags resolves image URLs through it.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
 
 CSRF_TRUSTED_ORIGINS = _split_env_list(os.getenv("CSRF_TRUSTED_ORIGINS", ""))
 
@@ -156,6 +167,15 @@ SECURE_SSL_REDIRECT = not DEBUG
 SESSION_COOKIE_SECURE = not DEBUG
 CSRF_COOKIE_SECURE = not DEBUG
 
+# On-disk cache of Jolpica API responses used by fetch_results
+JOLPICA_CACHE_DIR = Path(os.getenv("JOLPICA_CACHE_DIR", BASE_DIR / ".cache" / "jolpica"))
+
+# Live score stream (/en-directo/). DatabaseBroker reaches every worker from
+# the fetch_results cron; LocalBroker only delivers within one process.
+LIVE_BROKER = os.getenv("LIVE_BROKER", "predictions.live.DatabaseBroker")
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "2"))
+LIVE_HEARTBEAT = 15  # seconds between keep-alive comments on idle streams
+
 # Authentication redirects
 LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
@@ -1,6 +1,11 @@
 from django.contrib import admin
 from django.contrib import messages
-from .models import Team, Driver, GrandPrix, Session, Prediction, NewsPost
+from django.utils import timezone
+from .models import (
+    Team, Driver, GrandPrix, Session, Prediction, SeasonStanding, League, LeagueMembership, LeagueStanding,
+    NewsPost, RaceResult, Job, CURRENT_SEASON,
+)
+from .jobs import enqueue
 
 
 @admin.register(Team)
@@ -23,37 +28,61 @@ class SessionInline(admin.TabularInline):
     ordering = ["order"]
 
 
+class RaceResultInline(admin.TabularInline):
+    model = RaceResult
+    extra = 0
+    ordering = ["position"]
+    raw_id_fields = ["driver"]
+
+
 def calculate_scores(modeladmin, request, queryset):
-    """Admin action: calculate scores for all predictions of selected GPs."""
-    updated = 0
-    skipped = 0
+    """Admin action: queue the scoring of every selected GP that has results."""
+    queued = skipped = 0
     for gp in queryset:
         if not gp.has_results:
             skipped += 1
             continue
-        predictions = Prediction.objects.filter(event=gp).select_related(
-            "p1", "p2", "p3", "p4", "p5", "event"
-        )
-        for pred in predictions:
-            pred.score = pred.calculate_score()
-            pred.save(skip_lock_check=True)
-            updated += 1
+        enqueue("score_grand_prix", gp_id=gp.pk)
+        queued += 1
 
-    if updated:
-        messages.success(request, f"Puntuaciones calculadas: {updated} predicciones actualizadas.")
+    if queued:
+        messages.success(request, f"{queued} GP(s) en cola para puntuar; el estado esta en Jobs.")
     if skipped:
         messages.warning(request, f"{skipped} GP(s) sin resultados completos — omitidos.")
 
 calculate_scores.short_description = "Calcular puntuaciones"
 
 
+def fetch_results(modeladmin, request, queryset):
+    """Admin action: queue a results fetch (and rescoring) for the selected GPs."""
+    gps = list(queryset.filter(season_year=CURRENT_SEASON, cancelled=False))
+    for gp in gps:
+        enqueue("fetch_results", round_num=gp.round)
+
+    if gps:
+        messages.success(request, f"{len(gps)} GP(s) en cola para descargar resultados.")
+    if len(gps) < len(queryset):
+        messages.warning(
+            request, f"{len(queryset) - len(gps)} GP(s) cancelados o de otra temporada — omitidos."
+        )
+
+fetch_results.short_description = "Descargar resultados de la API"
+
+
 @admin.register(GrandPrix)
 class GrandPrixAdmin(admin.ModelAdmin):
     list_display = ["round", "name", "country", "season_year", "cancelled", "is_locked", "has_results"]
     list_filter = ["season_year", "cancelled"]
     prepopulated_fields = {"slug": ("name",)}
-    inlines = [SessionInline]
-    actions = [calculate_scores]
+    readonly_fields = ["race_start_utc", "quali_start_utc", "deadline_utc"]
+    inlines = [SessionInline, RaceResultInline]
+    actions = [calculate_scores, fetch_results]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # An edited classification overrides the result fields on the form.
+        if form.instance.classification.exists():
+            GrandPrix.objects.filter(pk=form.instance.pk).sync_results()
 
 
 @admin.register(Session)
@@ -69,6 +98,34 @@ class PredictionAdmin(admin.ModelAdmin):
     raw_id_fields = ["user", "p1", "p2", "p3", "p4", "p5"]
 
 
+@admin.register(SeasonStanding)
+class SeasonStandingAdmin(admin.ModelAdmin):
+    list_display = ["rank", "user", "season", "total", "picks", "first_pick"]
+    list_filter = ["season"]
+    raw_id_fields = ["user"]
+
+
+class LeagueMembershipInline(admin.TabularInline):
+    model = LeagueMembership
+    extra = 0
+    raw_id_fields = ["user"]
+
+
+@admin.register(League)
+class LeagueAdmin(admin.ModelAdmin):
+    list_display = ["name", "slug", "join_code", "created_by", "created_at"]
+    search_fields = ["name", "slug", "join_code"]
+    raw_id_fields = ["created_by"]
+    inlines = [LeagueMembershipInline]
+
+
+@admin.register(LeagueStanding)
+class LeagueStandingAdmin(admin.ModelAdmin):
+    list_display = ["league", "rank", "user", "season", "total", "picks"]
+    list_filter = ["season"]
+    raw_id_fields = ["league", "user"]
+
+
 @admin.register(NewsPost)
 class NewsPostAdmin(admin.ModelAdmin):
     list_display = ["title", "created_at", "has_image"]
@@ -82,3 +139,24 @@ class NewsPostAdmin(admin.ModelAdmin):
     @admin.display(boolean=True, description="Imagen")
     def has_image(self, obj):
         return bool(obj.image_url)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "args", "status", "attempts", "run_after", "finished_at"]
+    list_filter = ["status", "kind"]
+    readonly_fields = [
+        "kind", "args", "status", "attempts", "max_attempts", "run_after", "locked_by", "locked_at",
+        "result", "last_error", "created_at", "finished_at",
+    ]
+    actions = ["retry"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Reintentar")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        messages.success(request, f"{count} trabajo(s) en cola de nuevo.")
@@ -0,0 +1,188 @@
+"""
+Read-only JSON API for bots and widgets.
+
+Every response carries the season's DataVersion as its ETag and the time
+of the last bump as Last-Modified. A conditional GET that still matches is
+answered with 304 after a single indexed lookup, before any of the heavy
+querysets run; a full response reuses the encoded body cached for that
+version. Bodies are encoded with orjson when it is installed.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .caching import cached_page_data
+from .models import (
+    CURRENT_SEASON, DataVersion, GrandPrix, LEADERBOARD_ORDERING, Prediction, SeasonStanding,
+)
+from .pagination import decode_cursor, keyset_page
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+API_PAGE_SIZE = 500
+# Prediction.rank is only stored once the GP is scored.
+API_RANKED_PICK_ORDERING = ["rank", "user__username", "id"]
+API_PICK_ORDERING = ["user__username", "id"]
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def _season(request):
+    try:
+        return int(request.GET.get("temporada", CURRENT_SEASON))
+    except ValueError:
+        raise Http404("Temporada no valida.")
+
+
+def _conditional(request, name, season, build, *vary):
+    """
+    Answer from the season's data version: 304 when the client's copy is
+    current, otherwise the cached (or freshly built) JSON body.
+    """
+    version, updated_at = DataVersion.objects.state(season)
+    etag = quote_etag(f"{name}-{version}")
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        body = cached_page_data(f"api-{name}", season, lambda: dumps(build()), *vary, version=version)
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Clients may keep the body but must revalidate it every time.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _page(queryset, ordering, cursor):
+    after = decode_cursor(cursor, queryset.model, ordering)
+    page = keyset_page(queryset, ordering, API_PAGE_SIZE, after=after)
+    return list(page.rows), page.next_cursor or None
+
+
+def _results(gp):
+    if not gp.has_results:
+        return None
+    return {
+        "top5": [getattr(gp, f"result_p{i}").code for i in range(1, 6)],
+        "alonso_pos": gp.result_alonso_pos,
+        "sainz_pos": gp.result_sainz_pos,
+    }
+
+
+def _race(gp):
+    return {
+        "round": gp.round,
+        "slug": gp.slug,
+        "name": gp.name,
+        "country": gp.country,
+        "circuit": gp.circuit,
+        "cancelled": gp.cancelled,
+        "race_start": gp.race_start_utc,
+        "deadline": gp.deadline_utc,
+        "has_results": gp.has_results,
+    }
+
+
+@require_safe
+def calendar(request):
+    """GET /api/calendario/?temporada=2026"""
+    season = _season(request)
+
+    def build():
+        races = GrandPrix.objects.filter(season_year=season)
+        return {"season": season, "races": [_race(gp) for gp in races]}
+
+    return _conditional(request, "calendar", season, build)
+
+
+@require_safe
+def standings(request):
+    """GET /api/clasificacion/?temporada=2026&desde=<cursor>"""
+    season = _season(request)
+    cursor = request.GET.get("desde", "")
+
+    def build():
+        rows, next_cursor = _page(
+            SeasonStanding.objects.filter(season=season).values("rank", "user__username", "total", "picks"),
+            LEADERBOARD_ORDERING,
+            cursor,
+        )
+        return {
+            "season": season,
+            "standings": [
+                {"rank": r["rank"], "username": r["user__username"], "total": r["total"], "picks": r["picks"]}
+                for r in rows
+            ],
+            "next": next_cursor,
+        }
+
+    return _conditional(request, "standings", season, build, cursor)
+
+
+def _grand_prix(slug):
+    return get_object_or_404(
+        GrandPrix.objects.select_related(*(f"result_p{i}" for i in range(1, 6))), slug=slug
+    )
+
+
+@require_safe
+def race(request, slug):
+    """GET /api/carreras/<slug>/: the GP and, once raced, its results."""
+    gp = _grand_prix(slug)
+    return _conditional(
+        request, "race", gp.season_year, lambda: dict(_race(gp), results=_results(gp)), gp.pk
+    )
+
+
+@require_safe
+def race_picks(request, slug):
+    """GET /api/carreras/<slug>/porras/?desde=<cursor>: every pick, once the deadline has passed."""
+    gp = _grand_prix(slug)
+    if not gp.is_locked:
+        # Picks are secret until the deadline; no caching, since lock time isn't a data write.
+        return JsonResponse({"detail": "Las selecciones se revelan al cerrar el plazo."}, status=403)
+    cursor = request.GET.get("desde", "")
+
+    def build():
+        # Unscored picks have a NULL rank, which a cursor can't carry.
+        ordering = API_RANKED_PICK_ORDERING if gp.picks_are_ranked() else API_PICK_ORDERING
+        rows, next_cursor = _page(
+            Prediction.objects.filter(event=gp).values(
+                "id", "rank", "score", "user__username",
+                "p1__code", "p2__code", "p3__code", "p4__code", "p5__code",
+                "alonso_pos_guess", "sainz_pos_guess",
+            ),
+            ordering,
+            cursor,
+        )
+        return {
+            "race": gp.slug,
+            "picks": [
+                {
+                    "username": r["user__username"],
+                    "top5": [r[f"p{i}__code"] for i in range(1, 6)],
+                    "alonso_pos": r["alonso_pos_guess"],
+                    "sainz_pos": r["sainz_pos_guess"],
+                    "score": r["score"],
+                    "rank": r["rank"],
+                }
+                for r in rows
+            ],
+            "next": next_cursor,
+        }
+
+    return _conditional(request, "race-picks", gp.season_year, build, gp.pk, cursor)
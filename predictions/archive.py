@@ -0,0 +1,165 @@
+"""
+Incremental reader for Ergast/Jolpica JSON archives.
+
+A season dump is one big {"MRData": {"RaceTable": {"Races": [...]}}}
+document, and a multi-season archive may hold many of them. iter_races()
+reads the file in fixed-size chunks and decodes one race object at a time
+with JSONDecoder.raw_decode, so memory stays at roughly one race however
+large the archive is. Used by the import_archive command.
+"""
+import gzip
+import json
+import os
+import re
+import tempfile
+from datetime import datetime, time, timezone as dt_timezone
+from pathlib import Path
+
+from django.utils.dateparse import parse_date, parse_time
+from django.utils.text import slugify
+
+from .jolpica import parse_results
+
+READ_SIZE = 64 * 1024
+
+_RACES_START = re.compile(r'"Races"\s*:\s*\[')
+_SEPARATOR = re.compile(r"[\s,]*")
+# Enough of the previous chunk to find a "Races": [ split across two reads.
+_KEY_OVERLAP = 64
+
+# Ergast weekend keys -> Session.session_type
+SESSION_KEYS = {
+    "FirstPractice": "FP1",
+    "SecondPractice": "FP2",
+    "ThirdPractice": "FP3",
+    "SprintQualifying": "SPRINT_QUALI",
+    "SprintShootout": "SPRINT_QUALI",
+    "Sprint": "SPRINT",
+    "Qualifying": "QUALI",
+}
+
+
+def open_archive(path):
+    """Open a .json or .json.gz archive as text."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_races(stream, read_size=READ_SIZE):
+    """
+    Yield every object of every "Races" array in a text stream, in order.
+
+    Raises ValueError if the stream ends inside an array or holds invalid JSON.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, in_races = "", 0, False
+    while True:
+        if not in_races:
+            found = _RACES_START.search(buffer, pos)
+            if found:
+                pos, in_races = found.end(), True
+                continue
+            chunk = stream.read(read_size)
+            if not chunk:
+                return
+            buffer, pos = buffer[max(pos, len(buffer) - _KEY_OVERLAP):] + chunk, 0
+            continue
+
+        pos = _SEPARATOR.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == "]":
+            pos, in_races = pos + 1, False
+            continue
+        try:
+            if pos == len(buffer):
+                raise json.JSONDecodeError("Need more data", buffer, pos)
+            race, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as exc:
+            # Usually a race cut off by the chunk boundary. Read at least as
+            # much again as is pending, so one huge race isn't re-parsed per chunk.
+            chunk = stream.read(max(read_size, len(buffer) - pos))
+            if not chunk:
+                raise ValueError(f"Archivo JSON incompleto o no valido: {exc.msg}") from exc
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield race
+        if pos >= read_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def _start(item):
+    """UTC start of a race or session entry; midnight when only the date is known."""
+    day = parse_date(item["date"])
+    moment = parse_time(item["time"].rstrip("Z")) if item.get("time") else None
+    return datetime.combine(day, moment or time(0), tzinfo=dt_timezone.utc)
+
+
+def race_event(race) -> dict:
+    """
+    Parse one archive race into the GP, session and result values we store.
+    Raises KeyError/TypeError/ValueError on malformed entries.
+    """
+    season, round_num = int(race["season"]), int(race["round"])
+    location = race.get("Circuit", {}).get("Location", {})
+    starts = {session_type: _start(race[key]) for key, session_type in SESSION_KEYS.items() if key in race}
+    starts["RACE"] = _start(race)
+    return {
+        "season_year": season,
+        "round": round_num,
+        "slug": f"{slugify(race['raceName'])}-{season}",
+        "name": race["raceName"],
+        "country": location.get("country", ""),
+        "circuit": location.get("locality", ""),
+        "sessions": sorted(starts.items(), key=lambda item: item[1]),
+        "results": parse_results(race["Results"]) if race.get("Results") else None,
+    }
+
+
+class Checkpoint:
+    """
+    Races already committed per archive file, kept in a small JSON file.
+
+    A file's entry is keyed on its resolved path and remembers its size and
+    mtime, so an archive that changed since the last run starts over.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def _key(archive):
+        return str(Path(archive).resolve())
+
+    @staticmethod
+    def _stamp(archive):
+        stat = os.stat(archive)
+        return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    def get(self, archive) -> dict:
+        """{"races": n, "done": bool} for `archive`; zeroes if unknown or changed."""
+        entry = self.entries.get(self._key(archive))
+        if not entry or {k: entry.get(k) for k in ("size", "mtime")} != self._stamp(archive):
+            return {"races": 0, "done": False}
+        return {"races": entry["races"], "done": entry.get("done", False)}
+
+    def set(self, archive, races, done=False):
+        self.entries[self._key(archive)] = dict(self._stamp(archive), races=races, done=done)
+        self._save()
+
+    def clear(self, archive):
+        if self.entries.pop(self._key(archive), None) is not None:
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so an interrupted run never leaves a truncated file.
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,86 @@
+"""
+Idempotent bulk upserts for the seed and archive import commands.
+
+Current values are read once per call and compared in memory, so only new
+and changed rows reach bulk_create(update_conflicts=True) and a re-run over
+unchanged data writes nothing.
+"""
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class UpsertCount:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    elapsed: float = 0.0
+    # Keys of the inserted and updated rows, for callers that follow up on them.
+    written: list = field(default_factory=list, repr=False)
+
+    def __add__(self, other):
+        return UpsertCount(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.unchanged + other.unchanged,
+            self.elapsed + other.elapsed,
+            self.written + other.written,
+        )
+
+    def __str__(self):
+        return (
+            f"{self.inserted} nuevos, {self.updated} actualizados, "
+            f"{self.unchanged} sin cambios ({self.elapsed * 1000:.0f} ms)"
+        )
+
+
+def bulk_upsert(model, rows, key, fields, batch_size=500) -> UpsertCount:
+    """
+    Insert or update `rows` (dicts of attnames) on the unique `key` columns.
+
+    Current values are read in one query, narrowed to the rows' first key
+    column; only new and changed rows go to bulk_create(update_conflicts=True),
+    so unchanged data writes nothing. With no `fields`, existing rows are left
+    alone and only missing ones are inserted. Later rows win when the same key
+    appears twice.
+    """
+    started = time.perf_counter()
+    count = UpsertCount()
+    rows = list({tuple(row[k] for k in key): row for row in rows}.values())
+    if not rows:
+        return count
+
+    existing = {
+        tuple(values[k] for k in key): values
+        for values in model.objects.filter(**{f"{key[0]}__in": {row[key[0]] for row in rows}}).values(
+            *key, *fields
+        )
+    }
+    pending = []
+    for row in rows:
+        row_key = tuple(row[k] for k in key)
+        current = existing.get(row_key)
+        if current is None:
+            count.inserted += 1
+        elif any(current[f] != row[f] for f in fields):
+            count.updated += 1
+        else:
+            count.unchanged += 1
+            continue
+        count.written.append(row_key if len(key) > 1 else row_key[0])
+        pending.append(model(**row))
+
+    if pending and fields:
+        # bulk_create wants field names ("event"), the rows use attnames ("event_id").
+        names = {attname: model._meta.get_field(attname).name for attname in (*key, *fields)}
+        model.objects.bulk_create(
+            pending,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=[names[k] for k in key],
+            update_fields=[names[f] for f in fields],
+        )
+    elif pending:
+        model.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+    count.elapsed = time.perf_counter() - started
+    return count
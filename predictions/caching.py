@@ -0,0 +1,54 @@
+"""
+Versioned cache for the shared (non per-user) parts of public pages.
+
+Keys embed the season's DataVersion, so any Prediction, GrandPrix, Session or
+Driver write makes every older entry unreachable; the backend evicts them
+on its own. Per-user data (my pick, my score) must never go through here.
+"""
+import threading
+
+from django.core.cache import cache
+
+from .models import DataVersion
+
+KEY_PREFIX = "page-data"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def cached_page_data(name, season, build, *vary, version=None):
+    """
+    Return build() for (name, *vary), reusing the entry cached for the
+    current data version of `season` when there is one. Pass `version`
+    when the caller has already read it.
+    """
+    if version is None:
+        version = DataVersion.objects.current(season)
+    key = ":".join(str(part) for part in (KEY_PREFIX, name, season, version, *vary))
+    value = cache.get(key)
+    if value is not None:
+        _record("hits")
+        return value
+
+    _record("misses")
+    value = build()
+    cache.set(key, value, timeout=None)
+    return value
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for this process since startup."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 3) if lookups else None,
+    }
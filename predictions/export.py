@@ -0,0 +1,117 @@
+"""
+Streaming export of predictions and their scores.
+
+Rows are read with .values() and .iterator(chunk_size=...), so the database
+cursor is consumed in chunks and nothing holds the whole season in memory;
+each encoder yields text as it goes and gzip_stream compresses on the fly.
+Shared by the export_predictions command and the staff export endpoint.
+"""
+import csv
+import json
+import zlib
+from datetime import datetime
+
+from .models import Prediction
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_CHUNK_SIZE = 2000
+
+# Output column -> Prediction lookup
+EXPORT_COLUMNS = {
+    "season": "event__season_year",
+    "round": "event__round",
+    "gp": "event__slug",
+    "username": "user__username",
+    "p1": "p1__code",
+    "p2": "p2__code",
+    "p3": "p3__code",
+    "p4": "p4__code",
+    "p5": "p5__code",
+    "alonso_pos_guess": "alonso_pos_guess",
+    "sainz_pos_guess": "sainz_pos_guess",
+    "submitted_at": "submitted_at",
+    "score": "score",
+    "rank": "rank",
+}
+
+
+def export_queryset(season=None, round_num=None):
+    qs = Prediction.objects.all()
+    if season is not None:
+        qs = qs.filter(event__season_year=season)
+    if round_num is not None:
+        qs = qs.filter(event__round=round_num)
+    return qs.order_by("event__season_year", "event__round", "user__username").values_list(
+        *EXPORT_COLUMNS.values()
+    )
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one dict per prediction, keyed by EXPORT_COLUMNS."""
+    columns = list(EXPORT_COLUMNS)
+    for values in queryset.iterator(chunk_size=chunk_size):
+        row = dict(zip(columns, values))
+        if isinstance(row["submitted_at"], datetime):
+            row["submitted_at"] = row["submitted_at"].isoformat()
+        yield row
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def encode_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+def encode_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(",", ":")) + "\n"
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+
+def batched_text(chunks, size=64 * 1024):
+    """Join small text chunks into ~size-byte bytes blocks to cut write calls."""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer).encode()
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def gzip_stream(blocks, level=6):
+    """Compress an iterable of bytes into a single gzip member, block by block."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(fmt="csv", season=None, round_num=None, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Bytes iterator for the whole export in the given format."""
+    rows = export_rows(export_queryset(season, round_num), chunk_size=chunk_size)
+    blocks = batched_text(ENCODERS[fmt](rows))
+    return gzip_stream(blocks) if compress else blocks
+
+
+def export_filename(fmt, season=None, round_num=None, compress=False):
+    parts = ["predicciones"]
+    if season is not None:
+        parts.append(str(season))
+    if round_num is not None:
+        parts.append(f"r{round_num}")
+    return "-".join(parts) + f".{fmt}" + (".gz" if compress else "")
@@ -2,7 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
-from .models import Prediction, Driver, Ticket, GrandPrix
+from .models import GrandPrix, League, Prediction, Ticket, driver_roster
 
 
 class SignupForm(UserCreationForm):
@@ -40,59 +40,71 @@ class SignupForm(UserCreationForm):
         return user
 
 
+PICK_FIELDS = ["p1", "p2", "p3", "p4", "p5"]
+POSITION_CHOICES = [(0, "DNF")] + [(i, str(i)) for i in range(1, 23)]
+
+
 class PredictionForm(forms.ModelForm):
-    """Form for creating/editing a race prediction."""
+    """
+    Form for creating/editing a race prediction.
+
+    Driver fields choose from the process-wide DriverRoster, so building and
+    validating the form runs no queries. `event` is the GP the view already
+    loaded; the model's deadline check runs against it instead of a fetch.
+    """
 
     class Meta:
         model = Prediction
-        fields = ["p1", "p2", "p3", "p4", "p5", "alonso_pos_guess", "sainz_pos_guess"]
+        fields = ["alonso_pos_guess", "sainz_pos_guess"]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, event=None, **kwargs):
         super().__init__(*args, **kwargs)
-
-        # Get active drivers with team for display
-        drivers = Driver.objects.filter(active=True).select_related("team")
-        driver_choices = [(d.pk, f"{d.name} ({d.team.name})" if d.team else d.name) for d in drivers]
-
-        # Apply to p1-p5 fields
-        for i in range(1, 6):
-            field_name = f"p{i}"
-            self.fields[field_name].queryset = drivers
-            self.fields[field_name].label = f"P{i}"
-            self.fields[field_name].widget = forms.Select(
-                attrs={"class": "form-select"},
+        if event is not None:
+            self.instance.event = event
+
+        driver_choices = list(driver_roster().choices)
+        for i, field_name in enumerate(PICK_FIELDS, start=1):
+            self.fields[field_name] = forms.TypedChoiceField(
+                coerce=int,
+                label=f"P{i}",
                 choices=[("", f"-- Selecciona P{i} --")] + driver_choices,
+                widget=forms.Select(attrs={"class": "form-select"}),
             )
-            self.fields[field_name].empty_label = None
+            self.initial.setdefault(field_name, getattr(self.instance, f"{field_name}_id"))
 
-        pos_choices = [(0, "DNF")] + [(i, str(i)) for i in range(1, 23)]
-
-        self.fields["alonso_pos_guess"] = forms.ChoiceField(
-            choices=pos_choices,
+        self.fields["alonso_pos_guess"] = forms.TypedChoiceField(
+            coerce=int,
+            choices=POSITION_CHOICES,
             label="Posicion de Alonso",
             widget=forms.Select(attrs={"class": "form-select"}),
         )
 
-        self.fields["sainz_pos_guess"] = forms.ChoiceField(
-            choices=pos_choices,
+        self.fields["sainz_pos_guess"] = forms.TypedChoiceField(
+            coerce=int,
+            choices=POSITION_CHOICES,
             label="Posicion de Sainz",
             widget=forms.Select(attrs={"class": "form-select"}),
         )
+        self.order_fields(PICK_FIELDS + self._meta.fields)
 
     def clean(self):
         cleaned_data = super().clean()
 
         # Validate no repeated drivers
-        picks = []
-        for i in range(1, 6):
-            driver = cleaned_data.get(f"p{i}")
-            if driver:
-                if driver.pk in picks:
-                    raise forms.ValidationError("No puedes repetir pilotos en tu Top 5.")
-                picks.append(driver.pk)
+        picks = [cleaned_data.get(name) for name in PICK_FIELDS]
+        picks = [pk for pk in picks if pk is not None]
+        if len(set(picks)) != len(picks):
+            raise forms.ValidationError("No puedes repetir pilotos en tu Top 5.")
 
         return cleaned_data
 
+    def _post_clean(self):
+        for field_name in PICK_FIELDS:
+            setattr(self.instance, f"{field_name}_id", self.cleaned_data.get(field_name))
+        # Prediction.clean would repeat the errors already reported per field.
+        if not self._errors:
+            super()._post_clean()
+
 
 class TicketForm(forms.ModelForm):
     class Meta:
@@ -111,3 +123,30 @@ class TicketForm(forms.ModelForm):
         self.fields["notes"].widget = forms.Textarea(attrs={"class": "form-control", "rows": 3, "placeholder": "Info adicional, enlace de compra, condiciones..."})
         self.fields["notes"].required = False
         self.fields["notes"].label = "Otros"
+
+
+class LeagueForm(forms.ModelForm):
+    class Meta:
+        model = League
+        fields = ["name"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["name"].widget.attrs.update({"class": "form-control", "placeholder": "Ej: Porra de la oficina"})
+        self.fields["name"].label = "Nombre"
+
+
+class JoinLeagueForm(forms.Form):
+    code = forms.CharField(
+        max_length=8,
+        label="Codigo de invitacion",
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Ej: 4F9A12BC"}),
+    )
+
+    def clean_code(self):
+        code = self.cleaned_data["code"].strip().upper()
+        try:
+            self.league = League.objects.get(join_code=code)
+        except League.DoesNotExist:
+            raise forms.ValidationError("No existe ninguna liga con ese codigo.")
+        return code
@@ -0,0 +1,87 @@
+"""
+Database-backed background jobs.
+
+Slow work that an admin triggers (scoring a big GP, fetching results) is
+stored as a Job row by enqueue() and run later by the run_worker command,
+so the HTTP request returns straight away. Workers claim jobs with
+Job.objects.claim(); a job that raises is retried with exponential backoff
+until it runs out of attempts, and its traceback is kept for the admin.
+
+Handlers are plain functions registered by kind with @handler; their
+keyword arguments are the job's JSON args and the string they return is
+stored as the job's result.
+"""
+import logging
+import traceback
+from io import StringIO
+
+from django.core.management import call_command
+
+from .models import GrandPrix, Job
+from .scoring import score_grand_prix
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+class JobError(Exception):
+    """A handler failure worth retrying, reported without a traceback."""
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, **args) -> Job:
+    """Queue a `kind` job; an identical job still waiting in the queue is reused."""
+    if kind not in HANDLERS:
+        raise ValueError(f"unknown job kind: {kind!r}")
+    job = Job.objects.filter(kind=kind, args=args, status=Job.QUEUED).first()
+    return job or Job.objects.create(kind=kind, args=args)
+
+
+def run_job(job) -> bool:
+    """Run a claimed job and record the outcome. Returns True on success."""
+    func = HANDLERS.get(job.kind)
+    if func is None:
+        job.fail(f"Tipo de trabajo desconocido: {job.kind}", retry=False)
+        return False
+    try:
+        result = func(**job.args)
+    except JobError as exc:
+        job.fail(str(exc))
+        return False
+    except Exception:
+        logger.exception("Job %s failed", job.pk)
+        job.fail(traceback.format_exc())
+        return False
+    job.succeed(result or "")
+    return True
+
+
+@handler("score_grand_prix")
+def _score_grand_prix(gp_id):
+    gp = GrandPrix.objects.get(pk=gp_id)
+    if not gp.has_results:
+        return f"{gp.name}: sin resultados completos, no se puntua."
+    result = score_grand_prix(gp)
+    return (
+        f"{gp.name}: {result.changed}/{result.total} predicciones actualizadas "
+        f"en {result.elapsed:.2f}s."
+    )
+
+
+@handler("fetch_results")
+def _fetch_results(round_num):
+    """Fetch and score one round of the current season."""
+    out, err = StringIO(), StringIO()
+    call_command("fetch_results", round_num=round_num, force=True, stdout=out, stderr=err)
+    # The command reports API and parsing problems on stderr and carries on;
+    # here they should count as a failed attempt so the job is retried.
+    if err.getvalue():
+        raise JobError(err.getvalue().strip())
+    return out.getvalue().strip()
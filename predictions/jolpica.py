@@ -0,0 +1,290 @@
+"""
+HTTP client for the Jolpica (Ergast-compatible) F1 API.
+
+One keep-alive connection pool is shared by every request, failed requests
+are retried with exponential backoff, and a process-wide rate limit keeps us
+under Jolpica's limits (4 requests/second burst) no matter how many rounds
+are fetched in parallel.
+
+With a ResponseCache the client sends conditional requests (ETag /
+Last-Modified) and reports whether a body is byte-identical to the last one
+the caller processed, so unchanged payloads need no parsing at all.
+
+parse_results() turns a race's "Results" list into classification rows;
+fetch_results and the archive importer share it.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .models import is_classified_finish
+
+JOLPICA_BASE_URL = "https://api.jolpi.ca/ergast/f1"
+RESULTS_PATH = "/{year}/{round}/results/"
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_RATE = 4  # requests per second
+
+
+class OfflineCacheMiss(requests.RequestException):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+class ResponseCache:
+    """On-disk store of API responses, one JSON file per URL."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url):
+        return self.directory / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def load(self, url):
+        try:
+            with open(self._path(url), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, url, entry):
+        # Write-then-rename so a crash never leaves a truncated entry behind.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(url))
+
+
+class FetchedPayload:
+    """A response body plus whether the caller already processed it."""
+
+    def __init__(self, url, body, digest, unchanged):
+        self.url = url
+        self.body = body
+        self.digest = digest
+        self.unchanged = unchanged
+
+    @property
+    def payload(self):
+        return json.loads(self.body)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class JolpicaClient:
+    def __init__(
+        self,
+        base_url=JOLPICA_BASE_URL,
+        concurrency=1,
+        rate=DEFAULT_RATE,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        timeout=DEFAULT_TIMEOUT,
+        cache=None,
+        offline=False,
+    ):
+        if offline and cache is None:
+            raise ValueError("offline mode needs a response cache")
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.offline = offline
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.concurrency,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def results_url(self, year, round_num):
+        return self.base_url + RESULTS_PATH.format(year=year, round=round_num)
+
+    def get(self, url) -> FetchedPayload:
+        """
+        GET `url`, revalidating any cached copy. Raises requests.RequestException.
+        """
+        entry = self.cache.load(url) if self.cache else None
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"{url} no esta en la cache")
+            return self._from_entry(url, entry)
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        self.rate_limiter.wait()
+        response = self.session.get(url, timeout=self.timeout, headers=headers)
+        if response.status_code == 304 and entry:
+            return self._from_entry(url, entry)
+        response.raise_for_status()
+
+        body = response.text
+        digest = hashlib.sha256(response.content).hexdigest()
+        if self.cache:
+            self.cache.save(url, {
+                "etag": response.headers.get("ETag", ""),
+                "last_modified": response.headers.get("Last-Modified", ""),
+                "sha256": digest,
+                "body": body,
+                "processed_sha256": entry.get("processed_sha256", "") if entry else "",
+            })
+        processed = entry.get("processed_sha256") if entry else None
+        return FetchedPayload(url, body, digest, unchanged=digest == processed)
+
+    @staticmethod
+    def _from_entry(url, entry):
+        return FetchedPayload(
+            url,
+            entry["body"],
+            entry["sha256"],
+            unchanged=entry["sha256"] == entry.get("processed_sha256"),
+        )
+
+    def mark_processed(self, fetched: FetchedPayload):
+        """Remember that `fetched` was handled so identical bodies are skipped."""
+        if not self.cache:
+            return
+        entry = self.cache.load(fetched.url)
+        if entry and entry["sha256"] == fetched.digest:
+            entry["processed_sha256"] = fetched.digest
+            self.cache.save(fetched.url, entry)
+
+    def get_json(self, url):
+        """GET `url` and decode its JSON body. Raises requests.RequestException."""
+        return self.get(url).payload
+
+    def fetch_results(self, year, round_num) -> FetchedPayload:
+        return self.get(self.results_url(year, round_num))
+
+    def fetch_many(self, rounds):
+        """
+        Fetch (year, round) pairs in parallel.
+
+        Yields (key, FetchedPayload, error) as each request completes, on the
+        calling thread, so callers can keep their database writes serialized.
+        """
+        def fetch(key):
+            try:
+                return key, self.fetch_results(*key), None
+            except requests.RequestException as exc:
+                return key, None, exc
+
+        if self.concurrency == 1:
+            yield from map(fetch, rounds)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(fetch, key) for key in rounds]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        self.session.close()
+
+
+@dataclass(frozen=True)
+class ResultRow:
+    """One line of a race's classification, as the API reports it."""
+    position: int
+    code: str
+    name: str
+    status: str
+    points: Decimal
+    grid: int  # None when the API doesn't say
+
+
+@dataclass(frozen=True)
+class RaceResults:
+    rows: tuple  # ResultRow, in finishing order
+
+    @property
+    def top5(self) -> tuple:
+        """Driver codes for P1..P5, None where the API has no row."""
+        by_position = {row.position: row.code for row in self.rows}
+        return tuple(by_position.get(p) for p in range(1, 6))
+
+    def position(self, code):
+        """Finishing position of `code`: 0 if DNF, None if they didn't take part."""
+        row = next((row for row in self.rows if row.code == code), None)
+        if row is None:
+            return None
+        return row.position if is_classified_finish(row.status) else 0
+
+
+def driver_code(driver: dict) -> str:
+    """Our Driver.code for an API driver; older seasons only have a driverId."""
+    return (driver.get("code") or driver.get("driverId", "")).upper()[:10]
+
+
+def _points(value) -> Decimal:
+    try:
+        return Decimal(value or 0)
+    except InvalidOperation:
+        raise ValueError(f"invalid points value: {value!r}")
+
+
+def parse_results(results: list) -> RaceResults:
+    """Parse a race's "Results" list. Raises KeyError/ValueError on bad rows."""
+    rows = []
+    for row in results:
+        driver = row["Driver"]
+        rows.append(ResultRow(
+            position=int(row["position"]),
+            code=driver_code(driver),
+            name=f"{driver.get('givenName', '')} {driver.get('familyName', '')}".strip(),
+            status=row.get("status", ""),
+            points=_points(row.get("points")),
+            grid=int(row["grid"]) if row.get("grid") not in (None, "") else None,
+        ))
+    # Drivers who shared a car in the early seasons appear more than once;
+    # the classification keeps their best finish.
+    best = {}
+    for row in sorted(rows, key=lambda r: r.position):
+        best.setdefault(row.code, row)
+    return RaceResults(tuple(best.values()))
@@ -0,0 +1,172 @@
+"""
+Live score push for the server-sent-events stream.
+
+A broker fans events out to every open stream in the worker. Each stream
+is an asyncio task waiting on its own small queue, so thousands of idle
+browsers cost a coroutine each and no database work at all.
+
+LocalBroker delivers within the process (tests, single-process dev).
+DatabaseBroker also reaches the web workers from other processes, such as
+the fetch_results cron: publish() appends a LiveEvent row and each worker
+runs one poller that tails the table while it has subscribers, however
+many streams are open. settings.LIVE_BROKER picks the class.
+"""
+import asyncio
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import LiveEvent, SeasonStanding
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 32
+# Changed picks listed one by one in a "scores" event; past this, clients reload.
+LIVE_DELTA_LIMIT = 200
+LIVE_EVENT_RETENTION = timedelta(hours=1)
+
+
+class Subscription:
+    """One open stream: a bounded queue owned by the stream's event loop."""
+
+    def __init__(self, broker, loop):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+    def _deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client drops events rather than growing without bound;
+            # the page reloads from the versioned cache anyway.
+            pass
+
+
+class LocalBroker:
+    """In-process fan-out; publish() may be called from any thread."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        """Register a stream; must be called from inside its event loop."""
+        subscription = Subscription(self, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self, loop=None) -> int:
+        with self._lock:
+            return sum(1 for s in self._subscribers if loop is None or s.loop is loop)
+
+    def _fan_out(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:  # loop already closed
+                self._unsubscribe(subscription)
+
+    def publish(self, event):
+        self._fan_out(event)
+
+
+class DatabaseBroker(LocalBroker):
+    """LocalBroker fed from the LiveEvent table, so other processes can publish."""
+
+    def __init__(self, poll_interval=None):
+        super().__init__()
+        self.poll_interval = poll_interval or settings.LIVE_POLL_INTERVAL
+        self._pollers = {}
+        self._last_id = {}
+
+    def publish(self, event):
+        LiveEvent.objects.create(payload=event)
+        LiveEvent.objects.filter(created_at__lt=timezone.now() - LIVE_EVENT_RETENTION).delete()
+
+    def subscribe(self) -> Subscription:
+        subscription = super().subscribe()
+        loop = subscription.loop
+        with self._lock:
+            if loop not in self._pollers:
+                self._pollers[loop] = loop.create_task(self._poll(loop))
+        return subscription
+
+    async def _poll(self, loop):
+        try:
+            if loop not in self._last_id:
+                self._last_id[loop] = (await LiveEvent.objects.aaggregate(last=Max("pk")))["last"] or 0
+            while self.subscriber_count(loop):
+                await asyncio.sleep(self.poll_interval)
+                try:
+                    await self.poll_once(loop)
+                except Exception:
+                    logger.exception("Live event poll failed")
+        finally:
+            with self._lock:
+                self._pollers.pop(loop, None)
+
+    async def poll_once(self, loop):
+        """Fan out every LiveEvent newer than the last one this loop has seen."""
+        last_id = self._last_id.get(loop, 0)
+        async for pk, payload in LiveEvent.objects.filter(pk__gt=last_id).values_list("pk", "payload"):
+            self._fan_out(payload)
+            self._last_id[loop] = pk
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by settings.LIVE_BROKER."""
+    path = settings.LIVE_BROKER
+    with _brokers_lock:
+        if path not in _brokers:
+            _brokers[path] = import_string(path)()
+        return _brokers[path]
+
+
+def scores_event(gp, user_scores) -> dict:
+    """
+    A "scores" event for `gp`: the new score, season total and rank of up to
+    LIVE_DELTA_LIMIT players whose pick changed (user_id -> score).
+    """
+    limited = dict(list(user_scores.items())[:LIVE_DELTA_LIMIT])
+    standings = SeasonStanding.objects.filter(season=gp.season_year, user_id__in=limited).values_list(
+        "user_id", "user__username", "total", "rank"
+    )
+    return {
+        "type": "scores",
+        "season": gp.season_year,
+        "round": gp.round,
+        "gp": gp.slug,
+        "changed": len(user_scores),
+        "truncated": len(user_scores) > len(limited),
+        "deltas": [
+            {"username": username, "score": limited[user_id], "total": total, "rank": rank}
+            for user_id, username, total, rank in standings.order_by("rank", "user__username")
+        ],
+    }
+
+
+def publish_scores(gp, user_scores):
+    get_broker().publish(scores_event(gp, user_scores))
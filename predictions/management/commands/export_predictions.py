@@ -0,0 +1,50 @@
+"""
+Management command to export every prediction with its score.
+
+Usage:
+    python manage.py export_predictions                          # CSV of all seasons to stdout
+    python manage.py export_predictions --season 2026 --round 3  # One GP
+    python manage.py export_predictions --format ndjson -o picks.ndjson
+    python manage.py export_predictions --gzip -o picks.csv.gz   # Compressed file
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream all predictions joined with user, GP and driver codes as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", type=int, help="Only this season")
+        parser.add_argument("--round", type=int, dest="round_num", help="Only this round")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Output format")
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output (needs --output)")
+        parser.add_argument("-o", "--output", help="File to write (default: stdout)")
+        parser.add_argument(
+            "--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per database round trip"
+        )
+
+    def handle(self, *args, **options):
+        if options["gzip"] and not options["output"]:
+            raise CommandError("--gzip escribe binario; indica un fichero con --output.")
+
+        blocks = stream_export(
+            options["format"],
+            season=options["season"],
+            round_num=options["round_num"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+
+        if not options["output"]:
+            for block in blocks:
+                self.stdout.write(block.decode(), ending="")
+            return
+
+        written = 0
+        with open(options["output"], "wb") as fh:
+            for block in blocks:
+                fh.write(block)
+                written += len(block)
+        self.stderr.write(self.style.SUCCESS(f"Exportado a {options['output']} ({written} bytes)."))
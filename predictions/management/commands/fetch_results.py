@@ -7,23 +7,19 @@ Usage:
     python manage.py fetch_results --round 1    # Fetch specific round
     python manage.py fetch_results --dry-run    # Show what would happen without saving
     python manage.py fetch_results --force      # Re-fetch even if GP already has results
+    python manage.py fetch_results --force --concurrency 4  # Fetch rounds in parallel
+    python manage.py fetch_results --force --offline        # Re-score from cached responses only
 """
-import requests
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
-from predictions.models import Driver, GrandPrix, Prediction
-
-JOLPICA_URL = "https://api.jolpi.ca/ergast/f1/{year}/{round}/results/"
-
-# Drivers we track with their codes in our DB
-ALONSO_CODE = "ALO"
-SAINZ_CODE = "SAI"
-
-
-def _is_classified_finish(status: str) -> bool:
-    """Returns True if the status indicates the driver finished the race."""
-    return status in ("Finished", "Lapped") or status.startswith("+")
+from predictions.jolpica import (
+    DEFAULT_RATE, JOLPICA_BASE_URL, JolpicaClient, OfflineCacheMiss, ResponseCache, parse_results,
+)
+from predictions.models import ALONSO_CODE, CURRENT_SEASON, SAINZ_CODE, Driver, GrandPrix, RaceResult
+from predictions.scoring import score_grand_prix
 
 
 class Command(BaseCommand):
@@ -32,7 +28,17 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--round", type=int, dest="round_num", help="Round number to fetch")
         parser.add_argument("--dry-run", action="store_true", help="Show what would be done without saving")
-        parser.add_argument("--force", action="store_true", help="Re-fetch even if GP already has results")
+        parser.add_argument("--force", action="store_true", help="Re-fetch and re-apply even if GP already has results")
+        parser.add_argument("--concurrency", type=int, default=1, help="Rounds to fetch in parallel")
+        parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Max API requests per second")
+        parser.add_argument("--api-url", default=JOLPICA_BASE_URL, help="Jolpica base URL")
+        parser.add_argument("--cache-dir", help="Response cache directory (default: settings.JOLPICA_CACHE_DIR)")
+        parser.add_argument("--no-cache", action="store_true", help="Don't read or write the response cache")
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="Only use cached responses, never the network; cached payloads are always re-applied",
+        )
 
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
@@ -40,123 +46,142 @@ class Command(BaseCommand):
         round_num = options.get("round_num")
 
         now = timezone.now()
-        qs = GrandPrix.objects.prefetch_related("sessions").filter(season_year=2026)
+        # Wait at least 4 hours after race start before fetching
+        qs = GrandPrix.objects.filter(
+            season_year=CURRENT_SEASON,
+            race_start_utc__lte=now - timezone.timedelta(hours=4),
+        )
 
         if round_num:
             qs = qs.filter(round=round_num)
 
-        pending = []
-        for gp in qs:
-            race_time = gp.race_start_utc
-            if race_time is None:
-                continue
-            # Wait at least 4 hours after race start before fetching
-            if now < race_time + timezone.timedelta(hours=4):
-                continue
-            if gp.has_results and not force:
-                continue
-            pending.append(gp)
+        pending = [gp for gp in qs if force or not gp.has_results]
 
         if not pending:
             self.stdout.write("No hay GPs pendientes de resultados.")
             return
 
-        for gp in pending:
-            self.stdout.write(f"\nProcesando: {gp.name} (Ronda {gp.round}, {gp.season_year})")
-            self._fetch_and_save(gp, dry_run)
-
-    def _fetch_and_save(self, gp: GrandPrix, dry_run: bool) -> None:
-        url = JOLPICA_URL.format(year=gp.season_year, round=gp.round)
-
+        if options["offline"] and options["no_cache"]:
+            raise CommandError("--offline necesita la cache; no se puede combinar con --no-cache.")
+        cache = None
+        if not options["no_cache"]:
+            cache = ResponseCache(options["cache_dir"] or settings.JOLPICA_CACHE_DIR)
+
+        client = JolpicaClient(
+            base_url=options["api_url"],
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            cache=cache,
+            offline=options["offline"],
+        )
+        by_key = {(gp.season_year, gp.round): gp for gp in pending}
         try:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            self.stderr.write(f"  ERROR conectando con la API: {e}")
-            return
-
+            # Requests run in parallel; parsing and DB writes stay on this thread.
+            for key, fetched, error in client.fetch_many(list(by_key)):
+                gp = by_key[key]
+                self.stdout.write(f"\nProcesando: {gp.name} (Ronda {gp.round}, {gp.season_year})")
+                if isinstance(error, OfflineCacheMiss):
+                    self.stderr.write("  ERROR: sin respuesta en cache (modo offline).")
+                elif isinstance(error, ValueError):
+                    self.stderr.write("  ERROR: formato de respuesta inesperado.")
+                elif error is not None:
+                    self.stderr.write(f"  ERROR conectando con la API: {error}")
+                elif fetched.unchanged and not (force or options["offline"]):
+                    self.stdout.write("  Sin cambios desde la ultima ejecucion.")
+                elif self._save_results(gp, fetched, dry_run):
+                    client.mark_processed(fetched)
+        finally:
+            client.close()
+
+    def _save_results(self, gp: GrandPrix, fetched, dry_run: bool) -> bool:
+        """
+        Parse a results payload and store it. Returns False when nothing was
+        applied and the same payload should be processed again next run.
+        """
         try:
-            races = response.json()["MRData"]["RaceTable"]["Races"]
+            races = fetched.payload["MRData"]["RaceTable"]["Races"]
         except (KeyError, TypeError, ValueError):
             self.stderr.write("  ERROR: formato de respuesta inesperado.")
-            return
+            return False
 
         if not races:
             self.stdout.write("  Sin resultados disponibles aún.")
-            return
+            return True
 
         results = races[0].get("Results", [])
         if not results:
             self.stdout.write("  Sin resultados disponibles aún.")
-            return
+            return True
 
-        # Build position -> driver_code map from API
-        pos_to_code = {int(r["position"]): r["Driver"].get("code", "").upper() for r in results}
+        try:
+            parsed = parse_results(results)
+        except (KeyError, TypeError, ValueError):
+            self.stderr.write("  ERROR: formato de respuesta inesperado.")
+            return False
 
-        top5_codes = [pos_to_code.get(p, "?") for p in range(1, 6)]
-        self.stdout.write(f"  Top 5 API: {', '.join(top5_codes)}")
+        self.stdout.write(f"  Top 5 API: {', '.join(code or '?' for code in parsed.top5)}")
 
         # Resolve top 5 drivers from DB
-        drivers_by_code = {d.code.upper(): d for d in Driver.objects.filter(active=True)}
+        drivers_by_code = {d.code.upper(): d for d in Driver.objects.all()}
 
-        top5_drivers = {}
-        for pos in range(1, 6):
-            code = pos_to_code.get(pos)
+        for pos, code in enumerate(parsed.top5, start=1):
             driver = drivers_by_code.get(code) if code else None
-            if not driver:
+            if not driver or not driver.active:
                 self.stderr.write(
                     f"  ADVERTENCIA: piloto no encontrado para P{pos} (código API: {code!r}). "
                     "Comprueba que el código coincide con el de la BD."
                 )
-                return
-            top5_drivers[pos] = driver
+                return False
 
         # Alonso position
-        alonso_pos = self._get_driver_pos(results, ALONSO_CODE)
-        sainz_pos = self._get_driver_pos(results, SAINZ_CODE)
+        alonso_pos = self._get_driver_pos(parsed, ALONSO_CODE)
+        sainz_pos = self._get_driver_pos(parsed, SAINZ_CODE)
 
         self.stdout.write(f"  Alonso: P{alonso_pos}  |  Sainz: P{sainz_pos}")
 
+        unknown = [row.code for row in parsed.rows if row.code not in drivers_by_code]
+        if unknown:
+            self.stdout.write(
+                f"  AVISO: pilotos sin ficha en la BD, no se guardan en la clasificacion: {', '.join(unknown)}"
+            )
+
         if dry_run:
             self.stdout.write("  [DRY RUN] No se guardaron cambios.")
-            return
-
-        # Save results to GrandPrix
-        gp.result_p1 = top5_drivers[1]
-        gp.result_p2 = top5_drivers[2]
-        gp.result_p3 = top5_drivers[3]
-        gp.result_p4 = top5_drivers[4]
-        gp.result_p5 = top5_drivers[5]
-        gp.result_alonso_pos = alonso_pos
-        gp.result_sainz_pos = sainz_pos
-        gp.save()
+            return False
+
+        # Store the whole classification; the GP's result columns derive from it.
+        classification = [
+            RaceResult(
+                gp_id=gp.pk,
+                driver_id=drivers_by_code[row.code].pk,
+                position=row.position,
+                status=row.status,
+                points=row.points,
+                grid=row.grid,
+            )
+            for row in parsed.rows
+            if row.code in drivers_by_code
+        ]
+        with transaction.atomic():
+            RaceResult.objects.replace({gp.pk: classification})
+            GrandPrix.objects.filter(pk=gp.pk).sync_results()
+        gp.refresh_from_db()
 
         self.stdout.write(self.style.SUCCESS("  Resultados guardados en BD."))
 
         # Auto-calculate scores for all predictions of this GP
-        predictions = Prediction.objects.filter(event=gp).select_related(
-            "p1", "p2", "p3", "p4", "p5", "event"
-        )
-        count = 0
-        for pred in predictions:
-            pred.score = pred.calculate_score()
-            pred.save(skip_lock_check=True)
-            count += 1
+        result = score_grand_prix(gp)
 
-        self.stdout.write(self.style.SUCCESS(f"  Puntuaciones calculadas: {count} predicciones."))
+        self.stdout.write(self.style.SUCCESS(
+            f"  Puntuaciones calculadas: {result.changed}/{result.total} predicciones "
+            f"actualizadas en {result.elapsed:.2f}s."
+        ))
+        return True
 
-    def _get_driver_pos(self, results: list, driver_code: str) -> int:
+    def _get_driver_pos(self, parsed, driver_code: str) -> int:
         """Returns finishing position for a driver, 0 if DNF or not found."""
-        result = next(
-            (r for r in results if r["Driver"].get("code", "").upper() == driver_code),
-            None,
-        )
-        if result is None:
+        position = parsed.position(driver_code)
+        if position is None:
             self.stdout.write(f"  AVISO: {driver_code} no encontrado en los resultados de la API.")
             return 0
-
-        status = result.get("status", "")
-        if not _is_classified_finish(status):
-            return 0  # DNF
-
-        return int(result["position"])
+        return position
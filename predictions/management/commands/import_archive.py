@@ -0,0 +1,172 @@
+"""
+Management command to backfill past seasons from Ergast/Jolpica JSON dumps.
+
+Usage:
+    python manage.py import_archive data/archive/2023.json data/archive/all.json.gz
+    python manage.py import_archive archive.json --batch-size 200
+    python manage.py import_archive archive.json --restart   # Ignore the checkpoint
+
+Races are streamed from each file (see predictions.archive) and written in
+batches, each in its own transaction, with the same bulk upserts as
+seed_2026. After every committed batch the checkpoint records how many races
+of the file are in, so an interrupted import resumes where it stopped; a
+finished file is skipped until it changes or --restart is given.
+"""
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from predictions.archive import Checkpoint, iter_races, open_archive, race_event
+from predictions.bulk import UpsertCount, bulk_upsert
+from predictions.models import Driver, GrandPrix, Prediction, RaceResult, Session
+from predictions.scoring import score_grand_prix
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+DEFAULT_CHECKPOINT = BASE_DIR / ".cache" / "import_archive.json"
+DEFAULT_BATCH_SIZE = 100
+
+EVENT_FIELDS = ["season_year", "round", "name", "country", "circuit"]
+
+
+class Command(BaseCommand):
+    help = "Import past seasons (calendar, sessions and results) from Ergast/Jolpica JSON archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Archive files (.json or .json.gz)")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Races per transaction")
+        parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the top")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser al menos 1.")
+        paths = [Path(f) for f in options["files"]]
+        for path in paths:
+            if not path.exists():
+                raise CommandError(f"No existe el fichero: {path}")
+
+        checkpoint = Checkpoint(options["checkpoint"])
+        started = time.perf_counter()
+        for path in paths:
+            if options["restart"]:
+                checkpoint.clear(path)
+            self._import_file(path, checkpoint, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Importacion completada: {len(paths)} archivo(s) en {time.perf_counter() - started:.2f}s."
+        ))
+
+    def _import_file(self, path, checkpoint, batch_size):
+        state = checkpoint.get(path)
+        if state["done"]:
+            self.stdout.write(f"{path.name}: ya importado ({state['races']} carreras).")
+            return
+        done = state["races"]
+        if done:
+            self.stdout.write(f"{path.name}: reanudando tras {done} carreras.")
+        else:
+            self.stdout.write(f"{path.name}:")
+
+        counts = {label: UpsertCount() for label in ("Drivers", "Events", "Sessions", "Results")}
+        with open_archive(path) as stream:
+            # Skipped races are still parsed, but parsing is cheap next to the writes.
+            races = islice(iter_races(stream), done, None)
+            try:
+                while batch := list(islice(races, batch_size)):
+                    with transaction.atomic():
+                        for label, count in self._import_batch(batch).items():
+                            counts[label] += count
+                    done += len(batch)
+                    checkpoint.set(path, done)
+            except (KeyError, TypeError, ValueError) as exc:
+                raise CommandError(
+                    f"{path.name}: archivo no valido tras {done} carreras importadas ({exc!r})."
+                ) from exc
+        checkpoint.set(path, done, done=True)
+
+        for label, count in counts.items():
+            self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(f"  {done} carreras.")
+
+    def _import_batch(self, races):
+        events = [race_event(race) for race in races]
+
+        # Seasons seeded from the calendar already have their GPs under
+        # other slugs; update those rather than adding a second copy.
+        known_slugs = {
+            (season, round_num): slug
+            for season, round_num, slug in GrandPrix.objects.filter(
+                season_year__in={ev["season_year"] for ev in events}
+            ).values_list("season_year", "round", "slug")
+        }
+        for ev in events:
+            ev["slug"] = known_slugs.get((ev["season_year"], ev["round"]), ev["slug"])
+
+        driver_count = self._upsert_drivers(events)
+        gp_count = bulk_upsert(
+            GrandPrix,
+            [{k: ev[k] for k in ("slug", *EVENT_FIELDS)} for ev in events],
+            key=["slug"],
+            fields=EVENT_FIELDS,
+        )
+        gp_ids = dict(GrandPrix.objects.filter(slug__in=[ev["slug"] for ev in events]).values_list("slug", "id"))
+
+        session_count = bulk_upsert(
+            Session,
+            [
+                {"event_id": gp_ids[ev["slug"]], "session_type": session_type, "start_utc": start, "order": order}
+                for ev in events
+                for order, (session_type, start) in enumerate(ev["sessions"], start=1)
+            ],
+            key=["event_id", "session_type"],
+            fields=["start_utc", "order"],
+        )
+
+        # Races without a classification keep whatever results are stored.
+        driver_ids = dict(Driver.objects.filter(code__in=self._codes(events)).values_list("code", "id"))
+        classified = RaceResult.objects.replace({
+            gp_ids[ev["slug"]]: [
+                RaceResult(
+                    gp_id=gp_ids[ev["slug"]],
+                    driver_id=driver_ids[row.code],
+                    position=row.position,
+                    status=row.status,
+                    points=row.points,
+                    grid=row.grid,
+                )
+                for row in ev["results"].rows
+            ]
+            for ev in events
+            if ev["results"] is not None
+        })
+
+        # bulk_create skips save(): refresh the schedules, results and data
+        # versions, and rescore any changed result that players had picks for.
+        if gp_count.inserted or gp_count.updated or session_count.inserted or session_count.updated:
+            GrandPrix.objects.filter(pk__in=gp_ids.values()).sync_schedules()
+        if classified:
+            changed = GrandPrix.objects.filter(pk__in=classified).sync_results()
+            picked = set(Prediction.objects.filter(event__in=changed).values_list("event_id", flat=True))
+            for gp in changed:
+                if gp.pk in picked:
+                    score_grand_prix(gp)
+        with_results = sum(1 for ev in events if ev["results"] is not None)
+        result_count = UpsertCount(updated=len(classified), unchanged=with_results - len(classified))
+
+        return {"Drivers": driver_count, "Events": gp_count, "Sessions": session_count, "Results": result_count}
+
+    @staticmethod
+    def _codes(events):
+        return {row.code for ev in events if ev["results"] is not None for row in ev["results"].rows}
+
+    def _upsert_drivers(self, events):
+        """Add drivers the archive's classifications need as inactive; existing ones are left alone."""
+        names = {row.code: row.name for ev in events if ev["results"] is not None for row in ev["results"].rows}
+        return bulk_upsert(
+            Driver,
+            [{"code": code, "name": names.get(code) or code, "active": False} for code in self._codes(events)],
+            key=["code"],
+            fields=[],
+        )
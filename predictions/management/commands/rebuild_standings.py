@@ -0,0 +1,56 @@
+"""
+Management command to rebuild the materialized season standings.
+
+Usage:
+    python manage.py rebuild_standings                 # Rebuild current season
+    python manage.py rebuild_standings --season 2025   # Rebuild another season
+    python manage.py rebuild_standings --check         # Only compare, don't write
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from predictions.models import CURRENT_SEASON, SeasonStanding
+
+
+class Command(BaseCommand):
+    help = "Rebuild SeasonStanding from Prediction rows and verify it against the live aggregate"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", type=int, default=CURRENT_SEASON, help="Season to rebuild")
+        parser.add_argument("--check", action="store_true", help="Only report drift, don't rebuild")
+
+    def handle(self, *args, **options):
+        season = options["season"]
+
+        drift = self._drift(season)
+        self.stdout.write(f"Temporada {season}: {len(drift)} jugador(es) desincronizados.")
+        for user_id, (stored, live) in sorted(drift.items()):
+            self.stdout.write(f"  user {user_id}: tabla={stored} real={live}")
+
+        if options["check"]:
+            return
+
+        with transaction.atomic():
+            SeasonStanding.objects.filter(season=season).delete()
+            SeasonStanding.objects.refresh(season)
+
+        remaining = self._drift(season)
+        if remaining:
+            raise CommandError(f"La tabla sigue desincronizada para {len(remaining)} jugador(es).")
+
+        count = SeasonStanding.objects.filter(season=season).count()
+        self.stdout.write(self.style.SUCCESS(f"Clasificacion reconstruida: {count} jugadores."))
+
+    def _drift(self, season) -> dict:
+        """user_id -> (stored, live) for every player whose row doesn't match."""
+        live = SeasonStanding.objects.live_aggregate(season)
+        stored = {
+            user_id: (total, picks, first_pick)
+            for user_id, total, picks, first_pick in SeasonStanding.objects.filter(season=season)
+            .values_list("user_id", "total", "picks", "first_pick")
+        }
+        return {
+            user_id: (stored.get(user_id), live.get(user_id))
+            for user_id in set(live) | set(stored)
+            if stored.get(user_id) != live.get(user_id)
+        }
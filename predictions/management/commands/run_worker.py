@@ -0,0 +1,55 @@
+"""
+Management command to run queued background jobs (see predictions.jobs).
+
+Usage:
+    python manage.py run_worker               # Keep polling for jobs
+    python manage.py run_worker --once        # Drain the due jobs and exit (cron)
+    python manage.py run_worker --poll 2 --max-jobs 100
+"""
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from predictions.jobs import run_job
+from predictions.models import Job
+
+DEFAULT_POLL = 5.0
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when no job is due instead of waiting")
+        parser.add_argument("--poll", type=float, default=DEFAULT_POLL, help="Seconds between polls of an empty queue")
+        parser.add_argument("--max-jobs", type=int, help="Exit after running this many jobs")
+
+    def handle(self, *args, **options):
+        if options["poll"] <= 0:
+            raise CommandError("--poll debe ser mayor que 0.")
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        done = failed = 0
+        try:
+            while options["max_jobs"] is None or done + failed < options["max_jobs"]:
+                # A long-lived worker must not keep a connection the database dropped.
+                close_old_connections()
+                job = Job.objects.claim(worker)
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                started = time.perf_counter()
+                if run_job(job):
+                    done += 1
+                    self.stdout.write(f"{job}: {job.result} ({time.perf_counter() - started:.2f}s)")
+                else:
+                    failed += 1
+                    retry = f", reintento a las {job.run_after:%H:%M:%S}" if job.status == Job.QUEUED else ""
+                    self.stderr.write(f"{job}: error en el intento {job.attempts}{retry}.")
+        except KeyboardInterrupt:
+            self.stdout.write("Interrumpido.")
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker}: {done} trabajo(s) completados, {failed} con error."))
@@ -0,0 +1,31 @@
+"""
+Management command to bring a season's prediction scores up to date.
+
+Usage:
+    python manage.py score_season                  # Current season
+    python manage.py score_season --season 2025
+
+Only predictions scored against an older result version (or never scored)
+are recomputed; see scoring.score_season.
+"""
+from django.core.management.base import BaseCommand
+
+from predictions.models import CURRENT_SEASON
+from predictions.scoring import score_season
+
+
+class Command(BaseCommand):
+    help = "Rescore the predictions of a season whose results or picks changed since they were scored"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", type=int, default=CURRENT_SEASON, help="Season to score")
+
+    def handle(self, *args, **options):
+        result = score_season(options["season"])
+        if not result.total:
+            self.stdout.write(f"Temporada {options['season']}: todas las puntuaciones estan al dia.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Temporada {options['season']}: {result.changed}/{result.total} predicciones "
+            f"actualizadas en {result.elapsed:.2f}s."
+        ))
@@ -4,189 +4,223 @@ Management command to seed 2026 F1 data.
 Usage:
     python manage.py seed_2026                  # From data/f1calendar_2026.json
     python manage.py seed_2026 --from-fixtures  # From JSON fixtures
+    python manage.py seed_2026 --season 2026 --season 2027      # data/f1calendar_<season>.json each
+    python manage.py seed_2026 data/a.json data/b.json          # Explicit calendar files
+
+Every table is written with bulk_create(update_conflicts=True) on its
+natural key, after comparing against the rows already there, so a re-run
+writes nothing for unchanged data and reports inserted/updated/unchanged.
 """
 import json
+import time
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils.dateparse import parse_datetime
 
-from predictions.models import Team, Driver, GrandPrix, Session
+from predictions.bulk import bulk_upsert
+from predictions.models import DataVersion, Driver, GrandPrix, Session, Team, invalidate_driver_roster
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent.parent.parent / "fixtures"
+DEFAULT_SEASON = 2026
+
+DEFAULT_TEAMS = [
+    {"slug": "red-bull", "name": "Red Bull Racing", "color": "#3671C6"},
+    {"slug": "ferrari", "name": "Ferrari", "color": "#E80020"},
+    {"slug": "mclaren", "name": "McLaren", "color": "#FF8000"},
+    {"slug": "mercedes", "name": "Mercedes", "color": "#27F4D2"},
+    {"slug": "aston-martin", "name": "Aston Martin", "color": "#229971"},
+    {"slug": "alpine", "name": "Alpine", "color": "#FF87BC"},
+    {"slug": "williams", "name": "Williams", "color": "#64C4FF"},
+    {"slug": "racing-bulls", "name": "Racing Bulls", "color": "#6692FF"},
+    {"slug": "audi", "name": "Audi", "color": "#52E252"},
+    {"slug": "haas", "name": "Haas F1 Team", "color": "#B6BABD"},
+    {"slug": "cadillac", "name": "Cadillac", "color": "#1E3D6B"},
+]
+
+DEFAULT_DRIVERS = [
+    {"code": "VER", "name": "Max Verstappen", "team_slug": "red-bull"},
+    {"code": "HAD", "name": "Isack Hadjar", "team_slug": "red-bull"},
+    {"code": "LEC", "name": "Charles Leclerc", "team_slug": "ferrari"},
+    {"code": "HAM", "name": "Lewis Hamilton", "team_slug": "ferrari"},
+    {"code": "NOR", "name": "Lando Norris", "team_slug": "mclaren"},
+    {"code": "PIA", "name": "Oscar Piastri", "team_slug": "mclaren"},
+    {"code": "RUS", "name": "George Russell", "team_slug": "mercedes"},
+    {"code": "ANT", "name": "Kimi Antonelli", "team_slug": "mercedes"},
+    {"code": "ALO", "name": "Fernando Alonso", "team_slug": "aston-martin"},
+    {"code": "STR", "name": "Lance Stroll", "team_slug": "aston-martin"},
+    {"code": "GAS", "name": "Pierre Gasly", "team_slug": "alpine"},
+    {"code": "COL", "name": "Franco Colapinto", "team_slug": "alpine"},
+    {"code": "ALB", "name": "Alexander Albon", "team_slug": "williams"},
+    {"code": "SAI", "name": "Carlos Sainz", "team_slug": "williams"},
+    {"code": "LAW", "name": "Liam Lawson", "team_slug": "racing-bulls"},
+    {"code": "LIN", "name": "Arvid Lindblad", "team_slug": "racing-bulls"},
+    {"code": "HUL", "name": "Nico Hulkenberg", "team_slug": "audi"},
+    {"code": "BOR", "name": "Gabriel Bortoleto", "team_slug": "audi"},
+    {"code": "OCO", "name": "Esteban Ocon", "team_slug": "haas"},
+    {"code": "BEA", "name": "Oliver Bearman", "team_slug": "haas"},
+    {"code": "PER", "name": "Sergio Perez", "team_slug": "cadillac"},
+    {"code": "BOT", "name": "Valtteri Bottas", "team_slug": "cadillac"},
+]
 
 
 class Command(BaseCommand):
-    help = "Seed 2026 F1 teams, drivers, events and sessions (idempotent upsert)"
+    help = "Seed F1 teams, drivers, events and sessions (idempotent bulk upsert)"
 
     def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="Calendar JSON files to load")
+        parser.add_argument(
+            "--season",
+            type=int,
+            action="append",
+            dest="seasons",
+            help="Load data/f1calendar_<season>.json (repeatable)",
+        )
         parser.add_argument(
             "--from-fixtures",
             action="store_true",
-            help="Load from JSON fixtures instead of data file",
+            help="Load teams and drivers from JSON fixtures instead of the built-in list",
         )
 
     def handle(self, *args, **options):
-        if options["from_fixtures"]:
-            self._load_from_fixtures()
-        else:
-            self._load_from_data_file()
-
-        self.stdout.write(self.style.SUCCESS("Seed completed."))
-
-    def _load_from_fixtures(self):
-        """Load from Django fixtures JSON files."""
-        fixtures_dir = Path(__file__).resolve().parent.parent.parent / "fixtures"
-
-        # Teams
-        self._load_teams_fixture(fixtures_dir / "teams_2026.json")
-
-        # Drivers
-        self._load_drivers_fixture(fixtures_dir / "drivers_2026.json")
-
-        # Events + Sessions from data file
-        self._load_events_from_data()
-
-    def _load_from_data_file(self):
-        """Load from data/f1calendar_2026.json."""
-        # First seed teams and drivers with defaults
-        self._seed_default_teams()
-        self._seed_default_drivers()
-
-        # Then load events
-        self._load_events_from_data()
-
-    def _load_teams_fixture(self, path):
+        calendars = [Path(f) for f in options["files"]]
+        calendars += [BASE_DIR / "data" / f"f1calendar_{season}.json" for season in options["seasons"] or []]
+        if not calendars:
+            calendars = [BASE_DIR / "data" / f"f1calendar_{DEFAULT_SEASON}.json"]
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            if options["from_fixtures"]:
+                teams, team_slugs = self._teams_from_fixture(FIXTURES_DIR / "teams_2026.json")
+                drivers = self._drivers_from_fixture(FIXTURES_DIR / "drivers_2026.json", team_slugs)
+            else:
+                teams = [dict(t, active=True) for t in DEFAULT_TEAMS]
+                drivers = [dict(d, active=True) for d in DEFAULT_DRIVERS]
+
+            self._report("Teams", self._upsert_teams(teams))
+            self._report("Drivers", self._upsert_drivers(drivers))
+
+            events = []
+            for path in calendars:
+                events += self._read_calendar(path)
+            gp_count, session_count = self._upsert_events(events)
+            self._report("Events", gp_count)
+            self._report("Sessions", session_count)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seed completed: {len(calendars)} calendario(s) en {time.perf_counter() - started:.2f}s."
+        ))
+
+    def _report(self, label, count):
+        self.stdout.write(f"  {label}: {count}")
+
+    def _read_json(self, path):
         if not path.exists():
-            self.stdout.write(f"  Teams fixture not found: {path}")
-            return
+            raise CommandError(f"No existe el fichero: {path}")
         with open(path, "r") as f:
-            data = json.load(f)
-        for item in data:
-            fields = item["fields"]
-            Team.objects.update_or_create(
-                slug=fields["slug"],
-                defaults={
-                    "name": fields["name"],
-                    "color": fields.get("color", ""),
-                    "active": fields.get("active", True),
-                },
-            )
-        self.stdout.write(f"  Teams: {len(data)} upserted")
-
-    def _load_drivers_fixture(self, path):
-        if not path.exists():
-            self.stdout.write(f"  Drivers fixture not found: {path}")
-            return
-        with open(path, "r") as f:
-            data = json.load(f)
-        for item in data:
-            fields = item["fields"]
-            team = None
-            if fields.get("team"):
-                team = Team.objects.filter(pk=fields["team"]).first()
-            Driver.objects.update_or_create(
-                code=fields["code"],
-                defaults={
-                    "name": fields["name"],
-                    "team": team,
-                    "active": fields.get("active", True),
-                },
-            )
-        self.stdout.write(f"  Drivers: {len(data)} upserted")
-
-    def _load_events_from_data(self):
-        """Load events and sessions from data/f1calendar_2026.json."""
-        base_dir = Path(__file__).resolve().parent.parent.parent.parent
-        data_file = base_dir / "data" / "f1calendar_2026.json"
-
-        if not data_file.exists():
-            self.stdout.write(self.style.WARNING(f"  Data file not found: {data_file}"))
-            return
-
-        with open(data_file, "r") as f:
-            events_data = json.load(f)
-
-        events_count = 0
-        sessions_count = 0
-
-        for ev in events_data:
-            gp, _ = GrandPrix.objects.update_or_create(
-                slug=ev["slug"],
-                defaults={
+            return json.load(f)
+
+    def _teams_from_fixture(self, path):
+        """Team rows, plus fixture pk -> slug so drivers can point at them."""
+        data = self._read_json(path)
+        teams = [
+            {
+                "slug": item["fields"]["slug"],
+                "name": item["fields"]["name"],
+                "color": item["fields"].get("color", ""),
+                "active": item["fields"].get("active", True),
+            }
+            for item in data
+        ]
+        return teams, {item["pk"]: item["fields"]["slug"] for item in data}
+
+    def _drivers_from_fixture(self, path, team_slugs):
+        return [
+            {
+                "code": item["fields"]["code"],
+                "name": item["fields"]["name"],
+                "team_slug": team_slugs.get(item["fields"].get("team")),
+                "active": item["fields"].get("active", True),
+            }
+            for item in self._read_json(path)
+        ]
+
+    def _read_calendar(self, path):
+        events = self._read_json(path)
+        self.stdout.write(f"  {path.name}: {len(events)} eventos")
+        return events
+
+    def _upsert_teams(self, teams):
+        count = bulk_upsert(
+            Team,
+            [{"slug": t["slug"], "name": t["name"], "color": t.get("color", ""), "active": t["active"]} for t in teams],
+            key=["slug"],
+            fields=["name", "color", "active"],
+        )
+        if count.inserted or count.updated:
+            invalidate_driver_roster()
+        return count
+
+    def _upsert_drivers(self, drivers):
+        team_ids = dict(Team.objects.values_list("slug", "id"))
+        count = bulk_upsert(
+            Driver,
+            [
+                {
+                    "code": d["code"],
+                    "name": d["name"],
+                    "team_id": team_ids.get(d.get("team_slug")),
+                    "active": d["active"],
+                }
+                for d in drivers
+            ],
+            key=["code"],
+            fields=["name", "team_id", "active"],
+        )
+        if count.inserted or count.updated:
+            invalidate_driver_roster()
+            DataVersion.objects.bump()
+        return count
+
+    def _upsert_events(self, events):
+        gp_count = bulk_upsert(
+            GrandPrix,
+            [
+                {
+                    "slug": ev["slug"],
                     "season_year": ev["season_year"],
                     "round": ev["round"],
                     "name": ev["name"],
                     "country": ev.get("country", ""),
                     "circuit": ev.get("circuit", ""),
-                },
-            )
-            events_count += 1
-
-            for sess in ev.get("sessions", []):
-                Session.objects.update_or_create(
-                    event=gp,
-                    session_type=sess["type"],
-                    defaults={
-                        "start_utc": parse_datetime(sess["start_utc"]),
-                        "order": sess.get("order", 0),
-                    },
-                )
-                sessions_count += 1
-
-        self.stdout.write(f"  Events: {events_count} upserted")
-        self.stdout.write(f"  Sessions: {sessions_count} upserted")
-
-    def _seed_default_teams(self):
-        """Seed default teams for 2026."""
-        teams = [
-            {"slug": "red-bull", "name": "Red Bull Racing", "color": "#3671C6"},
-            {"slug": "ferrari", "name": "Ferrari", "color": "#E80020"},
-            {"slug": "mclaren", "name": "McLaren", "color": "#FF8000"},
-            {"slug": "mercedes", "name": "Mercedes", "color": "#27F4D2"},
-            {"slug": "aston-martin", "name": "Aston Martin", "color": "#229971"},
-            {"slug": "alpine", "name": "Alpine", "color": "#FF87BC"},
-            {"slug": "williams", "name": "Williams", "color": "#64C4FF"},
-            {"slug": "racing-bulls", "name": "Racing Bulls", "color": "#6692FF"},
-            {"slug": "audi", "name": "Audi", "color": "#52E252"},
-            {"slug": "haas", "name": "Haas F1 Team", "color": "#B6BABD"},
-            {"slug": "cadillac", "name": "Cadillac", "color": "#1E3D6B"},
-        ]
-        for t in teams:
-            Team.objects.update_or_create(
-                slug=t["slug"],
-                defaults={"name": t["name"], "color": t["color"], "active": True},
-            )
-        self.stdout.write(f"  Teams: {len(teams)} upserted")
-
-    def _seed_default_drivers(self):
-        """Seed default drivers for 2026."""
-        drivers = [
-            {"code": "VER", "name": "Max Verstappen", "team_slug": "red-bull"},
-            {"code": "HAD", "name": "Isack Hadjar", "team_slug": "red-bull"},
-            {"code": "LEC", "name": "Charles Leclerc", "team_slug": "ferrari"},
-            {"code": "HAM", "name": "Lewis Hamilton", "team_slug": "ferrari"},
-            {"code": "NOR", "name": "Lando Norris", "team_slug": "mclaren"},
-            {"code": "PIA", "name": "Oscar Piastri", "team_slug": "mclaren"},
-            {"code": "RUS", "name": "George Russell", "team_slug": "mercedes"},
-            {"code": "ANT", "name": "Kimi Antonelli", "team_slug": "mercedes"},
-            {"code": "ALO", "name": "Fernando Alonso", "team_slug": "aston-martin"},
-            {"code": "STR", "name": "Lance Stroll", "team_slug": "aston-martin"},
-            {"code": "GAS", "name": "Pierre Gasly", "team_slug": "alpine"},
-            {"code": "COL", "name": "Franco Colapinto", "team_slug": "alpine"},
-            {"code": "ALB", "name": "Alexander Albon", "team_slug": "williams"},
-            {"code": "SAI", "name": "Carlos Sainz", "team_slug": "williams"},
-            {"code": "LAW", "name": "Liam Lawson", "team_slug": "racing-bulls"},
-            {"code": "LIN", "name": "Arvid Lindblad", "team_slug": "racing-bulls"},
-            {"code": "HUL", "name": "Nico Hulkenberg", "team_slug": "audi"},
-            {"code": "BOR", "name": "Gabriel Bortoleto", "team_slug": "audi"},
-            {"code": "OCO", "name": "Esteban Ocon", "team_slug": "haas"},
-            {"code": "BEA", "name": "Oliver Bearman", "team_slug": "haas"},
-            {"code": "PER", "name": "Sergio Perez", "team_slug": "cadillac"},
-            {"code": "BOT", "name": "Valtteri Bottas", "team_slug": "cadillac"},
-        ]
-        for d in drivers:
-            team = Team.objects.filter(slug=d["team_slug"]).first()
-            Driver.objects.update_or_create(
-                code=d["code"],
-                defaults={"name": d["name"], "team": team, "active": True},
-            )
-        self.stdout.write(f"  Drivers: {len(drivers)} upserted")
+                }
+                for ev in events
+            ],
+            key=["slug"],
+            fields=["season_year", "round", "name", "country", "circuit"],
+        )
+
+        gp_ids = dict(GrandPrix.objects.filter(slug__in=[ev["slug"] for ev in events]).values_list("slug", "id"))
+        session_count = bulk_upsert(
+            Session,
+            [
+                {
+                    "event_id": gp_ids[ev["slug"]],
+                    "session_type": sess["type"],
+                    "start_utc": parse_datetime(sess["start_utc"]),
+                    "order": sess.get("order", 0),
+                }
+                for ev in events
+                for sess in ev.get("sessions", [])
+            ],
+            key=["event_id", "session_type"],
+            fields=["start_utc", "order"],
+        )
+
+        # bulk_create skips GrandPrix.save() and Session.save(), so refresh
+        # the denormalized schedule (and the data versions) in one pass.
+        if gp_count.inserted or gp_count.updated or session_count.inserted or session_count.updated:
+            GrandPrix.objects.filter(pk__in=gp_ids.values()).sync_schedules()
+        return gp_count, session_count
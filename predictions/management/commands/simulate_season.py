@@ -0,0 +1,47 @@
+"""
+Management command to forecast the final standings by simulation.
+
+Usage:
+    python manage.py simulate_season                      # Current season, 2000 runs
+    python manage.py simulate_season --runs 20000 --seed 1
+    python manage.py simulate_season --season 2025 --top 50
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.models import CURRENT_SEASON
+from predictions.simulation import SIMULATION_AVAILABLE, SIMULATION_RUNS, simulate_season
+
+
+class Command(BaseCommand):
+    help = "Simulate the rest of the season and print each player's win/podium probability"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", type=int, default=CURRENT_SEASON, help="Season to simulate")
+        parser.add_argument("--runs", type=int, default=SIMULATION_RUNS, help="Seasons to simulate")
+        parser.add_argument("--seed", type=int, help="Random seed, for repeatable output")
+        parser.add_argument("--top", type=int, default=20, help="Players to list (0 = all)")
+
+    def handle(self, *args, **options):
+        if not SIMULATION_AVAILABLE:
+            raise CommandError("La simulacion necesita NumPy (pip install numpy).")
+        if options["runs"] < 1:
+            raise CommandError("--runs debe ser al menos 1.")
+
+        started = time.perf_counter()
+        forecast = simulate_season(options["season"], runs=options["runs"], seed=options["seed"])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Temporada {forecast.season}: {forecast.runs} simulaciones, "
+            f"{forecast.remaining_rounds} carrera(s) por disputar, {len(forecast.players)} jugador(es)."
+        )
+        players = forecast.players[:options["top"]] if options["top"] else forecast.players
+        for p in players:
+            status = "" if p.alive else "  (sin opciones)"
+            self.stdout.write(
+                f"  {p.rank or '-':>4}  {p.username:<20} {p.total:>5} pts  media {p.expected:>7.1f}  "
+                f"gana {p.win:6.1%}  podio {p.podium:6.1%}{status}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Simulacion completada en {elapsed:.2f}s."))
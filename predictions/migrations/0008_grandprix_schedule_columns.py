@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:46
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import migrations, models
+
+
+def backfill_schedule(apps, schema_editor):
+    GrandPrix = apps.get_model("predictions", "GrandPrix")
+    Session = apps.get_model("predictions", "Session")
+
+    starts = {}
+    for event_id, session_type, start_utc in Session.objects.values_list(
+        "event_id", "session_type", "start_utc"
+    ):
+        starts.setdefault(event_id, {})[session_type] = start_utc
+
+    events = list(GrandPrix.objects.all())
+    for gp in events:
+        gp_starts = starts.get(gp.pk, {})
+        gp.race_start_utc = gp_starts.get("RACE")
+        gp.quali_start_utc = gp_starts.get("QUALI")
+        gp.deadline_utc = None
+        quali = gp.quali_start_utc
+        fp1 = gp_starts.get("FP1")
+        if quali:
+            quali = quali.astimezone(dt_timezone.utc)
+            days_since_friday = (quali.weekday() - 4) % 7
+            friday_date = (quali - timedelta(days=days_since_friday)).date()
+            friday_end = datetime.combine(friday_date, time(23, 59, 59), tzinfo=dt_timezone.utc)
+            gp.deadline_utc = min(friday_end, quali)
+        elif fp1:
+            gp.deadline_utc = fp1 - timedelta(hours=24)
+
+    GrandPrix.objects.bulk_update(events, ["race_start_utc", "quali_start_utc", "deadline_utc"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0007_merge_0005_tickets_0006_cancel_bahrain_saudi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grandprix',
+            name='deadline_utc',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='grandprix',
+            name='quali_start_utc',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='grandprix',
+            name='race_start_utc',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+
+def backfill_standings(apps, schema_editor):
+    Prediction = apps.get_model("predictions", "Prediction")
+    SeasonStanding = apps.get_model("predictions", "SeasonStanding")
+
+    rows = (
+        Prediction.objects.order_by()
+        .values("event__season_year", "user_id", "user__username")
+        .annotate(
+            total=models.Sum("score"),
+            picks=models.Count("id"),
+            first_pick=models.Min("submitted_at"),
+        )
+    )
+    by_season = {}
+    for row in rows:
+        by_season.setdefault(row["event__season_year"], []).append(row)
+
+    standings = [
+        SeasonStanding(
+            user_id=row["user_id"],
+            season=season,
+            total=row["total"] or 0,
+            picks=row["picks"],
+            first_pick=row["first_pick"],
+        )
+        for season, season_rows in by_season.items()
+        for row in season_rows
+    ]
+    SeasonStanding.objects.bulk_create(standings, batch_size=500)
+
+    # Same RANK() as SeasonStandingManager.rerank: ties share a rank.
+    for season in by_season:
+        ranked = SeasonStanding.objects.filter(season=season).annotate(
+            position=Window(
+                Rank(),
+                order_by=[F("total").desc(), F("first_pick").asc(nulls_last=True)],
+            )
+        ).values_list("pk", "position")
+        SeasonStanding.objects.bulk_update(
+            [SeasonStanding(pk=pk, rank=position) for pk, position in ranked],
+            ["rank"],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0008_grandprix_schedule_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.IntegerField()),
+                ('total', models.IntegerField(default=0)),
+                ('picks', models.IntegerField(default=0)),
+                ('first_pick', models.DateTimeField(blank=True, null=True)),
+                ('rank', models.IntegerField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='season_standings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['season', 'rank'],
+                'indexes': [models.Index(fields=['season', 'rank'], name='standing_season_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'season'), name='uniq_standing_user_season')],
+            },
+        ),
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
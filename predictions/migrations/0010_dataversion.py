@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0009_seasonstanding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.IntegerField(unique=True)),
+                ('version', models.CharField(max_length=32)),
+            ],
+        ),
+    ]
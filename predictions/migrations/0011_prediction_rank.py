@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:17
+
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+
+def backfill_ranks(apps, schema_editor):
+    Prediction = apps.get_model("predictions", "Prediction")
+
+    scored_events = (
+        # order_by(): Meta.ordering columns would otherwise join the DISTINCT.
+        Prediction.objects.filter(score__isnull=False).values_list("event_id", flat=True).order_by().distinct()
+    )
+    for event_id in scored_events:
+        ranked = Prediction.objects.filter(event_id=event_id).annotate(
+            position=Window(Rank(), order_by=F("score").desc(nulls_last=True))
+        ).values_list("pk", "position")
+        Prediction.objects.bulk_update(
+            [Prediction(pk=pk, rank=position) for pk, position in ranked],
+            ["rank"],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0010_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='rank',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['event', 'rank'], name='prediction_event_rank_idx'),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+    ]
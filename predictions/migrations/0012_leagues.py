@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:23
+
+import django.db.models.deletion
+import predictions.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0011_prediction_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='League',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80)),
+                ('slug', models.SlugField(unique=True)),
+                ('join_code', models.CharField(default=predictions.models._join_code, max_length=8, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leagues_created', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeagueMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='predictions.league')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='league_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['joined_at'],
+                'constraints': [models.UniqueConstraint(fields=('league', 'user'), name='uniq_league_member')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeagueStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.IntegerField()),
+                ('total', models.IntegerField(default=0)),
+                ('picks', models.IntegerField(default=0)),
+                ('first_pick', models.DateTimeField(blank=True, null=True)),
+                ('rank', models.IntegerField(blank=True, null=True)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='predictions.league')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='league_standings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['league', 'season', 'rank'],
+                'indexes': [models.Index(fields=['league', 'season', 'rank'], name='league_standing_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('league', 'user', 'season'), name='uniq_league_standing')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+F1_POINTS = {1: 25, 2: 18, 3: 15, 4: 12, 5: 10, 6: 8, 7: 6, 8: 4, 9: 2, 10: 1}
+
+
+def backfill_classification(apps, schema_editor):
+    """
+    Seed each GP's classification from the five result FKs and the
+    Alonso/Sainz positions, which is all that was stored until now. The
+    derived columns come out the same; fetch_results --force fills in the
+    rest of the field.
+    """
+    GrandPrix = apps.get_model("predictions", "GrandPrix")
+    Driver = apps.get_model("predictions", "Driver")
+    RaceResult = apps.get_model("predictions", "RaceResult")
+
+    tracked = dict(Driver.objects.filter(code__in=["ALO", "SAI"]).values_list("code", "id"))
+    results = []
+    for gp in GrandPrix.objects.filter(result_p5__isnull=False):
+        lines = {
+            pos: getattr(gp, f"result_p{pos}_id") for pos in range(1, 6) if getattr(gp, f"result_p{pos}_id")
+        }
+        for code, pos in (("ALO", gp.result_alonso_pos), ("SAI", gp.result_sainz_pos)):
+            # A DNF's position was never stored; leaving the driver out derives 0 as well.
+            if pos and pos > 5 and code in tracked:
+                lines[pos] = tracked[code]
+        results += [
+            RaceResult(gp_id=gp.pk, driver_id=driver_id, position=pos, status="Finished", points=F1_POINTS.get(pos, 0))
+            for pos, driver_id in lines.items()
+        ]
+    RaceResult.objects.bulk_create(results, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0014_liveevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RaceResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(blank=True, max_length=40)),
+                ('points', models.DecimalField(decimal_places=1, default=0, max_digits=4)),
+                ('grid', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='race_results', to='predictions.driver')),
+                ('gp', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='classification', to='predictions.grandprix')),
+            ],
+            options={
+                'ordering': ['gp', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('gp', 'position'), name='uniq_raceresult_gp_position'), models.UniqueConstraint(fields=('driver', 'gp'), name='uniq_raceresult_driver_gp')],
+            },
+        ),
+        migrations.RunPython(backfill_classification, migrations.RunPython.noop),
+    ]
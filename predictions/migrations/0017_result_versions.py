@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:11
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def result_version(result_key):
+    """Frozen copy of models.result_version() with SCORING_RULES_VERSION = 1."""
+    if None in result_key:
+        return ""
+    return hashlib.blake2b(repr((1, *result_key)).encode(), digest_size=8).hexdigest()
+
+
+def backfill_result_versions(apps, schema_editor):
+    """
+    Stamp every GP with the version of its current results. Predictions
+    start unstamped, so the first scoring run after this rescores them once.
+    """
+    GrandPrix = apps.get_model("predictions", "GrandPrix")
+    gps = list(GrandPrix.objects.all())
+    for gp in gps:
+        gp.result_version = result_version((
+            gp.result_p1_id, gp.result_p2_id, gp.result_p3_id, gp.result_p4_id, gp.result_p5_id,
+            gp.result_alonso_pos, gp.result_sainz_pos,
+        ))
+    GrandPrix.objects.bulk_update(gps, ["result_version"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0016_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grandprix',
+            name='result_version',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='scored_version',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.RunPython(backfill_result_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:19
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_attendee_counts(apps, schema_editor):
+    Ticket = apps.get_model("predictions", "Ticket")
+    tickets = list(Ticket.objects.annotate(signed_up=Count("attendees")))
+    for ticket in tickets:
+        ticket.attendee_count = ticket.signed_up
+    Ticket.objects.bulk_update(tickets, ["attendee_count"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0017_result_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='attendee_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_attendee_counts, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,171 @@
+import hashlib
+import secrets
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import cached_property
+from threading import Lock
+from time import monotonic
+from types import MappingProxyType
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, Exists, F, Min, OuterRef, Q, Subquery, Sum, Value, Window
+from django.db.models.functions import Coalesce, Rank
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils import timezone
+from django.utils.text import slugify
+
+CURRENT_SEASON = 2026
 
 # F1 championship points by finishing position
 F1_POINTS = {1: 25, 2: 18, 3: 15, 4: 12, 5: 10, 6: 8, 7: 6, 8: 4, 9: 2, 10: 1}
 DNF_EXACT_POINTS = 2
 
+MAX_POSITION = 22  # 0=DNF, 1-22
+
+# Drivers we track with their codes in our DB
+ALONSO_CODE = "ALO"
+SAINZ_CODE = "SAI"
+
+RESULT_FIELDS = [
+    "result_p1", "result_p2", "result_p3", "result_p4", "result_p5",
+    "result_alonso_pos", "result_sainz_pos",
+]
+
+# Part of every result version: bump it when the scoring rules change, with a
+# migration refreshing GrandPrix.result_version like 0017's, so the next
+# scoring run recomputes every pick.
+SCORING_RULES_VERSION = 1
+
+
+def result_version(result_key) -> str:
+    """Short digest of a GP's result_key(); "" while its results are incomplete."""
+    if None in result_key:
+        return ""
+    data = repr((SCORING_RULES_VERSION, *result_key)).encode()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def is_classified_finish(status: str) -> bool:
+    """Returns True if the status indicates the driver finished the race."""
+    return status in ("Finished", "Lapped") or status.startswith("+")
+
+
+def _extra_pick_points(guess, actual):
+    """Points for an Alonso/Sainz position guess against the real position."""
+    actual_pts = F1_POINTS.get(actual, 0)
+    if guess == actual:
+        return DNF_EXACT_POINTS if actual == 0 else actual_pts * 2
+    if 1 <= actual <= 10 and 1 <= guess <= 10:
+        return actual_pts
+    return 0
+
+
+# EXTRA_PICK_TABLE[actual][guess] for every 0..22 x 0..22 combination
+EXTRA_PICK_TABLE = [
+    [_extra_pick_points(guess, actual) for guess in range(MAX_POSITION + 1)]
+    for actual in range(MAX_POSITION + 1)
+]
+
+# TOP5_TABLE[actual_pos][predicted_slot]: full points on the exact slot,
+# half when the driver finished in the top 5 elsewhere. Row 0 = not in top 5.
+TOP5_TABLE = [[0] * 6] + [
+    [0] + [F1_POINTS[actual] if slot == actual else F1_POINTS[actual] // 2 for slot in range(1, 6)]
+    for actual in range(1, 6)
+]
+
+_NO_EXTRA_POINTS = [0] * (MAX_POSITION + 1)
+
+
+class ScoringKernel:
+    """
+    Scoring rules for one GP, precomputed once and applied to many predictions.
+    """
+
+    def __init__(self, gp):
+        self.key = gp.result_key()
+        self.ready = gp.has_results
+        top5 = self.key[:5]
+        self.driver_pos = {driver_id: pos for pos, driver_id in enumerate(top5, start=1)}
+        self.alonso_points = self._extra_row(gp.result_alonso_pos)
+        self.sainz_points = self._extra_row(gp.result_sainz_pos)
+
+    @staticmethod
+    def _extra_row(actual):
+        if actual is None or not 0 <= actual <= MAX_POSITION:
+            return _NO_EXTRA_POINTS
+        return EXTRA_PICK_TABLE[actual]
+
+    @staticmethod
+    def _lookup(row, guess):
+        return row[guess] if 0 <= guess <= MAX_POSITION else 0
+
+    def score(self, top5, alonso_guess, sainz_guess):
+        """Return (total, breakdown) for a (p1..p5 ids, alonso, sainz) pick."""
+        driver_pos = self.driver_pos
+        p1, p2, p3, p4, p5 = (
+            TOP5_TABLE[driver_pos.get(driver_id, 0)][slot]
+            for slot, driver_id in enumerate(top5, start=1)
+        )
+        alonso = self._lookup(self.alonso_points, alonso_guess)
+        sainz = self._lookup(self.sainz_points, sainz_guess)
+        breakdown = {"p1": p1, "p2": p2, "p3": p3, "p4": p4, "p5": p5, "alonso": alonso, "sainz": sainz}
+        return p1 + p2 + p3 + p4 + p5 + alonso + sainz, breakdown
+
+
+def compute_deadline(quali_start, fp1_start):
+    """Predictions close Friday 23:59:59 UTC, but never after QUALI start."""
+    if quali_start:
+        quali_start = quali_start.astimezone(dt_timezone.utc)
+        # Find the Friday of the same F1 weekend as QUALI.
+        days_since_friday = (quali_start.weekday() - 4) % 7
+        friday_date = (quali_start - timedelta(days=days_since_friday)).date()
+        friday_end = datetime.combine(friday_date, time(23, 59, 59), tzinfo=dt_timezone.utc)
+        return min(friday_end, quali_start)
+
+    # Fallback when QUALI is missing: preserve previous behavior.
+    if fp1_start:
+        return fp1_start - timedelta(hours=24)
+    return None
+
+
+class DataVersionManager(models.Manager):
+    def current(self, season) -> str:
+        """Current data version token for `season`."""
+        return self.filter(season=season).values_list("version", flat=True).first() or "0"
+
+    def state(self, season) -> tuple:
+        """(version, updated_at) for `season`; ("0", None) before its first write."""
+        return self.filter(season=season).values_list("version", "updated_at").first() or ("0", None)
+
+    def bump(self, season=None):
+        """Invalidate cached pages for `season`, or for every season when None."""
+        # A fresh random token (rather than a counter) can't collide with one
+        # that was rolled back, so a reverted write also reverts the version.
+        token = uuid.uuid4().hex
+        now = timezone.now()
+        if season is None:
+            self.update(version=token, updated_at=now)
+        elif not self.filter(season=season).update(version=token, updated_at=now):
+            self.bulk_create([DataVersion(season=season, version=token, updated_at=now)], ignore_conflicts=True)
+
+
+class DataVersion(models.Model):
+    """Per-season token replaced on every write that changes public pages."""
+    season = models.IntegerField(unique=True)
+    version = models.CharField(max_length=32)
+    # Last-Modified for the JSON API; set by bump() alongside the token
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = DataVersionManager()
+
+    def __str__(self):
+        return f"{self.season}: {self.version}"
+
 
 class Team(models.Model):
     name = models.CharField(max_length=80)
@@ -22,6 +179,15 @@ class Team(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_driver_roster()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_driver_roster()
+        return result
+
 
 class Driver(models.Model):
     code = models.CharField(max_length=10, unique=True)
@@ -35,10 +201,152 @@ class Driver(models.Model):
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_driver_roster()
+        DataVersion.objects.bump()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_driver_roster()
+        DataVersion.objects.bump()
+        return result
+
+
+@dataclass(frozen=True)
+class RosterDriver:
+    pk: int
+    code: str
+    name: str
+    team: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.team})" if self.team else self.name
+
+
+@dataclass(frozen=True)
+class DriverRoster:
+    """Immutable snapshot of the active drivers, in Driver's default ordering."""
+    drivers: tuple
+    by_pk: MappingProxyType
+    # (pk, label) pairs for select widgets and choice validation
+    choices: tuple
+
+    @classmethod
+    def load(cls):
+        drivers = tuple(
+            RosterDriver(pk, code, name, team or "")
+            for pk, code, name, team in Driver.objects.filter(active=True)
+            .values_list("pk", "code", "name", "team__name")
+        )
+        return cls(
+            drivers=drivers,
+            by_pk=MappingProxyType({d.pk: d for d in drivers}),
+            choices=tuple((d.pk, d.label) for d in drivers),
+        )
+
+
+# Other worker processes pick up admin edits to drivers within this many seconds.
+DRIVER_ROSTER_TTL = 300
+
+_roster = None
+_roster_loaded_at = 0.0
+_roster_lock = Lock()
+
+
+def driver_roster() -> DriverRoster:
+    """The process-wide DriverRoster, loaded on first use."""
+    global _roster, _roster_loaded_at
+    with _roster_lock:
+        if _roster is None or monotonic() - _roster_loaded_at > DRIVER_ROSTER_TTL:
+            _roster = DriverRoster.load()
+            _roster_loaded_at = monotonic()
+        return _roster
+
+
+def invalidate_driver_roster():
+    """Drop this process's roster; call after writing drivers or teams in bulk."""
+    global _roster
+    with _roster_lock:
+        _roster = None
+
+
+class GrandPrixQuerySet(models.QuerySet):
+    def sync_schedules(self) -> int:
+        """
+        sync_schedule() for every GP in the queryset with one sessions read
+        and one bulk_update, for callers that write sessions in bulk.
+        """
+        gps = list(self)
+        starts = {gp.pk: {} for gp in gps}
+        for event_id, session_type, start in Session.objects.filter(event__in=gps).values_list(
+            "event_id", "session_type", "start_utc"
+        ):
+            starts[event_id][session_type] = start
+        for gp in gps:
+            gp._session_starts = starts[gp.pk]
+            gp.race_start_utc = starts[gp.pk].get("RACE")
+            gp.quali_start_utc = starts[gp.pk].get("QUALI")
+            gp.deadline_utc = compute_deadline(gp.quali_start_utc, starts[gp.pk].get("FP1"))
+        self.model.objects.bulk_update(gps, ["race_start_utc", "quali_start_utc", "deadline_utc"], batch_size=500)
+        for season in {gp.season_year for gp in gps}:
+            DataVersion.objects.bump(season)
+        return len(gps)
+
+    def sync_results(self) -> list:
+        """
+        Rederive the result_* columns of every GP in the queryset from its
+        RaceResult rows: the top five come from the (gp, position) index and
+        Alonso/Sainz from the (driver, gp) one, in a single read. A GP
+        without a classification gets empty results. Writes and bumps only
+        what changed; returns the GPs whose results did.
+        """
+        gps = list(self)
+        rows = defaultdict(list)
+        for gp_id, driver_id, code, position, status in RaceResult.objects.filter(gp__in=gps).filter(
+            Q(position__lte=5) | Q(driver__code__in=[ALONSO_CODE, SAINZ_CODE])
+        ).values_list("gp_id", "driver_id", "driver__code", "position", "status"):
+            rows[gp_id].append((driver_id, code, position, status))
+
+        changed = []
+        for gp in gps:
+            before = gp.result_key()
+            top5 = {position: driver_id for driver_id, _, position, _ in rows[gp.pk] if position <= 5}
+            for pos in range(1, 6):
+                setattr(gp, f"result_p{pos}_id", top5.get(pos))
+            # Not classified, or not in the race at all: 0, as a DNF.
+            classified = {
+                code: position if is_classified_finish(status) else 0
+                for _, code, position, status in rows[gp.pk]
+            }
+            has_rows = bool(rows[gp.pk])
+            gp.result_alonso_pos = classified.get(ALONSO_CODE, 0) if has_rows else None
+            gp.result_sainz_pos = classified.get(SAINZ_CODE, 0) if has_rows else None
+            if gp.result_key() != before:
+                gp.result_version = result_version(gp.result_key())
+                changed.append(gp)
+
+        if changed:
+            self.model.objects.bulk_update(changed, [*RESULT_FIELDS, "result_version"], batch_size=500)
+            for season in {gp.season_year for gp in changed}:
+                DataVersion.objects.bump(season)
+        return changed
+
+    def next_event(self, after=None):
+        """First non-cancelled GP whose race starts after `after` (default: now)."""
+        if after is None:
+            after = timezone.now()
+        return (
+            self.filter(cancelled=False, race_start_utc__gt=after)
+            .order_by("race_start_utc")
+            .first()
+        )
+
 
 class GrandPrix(models.Model):
     """A race weekend event."""
-    season_year = models.IntegerField(default=2026)
+    season_year = models.IntegerField(default=CURRENT_SEASON)
     round = models.IntegerField()
     name = models.CharField(max_length=120)
     slug = models.SlugField(max_length=140, unique=True)
@@ -46,6 +354,11 @@ class GrandPrix(models.Model):
     circuit = models.CharField(max_length=120, blank=True)
     cancelled = models.BooleanField(default=False)
 
+    # Schedule, denormalized from sessions by sync_schedule()
+    race_start_utc = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    quali_start_utc = models.DateTimeField(null=True, blank=True, editable=False)
+    deadline_utc = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
     # Results
     result_p1 = models.ForeignKey(Driver, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
     result_p2 = models.ForeignKey(Driver, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
@@ -54,6 +367,10 @@ class GrandPrix(models.Model):
     result_p5 = models.ForeignKey(Driver, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
     result_alonso_pos = models.IntegerField(null=True, blank=True)
     result_sainz_pos = models.IntegerField(null=True, blank=True)
+    # result_version() of the fields above; predictions scored against it are current
+    result_version = models.CharField(max_length=16, blank=True, editable=False)
+
+    objects = GrandPrixQuerySet.as_manager()
 
     class Meta:
         ordering = ["season_year", "round"]
@@ -62,35 +379,48 @@ class GrandPrix(models.Model):
     def __str__(self):
         return f"{self.name} ({self.season_year})"
 
+    def save(self, *args, **kwargs):
+        self.result_version = result_version(self.result_key())
+        super().save(*args, **kwargs)
+        DataVersion.objects.bump(self.season_year)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop("_session_starts", None)
+
+    @cached_property
+    def _session_starts(self) -> dict:
+        """
+        Map session_type -> start_utc, built once per instance.
+
+        Reads the prefetch_related("sessions") cache when present, otherwise
+        runs a single query instead of one per accessor.
+        """
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("sessions")
+        if prefetched is not None:
+            return {s.session_type: s.start_utc for s in prefetched}
+        if self.pk is None:
+            return {}
+        return dict(self.sessions.values_list("session_type", "start_utc"))
+
     @property
     def fp1_start_utc(self):
         """Return FP1 session start time."""
-        fp1 = self.sessions.filter(session_type="FP1").first()
-        return fp1.start_utc if fp1 else None
-
-    @property
-    def race_start_utc(self):
-        """Return RACE session start time."""
-        race = self.sessions.filter(session_type="RACE").first()
-        return race.start_utc if race else None
-
-    @property
-    def deadline_utc(self):
-        """Predictions close Friday 23:59:59 UTC, but never after QUALI start."""
-        quali = self.sessions.filter(session_type="QUALI").first()
-        if quali:
-            quali_start = quali.start_utc.astimezone(dt_timezone.utc)
-            # Find the Friday of the same F1 weekend as QUALI.
-            days_since_friday = (quali_start.weekday() - 4) % 7
-            friday_date = (quali_start - timedelta(days=days_since_friday)).date()
-            friday_end = datetime.combine(friday_date, time(23, 59, 59), tzinfo=dt_timezone.utc)
-            return min(friday_end, quali_start)
-
-        # Fallback when QUALI is missing: preserve previous behavior.
-        fp1 = self.fp1_start_utc
-        if fp1:
-            return fp1 - timedelta(hours=24)
-        return None
+        return self._session_starts.get("FP1")
+
+    def sync_schedule(self):
+        """Recompute race/quali/deadline columns from this GP's sessions."""
+        starts = dict(self.sessions.values_list("session_type", "start_utc"))
+        self._session_starts = starts
+        self.race_start_utc = starts.get("RACE")
+        self.quali_start_utc = starts.get("QUALI")
+        self.deadline_utc = compute_deadline(self.quali_start_utc, starts.get("FP1"))
+        GrandPrix.objects.filter(pk=self.pk).update(
+            race_start_utc=self.race_start_utc,
+            quali_start_utc=self.quali_start_utc,
+            deadline_utc=self.deadline_utc,
+        )
+        DataVersion.objects.bump(self.season_year)
 
     @property
     def is_locked(self) -> bool:
@@ -103,10 +433,88 @@ class GrandPrix(models.Model):
     @property
     def has_results(self) -> bool:
         return all([
-            self.result_p1, self.result_p2, self.result_p3,
-            self.result_p4, self.result_p5
+            self.result_p1_id, self.result_p2_id, self.result_p3_id,
+            self.result_p4_id, self.result_p5_id
         ]) and self.result_alonso_pos is not None and self.result_sainz_pos is not None
 
+    def unscored_picks(self):
+        """Picks still without a score or rank: all of them between saving results and scoring."""
+        return self.prediction_set.filter(Q(score__isnull=True) | Q(rank__isnull=True))
+
+    def picks_are_ranked(self) -> bool:
+        """Whether every pick has its score and rank, so the picks can be paged by them."""
+        return self.has_results and not self.unscored_picks().exists()
+
+    def result_key(self) -> tuple:
+        """The result fields scoring depends on."""
+        return (
+            self.result_p1_id, self.result_p2_id, self.result_p3_id,
+            self.result_p4_id, self.result_p5_id,
+            self.result_alonso_pos, self.result_sainz_pos,
+        )
+
+    @property
+    def scoring_kernel(self):
+        """ScoringKernel for the current results, rebuilt only when they change."""
+        kernel = self.__dict__.get("_scoring_kernel")
+        if kernel is None or kernel.key != self.result_key():
+            kernel = self.__dict__["_scoring_kernel"] = ScoringKernel(self)
+        return kernel
+
+
+class RaceResultQuerySet(models.QuerySet):
+    def replace(self, classifications) -> set:
+        """
+        Store full classifications, gp_id -> list of unsaved RaceResult.
+
+        The current rows of those GPs are read once; only GPs whose rows
+        differ are deleted and bulk-inserted again. Returns their ids; follow
+        up with GrandPrix.objects.filter(pk__in=...).sync_results().
+        """
+        fields = ("driver_id", "position", "status", "points", "grid")
+        current = defaultdict(set)
+        for gp_id, *values in self.filter(gp_id__in=classifications).values_list("gp_id", *fields):
+            current[gp_id].add(tuple(values))
+        changed = {
+            gp_id
+            for gp_id, results in classifications.items()
+            if {tuple(getattr(r, f) for f in fields) for r in results} != current[gp_id]
+        }
+        if changed:
+            self.filter(gp_id__in=changed).delete()
+            self.bulk_create(
+                [result for gp_id in changed for result in classifications[gp_id]], batch_size=1000
+            )
+        return changed
+
+
+class RaceResult(models.Model):
+    """One line of a GP's official classification; GrandPrix.result_* are derived from these."""
+    gp = models.ForeignKey(GrandPrix, on_delete=models.CASCADE, related_name="classification")
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name="race_results")
+    position = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=40, blank=True)
+    points = models.DecimalField(max_digits=4, decimal_places=1, default=0)
+    grid = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    objects = RaceResultQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["gp", "position"]
+        constraints = [
+            # Also the (gp, position) and (driver, gp) indexes the lookups use.
+            models.UniqueConstraint(fields=["gp", "position"], name="uniq_raceresult_gp_position"),
+            models.UniqueConstraint(fields=["driver", "gp"], name="uniq_raceresult_driver_gp"),
+        ]
+
+    def __str__(self):
+        return f"{self.gp} - P{self.position} {self.driver}"
+
+    @property
+    def classified_position(self) -> int:
+        """Position as scoring sees it: 0 when the driver wasn't classified."""
+        return self.position if is_classified_finish(self.status) else 0
+
 
 class Session(models.Model):
     """A session within a GP weekend (FP1, FP2, etc.)."""
@@ -135,6 +543,65 @@ class Session(models.Model):
     def __str__(self):
         return f"{self.event.name} - {self.get_session_type_display()}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.event.sync_schedule()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.event.sync_schedule()
+        return result
+
+
+PICK_LOCKED_MESSAGE = "Las predicciones están cerradas para este GP."
+
+
+class PredictionManager(models.Manager):
+    def submit(self, user_id, event, top5, alonso_pos, sainz_pos, now=None) -> tuple:
+        """
+        Create or replace `user_id`'s pick for `event` in one statement:
+        INSERT ... SELECT from the GP row only while its deadline is still
+        ahead, ON CONFLICT (user, event) DO UPDATE. Concurrent submits of the
+        same pair serialize on the unique index instead of raising, and a
+        submit that reaches the database after the deadline writes nothing
+        and raises ValidationError. Returns (prediction_id, created).
+
+        The caller validates the values themselves (see PredictionForm).
+        """
+        now = now or timezone.now()
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        gp_table = connection.ops.quote_name(GrandPrix._meta.db_table)
+        sql = f"""
+            INSERT INTO {table} (
+                user_id, event_id, p1_id, p2_id, p3_id, p4_id, p5_id,
+                alonso_pos_guess, sainz_pos_guess, submitted_at, updated_at, scored_version
+            )
+            SELECT %s, id, %s, %s, %s, %s, %s, %s, %s, %s, %s, ''
+            FROM {gp_table}
+            WHERE id = %s AND cancelled = %s AND deadline_utc > %s
+            ON CONFLICT (user_id, event_id) DO UPDATE SET
+                p1_id = excluded.p1_id, p2_id = excluded.p2_id, p3_id = excluded.p3_id,
+                p4_id = excluded.p4_id, p5_id = excluded.p5_id,
+                alonso_pos_guess = excluded.alonso_pos_guess,
+                sainz_pos_guess = excluded.sainz_pos_guess,
+                updated_at = excluded.updated_at,
+                scored_version = excluded.scored_version
+            RETURNING id, submitted_at = updated_at
+        """
+        stamp = connection.ops.adapt_datetimefield_value(now)
+        params = [user_id, *top5, alonso_pos, sainz_pos, stamp, stamp, event.pk, False, stamp]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+            if row is None:
+                raise ValidationError(PICK_LOCKED_MESSAGE)
+            pk, created = row[0], bool(row[1])
+            if created:
+                SeasonStanding.objects.refresh(event.season_year, [user_id])
+            DataVersion.objects.bump(event.season_year)
+        return pk, created
+
 
 class Prediction(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -152,11 +619,20 @@ class Prediction(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     score = models.IntegerField(null=True, blank=True)
+    # RANK() by score within the GP, written by scoring.rank_grand_prix
+    rank = models.IntegerField(null=True, blank=True, editable=False)
+    # GrandPrix.result_version the score was computed against; "" = needs scoring
+    scored_version = models.CharField(max_length=16, blank=True, editable=False)
+
+    objects = PredictionManager()
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["user", "event"], name="uniq_prediction_user_event")
         ]
+        indexes = [
+            models.Index(fields=["event", "rank"], name="prediction_event_rank_idx"),
+        ]
         ordering = ["event__round", "user__username"]
 
     def __str__(self):
@@ -178,107 +654,345 @@ class Prediction(models.Model):
 
         # Validate deadline (event may not be set yet during form validation)
         if self.event_id is not None and self.event.is_locked:
-            raise ValidationError("Las predicciones están cerradas para este GP.")
+            raise ValidationError(PICK_LOCKED_MESSAGE)
+
+    def _score_args(self):
+        return (
+            (self.p1_id, self.p2_id, self.p3_id, self.p4_id, self.p5_id),
+            self.alonso_pos_guess,
+            self.sainz_pos_guess,
+        )
 
     def calculate_score(self) -> int:
         """Calculate score based on GP results. GP must have results set."""
-        gp = self.event
-        if not gp.has_results:
+        kernel = self.event.scoring_kernel
+        if not kernel.ready:
             return 0
-
-        score = 0
-
-        # Map finishing position -> driver for top 5
-        result_map = {
-            1: gp.result_p1_id,
-            2: gp.result_p2_id,
-            3: gp.result_p3_id,
-            4: gp.result_p4_id,
-            5: gp.result_p5_id,
-        }
-        # Map driver -> finishing position (for half-points lookup)
-        driver_to_pos = {drv_id: pos for pos, drv_id in result_map.items()}
-
-        # Top 5 scoring
-        for pos in range(1, 6):
-            predicted_id = getattr(self, f"p{pos}_id")
-            actual_pos = driver_to_pos.get(predicted_id)
-            if actual_pos is None:
-                continue
-            real_pts = F1_POINTS[actual_pos]
-            if actual_pos == pos:
-                score += real_pts          # exact hit
-            else:
-                score += real_pts // 2    # right driver, wrong slot
-
-        # Alonso scoring
-        if gp.result_alonso_pos is not None:
-            alonso_pts = F1_POINTS.get(gp.result_alonso_pos, 0)
-            if self.alonso_pos_guess == gp.result_alonso_pos:
-                score += DNF_EXACT_POINTS if gp.result_alonso_pos == 0 else alonso_pts * 2
-            elif 1 <= gp.result_alonso_pos <= 10 and 1 <= self.alonso_pos_guess <= 10:
-                score += alonso_pts
-
-        # Sainz scoring (same rules)
-        if gp.result_sainz_pos is not None:
-            sainz_pts = F1_POINTS.get(gp.result_sainz_pos, 0)
-            if self.sainz_pos_guess == gp.result_sainz_pos:
-                score += DNF_EXACT_POINTS if gp.result_sainz_pos == 0 else sainz_pts * 2
-            elif 1 <= gp.result_sainz_pos <= 10 and 1 <= self.sainz_pos_guess <= 10:
-                score += sainz_pts
-
-        return score
+        total, _ = kernel.score(*self._score_args())
+        return total
 
     def score_breakdown(self) -> dict:
         """Returns per-pick points: p1..p5, alonso, sainz. None if no results."""
-        gp = self.event
-        if not gp.has_results:
+        kernel = self.event.scoring_kernel
+        if not kernel.ready:
             return None
-
-        result_map = {
-            1: gp.result_p1_id,
-            2: gp.result_p2_id,
-            3: gp.result_p3_id,
-            4: gp.result_p4_id,
-            5: gp.result_p5_id,
-        }
-        driver_to_pos = {drv_id: pos for pos, drv_id in result_map.items()}
-
-        breakdown = {}
-        for pos in range(1, 6):
-            predicted_id = getattr(self, f"p{pos}_id")
-            actual_pos = driver_to_pos.get(predicted_id)
-            if actual_pos is None:
-                breakdown[f"p{pos}"] = 0
-            else:
-                real_pts = F1_POINTS[actual_pos]
-                breakdown[f"p{pos}"] = real_pts if actual_pos == pos else real_pts // 2
-
-        alonso = 0
-        if gp.result_alonso_pos is not None:
-            alonso_pts = F1_POINTS.get(gp.result_alonso_pos, 0)
-            if self.alonso_pos_guess == gp.result_alonso_pos:
-                alonso = DNF_EXACT_POINTS if gp.result_alonso_pos == 0 else alonso_pts * 2
-            elif 1 <= gp.result_alonso_pos <= 10 and 1 <= self.alonso_pos_guess <= 10:
-                alonso = alonso_pts
-        breakdown["alonso"] = alonso
-
-        sainz = 0
-        if gp.result_sainz_pos is not None:
-            sainz_pts = F1_POINTS.get(gp.result_sainz_pos, 0)
-            if self.sainz_pos_guess == gp.result_sainz_pos:
-                sainz = DNF_EXACT_POINTS if gp.result_sainz_pos == 0 else sainz_pts * 2
-            elif 1 <= gp.result_sainz_pos <= 10 and 1 <= self.sainz_pos_guess <= 10:
-                sainz = sainz_pts
-        breakdown["sainz"] = sainz
-
+        _, breakdown = kernel.score(*self._score_args())
         return breakdown
 
     def save(self, *args, **kwargs):
         # Skip deadline check if updating score only
         if not kwargs.pop("skip_lock_check", False):
             self.full_clean()
+        # The picks may have changed; the next scoring run recomputes this one.
+        self.scored_version = ""
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if adding:
+            SeasonStanding.objects.refresh(self.event.season_year, [self.user_id])
+        DataVersion.objects.bump(self.event.season_year)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        SeasonStanding.objects.refresh(self.event.season_year, [self.user_id])
+        DataVersion.objects.bump(self.event.season_year)
+        return result
+
+
+def _rank_key(standing_values):
+    """(total, first_pick) out of a (total, picks, first_pick) tuple."""
+    total, _picks, first_pick = standing_values
+    return total, first_pick
+
+
+class SeasonStandingManager(models.Manager):
+    def live_aggregate(self, season, user_ids=None) -> dict:
+        """Aggregate Prediction rows into user_id -> (total, picks, first_pick)."""
+        preds = Prediction.objects.filter(event__season_year=season)
+        if user_ids is not None:
+            preds = preds.filter(user_id__in=user_ids)
+        rows = preds.order_by().values("user_id").annotate(
+            total=Coalesce(Sum("score"), 0),
+            picks=Count("id"),
+            first_pick=Min("submitted_at"),
+        )
+        return {
+            row["user_id"]: (row["total"], row["picks"], row["first_pick"])
+            for row in rows
+        }
+
+    def refresh(self, season, user_ids=None):
+        """
+        Recompute standings for `user_ids` (or every player when None) and
+        re-rank the season if any total or tiebreak moved.
+        """
+        live = self.live_aggregate(season, user_ids)
+        current = self.filter(season=season)
+        if user_ids is not None:
+            current = current.filter(user_id__in=user_ids)
+        before = {
+            user_id: (total, picks, first_pick)
+            for user_id, total, picks, first_pick
+            in current.values_list("user_id", "total", "picks", "first_pick")
+        }
+        if live == before:
+            return
+
+        with transaction.atomic():
+            stale = set(before) - set(live)
+            if stale:
+                self.filter(season=season, user_id__in=stale).delete()
+            self.bulk_create(
+                [
+                    SeasonStanding(user_id=user_id, season=season, total=total, picks=picks, first_pick=first_pick)
+                    for user_id, (total, picks, first_pick) in live.items()
+                    if before.get(user_id) != (total, picks, first_pick)
+                ],
+                update_conflicts=True,
+                unique_fields=["user", "season"],
+                update_fields=["total", "picks", "first_pick"],
+            )
+            rank_keys_moved = stale or any(
+                user_id not in before or _rank_key(before[user_id]) != _rank_key(values)
+                for user_id, values in live.items()
+            )
+            if rank_keys_moved:
+                self.rerank(season)
+            changed_users = stale | {
+                user_id for user_id, values in live.items() if before.get(user_id) != values
+            }
+            LeagueStanding.objects.sync(season, changed_users)
+
+    def rerank(self, season):
+        """
+        Store RANK() over (total desc, first pick asc) for the season: tied
+        players share a rank and the next one skips ahead, as in 1, 2, 2, 4.
+        Pages list ties by username (see LEADERBOARD_ORDERING).
+        """
+        ranked = self.filter(season=season).annotate(
+            position=Window(
+                Rank(),
+                order_by=[F("total").desc(), F("first_pick").asc(nulls_last=True)],
+            )
+        ).values_list("pk", "rank", "position")
+        changed = [
+            SeasonStanding(pk=pk, rank=position)
+            for pk, rank, position in ranked
+            if rank != position
+        ]
+        self.bulk_update(changed, ["rank"], batch_size=500)
+
+
+# Leaderboard order: rank already encodes (total desc, first pick asc); the
+# username breaks exact ties and makes the ordering unique for keyset pages.
+LEADERBOARD_ORDERING = ["rank", "user__username"]
+# Before any race is scored everybody is on 0, so players are listed by
+# how many picks they have sent.
+PRESEASON_ORDERING = ["-picks", "user__username"]
+
+
+class SeasonStanding(models.Model):
+    """Materialized per-season leaderboard row, maintained on score writes."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="season_standings")
+    season = models.IntegerField()
+    total = models.IntegerField(default=0)
+    picks = models.IntegerField(default=0)
+    first_pick = models.DateTimeField(null=True, blank=True)
+    rank = models.IntegerField(null=True, blank=True)
+
+    objects = SeasonStandingManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "season"], name="uniq_standing_user_season")
+        ]
+        indexes = [
+            models.Index(fields=["season", "rank"], name="standing_season_rank_idx"),
+        ]
+        ordering = ["season", "rank"]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.season}: {self.total}"
+
+
+# Paths under /ligas/ that a league slug must not shadow
+RESERVED_LEAGUE_SLUGS = {"nueva", "unirme"}
+
+
+def _join_code():
+    return secrets.token_hex(4).upper()
+
+
+class League(models.Model):
+    """A private group of players with its own leaderboard."""
+    name = models.CharField(max_length=80)
+    slug = models.SlugField(unique=True)
+    join_code = models.CharField(max_length=8, unique=True, default=_join_code)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="leagues_created")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            base = slugify(self.name)[:40] or "liga"
+            slug, n = base, 1
+            while slug in RESERVED_LEAGUE_SLUGS or League.objects.filter(slug=slug).exists():
+                n += 1
+                slug = f"{base}-{n}"
+            self.slug = slug
+        super().save(*args, **kwargs)
+
+    def is_member(self, user):
+        if not user.is_authenticated:
+            return False
+        return self.memberships.filter(user=user).exists()
+
+
+class LeagueMembership(models.Model):
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name="memberships")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="league_memberships")
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["league", "user"], name="uniq_league_member")
+        ]
+        ordering = ["joined_at"]
+
+    def __str__(self):
+        return f"{self.user.username} -> {self.league.name}"
+
+    def _sync_standings(self):
+        seasons = SeasonStanding.objects.filter(user_id=self.user_id).values_list("season", flat=True)
+        for season in seasons:
+            LeagueStanding.objects.sync(season, [self.user_id])
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._sync_standings()
+        DataVersion.objects.bump()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._sync_standings()
+        DataVersion.objects.bump()
+        return result
+
+
+class LeagueStandingManager(models.Manager):
+    def sync(self, season, user_ids=None):
+        """
+        Copy the season totals of `user_ids` (every member when None) into
+        each league they belong to, drop rows of players who left or lost
+        their standing, and re-rank only the leagues whose order can move.
+        """
+        memberships = LeagueMembership.objects.all()
+        current = self.filter(season=season)
+        totals = SeasonStanding.objects.filter(season=season)
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            if not user_ids:
+                return
+            memberships = memberships.filter(user_id__in=user_ids)
+            current = current.filter(user_id__in=user_ids)
+            totals = totals.filter(user_id__in=user_ids)
+
+        by_user = {
+            user_id: (total, picks, first_pick)
+            for user_id, total, picks, first_pick in totals.values_list("user_id", "total", "picks", "first_pick")
+        }
+        wanted = {
+            (league_id, user_id): by_user[user_id]
+            for league_id, user_id in memberships.values_list("league_id", "user_id")
+            if user_id in by_user
+        }
+        before, pks = {}, {}
+        for pk, league_id, user_id, total, picks, first_pick in current.values_list(
+            "pk", "league_id", "user_id", "total", "picks", "first_pick"
+        ):
+            before[(league_id, user_id)] = (total, picks, first_pick)
+            pks[(league_id, user_id)] = pk
+        if wanted == before:
+            return
+
+        with transaction.atomic():
+            stale = set(before) - set(wanted)
+            if stale:
+                self.filter(pk__in=[pks[key] for key in stale]).delete()
+            self.bulk_create(
+                [
+                    LeagueStanding(
+                        league_id=league_id, user_id=user_id, season=season,
+                        total=total, picks=picks, first_pick=first_pick,
+                    )
+                    for (league_id, user_id), (total, picks, first_pick) in wanted.items()
+                    if before.get((league_id, user_id)) != (total, picks, first_pick)
+                ],
+                update_conflicts=True,
+                unique_fields=["league", "user", "season"],
+                update_fields=["total", "picks", "first_pick"],
+            )
+            moved = {league_id for league_id, _ in stale} | {
+                key[0] for key, values in wanted.items()
+                if key not in before or _rank_key(before[key]) != _rank_key(values)
+            }
+            if moved:
+                self.rerank(season, moved)
+
+    def rerank(self, season, league_ids):
+        """RANK() over (total desc, first pick asc) within each league, in one query."""
+        ranked = self.filter(season=season, league_id__in=league_ids).annotate(
+            position=Window(
+                Rank(),
+                partition_by=[F("league_id")],
+                order_by=[F("total").desc(), F("first_pick").asc(nulls_last=True)],
+            )
+        ).values_list("pk", "rank", "position")
+        changed = [
+            LeagueStanding(pk=pk, rank=position)
+            for pk, rank, position in ranked
+            if rank != position
+        ]
+        self.bulk_update(changed, ["rank"], batch_size=500)
+
+
+class LeagueStanding(models.Model):
+    """A member's season totals and rank inside one league."""
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name="standings")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="league_standings")
+    season = models.IntegerField()
+    total = models.IntegerField(default=0)
+    picks = models.IntegerField(default=0)
+    first_pick = models.DateTimeField(null=True, blank=True)
+    rank = models.IntegerField(null=True, blank=True)
+
+    objects = LeagueStandingManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["league", "user", "season"], name="uniq_league_standing")
+        ]
+        indexes = [
+            models.Index(fields=["league", "season", "rank"], name="league_standing_rank_idx"),
+        ]
+        ordering = ["league", "season", "rank"]
+
+    def __str__(self):
+        return f"{self.league.name} / {self.user.username} - {self.season}: {self.total}"
+
+
+class TicketQuerySet(models.QuerySet):
+    def with_attending(self, user):
+        """Annotate `attending`: whether `user` is signed up, in the same query."""
+        if not user.is_authenticated:
+            return self.annotate(attending=Value(False))
+        return self.annotate(
+            attending=Exists(TicketAttendee.objects.filter(ticket=OuterRef("pk"), user=user))
+        )
 
 
 class Ticket(models.Model):
@@ -289,6 +1003,10 @@ class Ticket(models.Model):
     notes = models.TextField(blank=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tickets_created")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized from TicketAttendee, kept in step with F() by its writes
+    attendee_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TicketQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
@@ -296,13 +1014,44 @@ class Ticket(models.Model):
     def __str__(self):
         return f"{self.title} - {self.event.name}"
 
-    def attendee_count(self):
-        return self.attendees.count()
+    def save(self, *args, **kwargs):
+        # attendee_count is only written with F() by TicketAttendee; a stale
+        # copy on this instance must not overwrite it.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != "attendee_count"
+            ]
+        super().save(*args, **kwargs)
 
-    def is_attending(self, user):
-        if not user.is_authenticated:
-            return False
-        return self.attendees.filter(user=user).exists()
+
+class TicketAttendeeManager(models.Manager):
+    def toggle(self, ticket_id, user_id) -> bool:
+        """
+        Sign `user_id` up for the ticket, or off it if already signed up, and
+        return whether they now attend. Each direction is one conditional
+        statement (DELETE, else INSERT ... ON CONFLICT DO NOTHING), so
+        concurrent toggles can't double-insert or drift the count.
+        """
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        stamp = connection.ops.adapt_datetimefield_value(timezone.now())
+        with transaction.atomic():
+            # The post_delete receiver below recounts the ticket.
+            deleted, _ = self.filter(ticket_id=ticket_id, user_id=user_id).delete()
+            if deleted:
+                return False
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (ticket_id, user_id, created_at) VALUES (%s, %s, %s)
+                    ON CONFLICT (ticket_id, user_id) DO NOTHING
+                    RETURNING id
+                    """,
+                    [ticket_id, user_id, stamp],
+                )
+                inserted = cursor.fetchone() is not None
+            if inserted:
+                Ticket.objects.filter(pk=ticket_id).update(attendee_count=F("attendee_count") + 1)
+            return True
 
 
 class TicketAttendee(models.Model):
@@ -311,6 +1060,8 @@ class TicketAttendee(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="ticket_attendances")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TicketAttendeeManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["ticket", "user"], name="uniq_ticket_attendee")
@@ -320,6 +1071,33 @@ class TicketAttendee(models.Model):
     def __str__(self):
         return f"{self.user.username} -> {self.ticket.title}"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            Ticket.objects.filter(pk=self.ticket_id).update(attendee_count=F("attendee_count") + 1)
+
+
+@receiver(post_delete, sender=TicketAttendee)
+def recount_ticket_attendees(sender, instance, **kwargs):
+    """
+    Recount the ticket after any attendee delete: instance, queryset or a
+    cascade from the user. A recount can't go wrong when the row was already
+    gone; locking the ticket first lets it see any sign-up committed
+    meanwhile, whose F() increment otherwise waits for this one.
+    """
+    with transaction.atomic():
+        tickets = Ticket.objects.select_for_update().filter(pk=instance.ticket_id)
+        if tickets.exists():
+            attendees = (
+                TicketAttendee.objects.filter(ticket=OuterRef("pk"))
+                .order_by()
+                .values("ticket")
+                .annotate(n=Count("pk"))
+                .values("n")
+            )
+            tickets.update(attendee_count=Coalesce(Subquery(attendees), 0))
+
 
 class NewsPost(models.Model):
     title = models.CharField(max_length=140)
@@ -332,3 +1110,113 @@ class NewsPost(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class LiveEvent(models.Model):
+    """
+    Outbox for live.DatabaseBroker: scoring processes append events here and
+    each web worker tails the table once for all of its open streams.
+    """
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.pk}: {self.payload.get('type', '?')}"
+
+
+# A claimed job whose worker hasn't finished it within this long is assumed
+# dead and handed to another worker.
+JOB_LEASE = timedelta(minutes=15)
+JOB_MAX_ATTEMPTS = 5
+JOB_BACKOFF = timedelta(seconds=30)
+JOB_BACKOFF_MAX = timedelta(hours=1)
+
+
+class JobQuerySet(models.QuerySet):
+    def claimable(self, now):
+        return self.filter(
+            Q(status=Job.QUEUED, run_after__lte=now) | Q(status=Job.RUNNING, locked_at__lt=now - JOB_LEASE)
+        )
+
+    def claim(self, worker: str):
+        """
+        Take the next due job for `worker`, or None when there is nothing to do.
+
+        On Postgres the candidate is read with FOR UPDATE SKIP LOCKED, so
+        concurrent workers never wait on each other. SQLite has no row locks
+        (the clause is dropped there); the conditional UPDATE below is a
+        compare-and-set on both, and a worker that loses it tries the next job.
+        """
+        while True:
+            now = timezone.now()
+            with transaction.atomic():
+                job = (
+                    self.select_for_update(skip_locked=True)
+                    .claimable(now)
+                    .order_by("run_after", "id")
+                    .first()
+                )
+                if job is None:
+                    return None
+                if self.filter(pk=job.pk, status=job.status, attempts=job.attempts).update(
+                    status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F("attempts") + 1
+                ):
+                    job.status, job.locked_by, job.locked_at = Job.RUNNING, worker, now
+                    job.attempts += 1
+                    return job
+
+
+class Job(models.Model):
+    """A unit of background work run by the run_worker command; see predictions.jobs."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=40)
+    args = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=JOB_MAX_ATTEMPTS)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.TextField(blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "run_after"], name="job_claim_idx")]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    def succeed(self, result=""):
+        self.status = Job.DONE
+        self.result = result
+        self.finished_at = timezone.now()
+        self.save(update_fields=["status", "result", "finished_at"])
+
+    def fail(self, error, retry=True):
+        """Record a failed attempt; requeue it with exponential backoff while attempts remain."""
+        self.last_error = error
+        if retry and self.attempts < self.max_attempts:
+            self.status = Job.QUEUED
+            self.run_after = timezone.now() + min(JOB_BACKOFF * 2 ** (self.attempts - 1), JOB_BACKOFF_MAX)
+        else:
+            self.status = Job.FAILED
+            self.finished_at = timezone.now()
+        self.save(update_fields=["status", "last_error", "run_after", "finished_at"])
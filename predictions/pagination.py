@@ -0,0 +1,151 @@
+"""
+Keyset ("seek") pagination over ordered querysets.
+
+Instead of OFFSET, a page starts right after the last row of the previous
+one: the cursor carries that row's ordering values and the next page is a
+WHERE on them, so page 200 costs the same index seek as page 1. Orderings
+are Django order_by() strings and must end in a unique field.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model=None, ordering=None):
+    """
+    Cursor string -> list of values, or None if it is missing or mangled.
+
+    Given the `model` and `ordering` it will page, the cursor must also have
+    one value per ordering field, each of which that field accepts; the
+    values come back converted by the field (see clean_key).
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list):
+        return None
+    if ordering is None:
+        return values
+    return clean_key(model, ordering, values)
+
+
+def _model_field(model, name):
+    *path, last = name.split("__")
+    for part in path:
+        model = model._meta.get_field(part).related_model
+    return model._meta.get_field(last)
+
+
+def clean_key(model, ordering, values):
+    """
+    `values` converted with the to_python() of each `ordering` field of
+    `model`, or None unless there is exactly one valid, non-null value per
+    field: keyset_filter() trusts its key, and client cursors can't be.
+    """
+    fields = _fields(ordering)
+    if len(values) != len(fields):
+        return None
+    key = []
+    for (name, _), value in zip(fields, values):
+        if value is None or isinstance(value, (list, dict)):
+            return None
+        try:
+            key.append(_model_field(model, name).to_python(value))
+        except (ValidationError, TypeError, ValueError):
+            return None
+    return key
+
+
+def _fields(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def _reverse(ordering):
+    return [name[1:] if name.startswith("-") else f"-{name}" for name in ordering]
+
+
+def keyset_filter(ordering, values) -> Q:
+    """
+    Q matching the rows that sort strictly after `values` in `ordering`:
+    (a > x) OR (a = x AND b > y) OR ...
+    """
+    clauses = []
+    fields = _fields(ordering)
+    for i, (name, descending) in enumerate(fields):
+        equal = {fields[j][0]: values[j] for j in range(i)}
+        lookup = "lt" if descending else "gt"
+        clauses.append(Q(**equal, **{f"{name}__{lookup}": values[i]}))
+    return reduce(or_, clauses)
+
+
+def _value(row, name):
+    if isinstance(row, dict):
+        return row[name]
+    for attr in name.split("__"):
+        row = getattr(row, attr)
+    return row
+
+
+def row_key(row, ordering):
+    """Ordering values of a values() dict or a model instance, JSON-ready."""
+    key = []
+    for name, _ in _fields(ordering):
+        value = _value(row, name)
+        key.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    return key
+
+
+@dataclass
+class KeysetPage:
+    rows: list
+    next_cursor: str = ""
+    is_first: bool = True
+
+
+def keyset_page(queryset, ordering, size, after=None, prefix=()) -> KeysetPage:
+    """
+    Up to `size` rows of `queryset` (model instances, or a values() queryset
+    that includes every ordering field) that sort after the decoded cursor `after`. `prefix` is
+    prepended to the next cursor, for callers paging over several querysets.
+    The ordering fields must not be NULL: the cursor can't hold one.
+    """
+    qs = queryset.order_by(*ordering)
+    if after is not None:
+        qs = qs.filter(keyset_filter(ordering, after))
+    rows = list(qs[: size + 1])
+    has_more = len(rows) > size
+    rows = rows[:size]
+    next_cursor = encode_cursor([*prefix, *row_key(rows[-1], ordering)]) if has_more else ""
+    return KeysetPage(rows=rows, next_cursor=next_cursor, is_first=after is None)
+
+
+def keyset_window(queryset, ordering, anchor, radius) -> list:
+    """
+    The `radius` rows before `anchor` (a row's ordering values), the anchor
+    row itself and the `radius` rows after it.
+    """
+    before = list(
+        queryset.filter(keyset_filter(_reverse(ordering), anchor))
+        .order_by(*_reverse(ordering))[:radius]
+    )
+    at_anchor = Q(**{name: value for (name, _), value in zip(_fields(ordering), anchor)})
+    from_anchor = list(
+        queryset.filter(at_anchor | keyset_filter(ordering, anchor))
+        .order_by(*ordering)[: radius + 1]
+    )
+    return before[::-1] + from_anchor
@@ -0,0 +1,128 @@
+"""Batch scoring of predictions, shared by fetch_results and the admin action."""
+import time
+from dataclasses import dataclass
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+from .live import publish_scores
+from .models import DataVersion, GrandPrix, Prediction, SeasonStanding, result_version
+
+BULK_UPDATE_CHUNK = 500
+# Above this many affected players a full season refresh is cheaper than a
+# huge user_id IN (...) filter.
+STANDINGS_PARTIAL_LIMIT = 1000
+
+PICK_FIELDS = [
+    "id", "user_id", "p1", "p2", "p3", "p4", "p5",
+    "alonso_pos_guess", "sainz_pos_guess", "score",
+]
+
+
+@dataclass
+class ScoringResult:
+    """Outcome of scoring one or more GPs."""
+    total: int = 0
+    changed: int = 0
+    elapsed: float = 0.0
+
+    def __add__(self, other):
+        return ScoringResult(
+            total=self.total + other.total,
+            changed=self.changed + other.changed,
+            elapsed=self.elapsed + other.elapsed,
+        )
+
+
+def score_grand_prix(gp, chunk_size=BULK_UPDATE_CHUNK) -> ScoringResult:
+    """
+    Recalculate the score of every prediction for `gp` that is out of date.
+
+    Only predictions whose scored_version differs from the GP's result
+    version are read, with .values_list(); they are scored in memory by the
+    GP's ScoringKernel and stamped with the version. Ranks, the affected
+    season standings and the live stream are only touched for the ones whose
+    score actually changed, all inside one transaction. Without complete
+    results there is no version, and every pick is scored 0 as before.
+    """
+    started = time.perf_counter()
+    version = result_version(gp.result_key())
+
+    with transaction.atomic():
+        pending = Prediction.objects.filter(event=gp)
+        if version:
+            pending = pending.exclude(scored_version=version)
+        rows = list(pending.values_list(*PICK_FIELDS))
+        kernel = gp.scoring_kernel
+        changed = []
+        changed_users = []
+        for pk, user_id, p1, p2, p3, p4, p5, alonso, sainz, old_score in rows:
+            new_score = kernel.score((p1, p2, p3, p4, p5), alonso, sainz)[0] if kernel.ready else 0
+            if new_score != old_score:
+                changed.append(Prediction(pk=pk, user_id=user_id, score=new_score))
+                changed_users.append(user_id)
+
+        # A plain UPDATE per chunk: cheaper than a second CASE column in bulk_update.
+        for start in range(0, len(rows), chunk_size):
+            pks = [row[0] for row in rows[start:start + chunk_size]]
+            Prediction.objects.filter(pk__in=pks).update(scored_version=version)
+        if changed:
+            Prediction.objects.bulk_update(changed, ["score"], batch_size=chunk_size)
+            rank_grand_prix(gp, chunk_size)
+            if len(changed_users) > STANDINGS_PARTIAL_LIMIT:
+                changed_users = None
+            SeasonStanding.objects.refresh(gp.season_year, changed_users)
+            DataVersion.objects.bump(gp.season_year)
+            user_scores = {pred.user_id: pred.score for pred in changed}
+            transaction.on_commit(partial(publish_scores, gp, user_scores), robust=True)
+
+    return ScoringResult(
+        total=len(rows),
+        changed=len(changed),
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def score_season(season, chunk_size=BULK_UPDATE_CHUNK) -> ScoringResult:
+    """
+    Score every out-of-date prediction of `season` with score_grand_prix().
+
+    The GPs to visit come from a single query for predictions whose
+    scored_version no longer matches their GP's result version, so a season
+    where nothing changed costs that one read.
+    """
+    started = time.perf_counter()
+    stale = (
+        Prediction.objects.filter(event__season_year=season)
+        .exclude(event__result_version="")
+        .exclude(scored_version=F("event__result_version"))
+        .values_list("event_id", flat=True)
+        .order_by()
+        .distinct()
+    )
+    gp_ids = set(stale)
+    result = ScoringResult()
+    if gp_ids:
+        for gp in GrandPrix.objects.filter(pk__in=gp_ids):
+            result += score_grand_prix(gp, chunk_size)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def rank_grand_prix(gp, chunk_size=BULK_UPDATE_CHUNK) -> int:
+    """
+    Store each prediction's RANK() by score within `gp` (ties share a rank,
+    unscored picks tie last). Returns how many ranks changed.
+    """
+    ranked = Prediction.objects.filter(event=gp).annotate(
+        position=Window(Rank(), order_by=F("score").desc(nulls_last=True))
+    ).values_list("pk", "rank", "position")
+    changed = [
+        Prediction(pk=pk, rank=position)
+        for pk, rank, position in ranked
+        if rank != position
+    ]
+    Prediction.objects.bulk_update(changed, ["rank"], batch_size=chunk_size)
+    return len(changed)
@@ -0,0 +1,347 @@
+"""
+Monte Carlo forecast of the final season standings ("can I still win?").
+
+Driver strengths are a Plackett-Luce model fitted on the stored top fives
+of this season and the two before, older races counting less. Each
+simulated race draws a full finishing order from those strengths (Gumbel
+trick) plus DNFs at the rate seen in the stored Alonso/Sainz positions.
+
+Players keep the picks they have already sent for unraced GPs. Missing
+picks are drawn from the same model in every simulation, sharper for
+players whose past picks put more drivers in the top five. Simulations are scored in chunks as
+int16 arrays, using TOP5_TABLE and EXTRA_PICK_TABLE (the F1_POINTS rules
+ScoringKernel uses). Each array is players x simulations, one round at a
+time, so memory stays bounded for any number of runs.
+
+NumPy is optional: without it SIMULATION_AVAILABLE is False and the page
+and command say so.
+"""
+from dataclasses import dataclass
+
+from .models import (
+    ALONSO_CODE, EXTRA_PICK_TABLE, MAX_POSITION, SAINZ_CODE, TOP5_TABLE, GrandPrix, Prediction, SeasonStanding,
+    driver_roster,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+SIMULATION_AVAILABLE = np is not None
+
+SIMULATION_RUNS = 2000
+# players x simulations cells scored per chunk (4 MB per int16 work array)
+SIMULATION_CHUNK_CELLS = 2_000_000
+# Seasons of stored results the driver model learns from, and the weight
+# of each season relative to the one after it.
+HISTORY_SEASONS = 3
+HISTORY_DECAY = 0.5
+# Pseudo-wins every driver starts with, so a driver with no top five yet
+# still has some chance.
+STRENGTH_PRIOR = 0.5
+STRENGTH_ITERATIONS = 100
+# DNF rate the stored results are shrunk towards, worth DNF_PRIOR_WEIGHT results.
+DNF_PRIOR_RATE = 0.1
+DNF_PRIOR_WEIGHT = 20
+# Pick sharpness per unit of top-five hit rate; 0 would be random picks.
+PICK_SHARPNESS = 3.0
+# Pick slots of average accuracy every player's hit rate is shrunk towards.
+ACCURACY_PRIOR_SLOTS = 10
+DEFAULT_HIT_RATE = 0.4
+
+# Most points a single GP can give (exact top five + exact Alonso and Sainz).
+MAX_ROUND_POINTS = sum(TOP5_TABLE[pos][pos] for pos in range(1, 6)) + 2 * max(map(max, EXTRA_PICK_TABLE))
+# EXTRA_PICK_TABLE row for "didn't race" (or finished past MAX_POSITION): no points.
+_NOT_RACING = MAX_POSITION + 1
+
+
+@dataclass(frozen=True)
+class SimulationInputs:
+    """Everything a simulation needs, as arrays indexed by player/round/driver."""
+    usernames: tuple
+    ranks: tuple
+    totals: "np.ndarray"  # (players,) current points
+    sharpness: "np.ndarray"  # (players,) pick sharpness
+    picks: "np.ndarray"  # (players, rounds, 7) top five driver indexes, Alonso, Sainz; -1 = not sent
+    default_guesses: "np.ndarray"  # (players, 2) Alonso/Sainz guess used for unsent picks
+    log_strength: "np.ndarray"  # (drivers,)
+    dnf_rate: float
+    alonso: int  # driver index, -1 if not on the roster
+    sainz: int
+
+    @property
+    def rounds(self) -> int:
+        return self.picks.shape[1]
+
+
+@dataclass(frozen=True)
+class PlayerOutlook:
+    username: str
+    rank: int
+    total: int
+    expected: float  # mean final total
+    win: float  # probability of finishing first (shared on ties)
+    podium: float  # probability of finishing in the top three
+    alive: bool  # can still reach the leader's current total
+
+
+@dataclass(frozen=True)
+class SeasonForecast:
+    season: int
+    runs: int
+    remaining_rounds: int
+    players: tuple  # PlayerOutlook, most likely winner first
+
+
+def fit_strengths(finishes, weights, n_drivers, iterations=STRENGTH_ITERATIONS):
+    """
+    Plackett-Luce strengths from top-five finishes.
+
+    `finishes` is (races, 5) driver indexes, -1 for a driver we don't track;
+    `weights` is (races,). Uses the MM updates of Hunter (2004) with a
+    Gamma prior of STRENGTH_PRIOR pseudo-wins. Returns log-strengths.
+    """
+    strength = np.ones(n_drivers)
+    if not len(finishes):
+        return np.log(strength)
+    known = finishes >= 0  # (races, 5)
+    chosen = np.where(known, finishes, 0)
+    wins = np.full(n_drivers, STRENGTH_PRIOR)
+    np.add.at(wins, chosen[known], np.broadcast_to(weights[:, None], known.shape)[known])
+
+    # still_in[r, j, d]: driver d hadn't been placed before stage j of race r.
+    placed = np.zeros((len(finishes), 5, n_drivers), dtype=bool)
+    for stage in range(1, 5):
+        placed[:, stage] = placed[:, stage - 1]
+        rows = np.flatnonzero(known[:, stage - 1])
+        placed[rows, stage, chosen[rows, stage - 1]] = True
+    still_in = (~placed).astype(float)
+    stage_weight = weights[:, None] * known  # (races, 5)
+
+    for _ in range(iterations):
+        remaining = (still_in * strength).sum(axis=-1)  # (races, 5)
+        exposure = np.einsum("rj,rjd->d", stage_weight / remaining, still_in)
+        strength = wins / (STRENGTH_PRIOR + exposure)
+        strength /= strength.mean()
+    return np.log(strength)
+
+
+def sample_positions(rng, log_strength, dnf_rate, runs):
+    """(runs, drivers) finishing positions from 1, 0 for a DNF."""
+    keys = log_strength + rng.gumbel(size=(runs, len(log_strength)))
+    keys[rng.random(keys.shape) < dnf_rate] = -np.inf
+    positions = np.empty(keys.shape, dtype=np.int16)
+    np.put_along_axis(
+        positions, np.argsort(-keys, axis=1), np.arange(1, keys.shape[1] + 1, dtype=np.int16), axis=1
+    )
+    return np.where(np.isfinite(keys), positions, 0).astype(np.int16)
+
+
+def _sample_picks(rng, inputs, round_index, runs, chunk_cells):
+    """
+    (7, players, runs) picks for one round: the sent ones, else a top five
+    drawn for each player and simulation plus the default Alonso/Sainz
+    guesses. A draw takes a key per driver, so when that wouldn't fit in
+    `chunk_cells` each simulation takes one from a smaller pool of draws.
+    """
+    sent = inputs.picks[:, round_index]
+    picks = np.repeat(sent.T[:, :, None], runs, axis=2)
+    missing = np.flatnonzero((sent < 0).any(axis=1))
+    if len(missing):
+        n_drivers = len(inputs.log_strength)
+        pool = min(runs, max(1, chunk_cells // (len(missing) * n_drivers)))
+        # Exponential race, the same Plackett-Luce order as the Gumbel keys
+        # of sample_positions() but cheaper: the smallest arrival picks first.
+        rates = np.exp(-inputs.sharpness[missing, None] * inputs.log_strength).astype(np.float32)
+        keys = rng.standard_exponential((len(missing), pool, n_drivers), dtype=np.float32) * rates[:, None]
+        drawn = np.argsort(keys, axis=-1)[..., :5].astype(np.int16)
+        if pool < runs:
+            chosen = np.arange(0, len(missing) * pool, pool, dtype=np.int32)[:, None] + rng.integers(
+                pool, size=(len(missing), runs), dtype=np.int32
+            )
+            drawn = drawn.reshape(-1, 5)[chosen]
+        picks[:5, missing] = np.moveaxis(drawn, -1, 0)
+        picks[5:, missing] = inputs.default_guesses[missing].T[:, :, None]
+    return picks
+
+
+def _extra_actual(positions, driver):
+    if driver < 0:
+        return np.full(len(positions), _NOT_RACING)
+    actual = positions[:, driver]
+    return np.where(actual > MAX_POSITION, _NOT_RACING, actual)
+
+
+def run_simulation(inputs, runs, rng, chunk_cells=SIMULATION_CHUNK_CELLS) -> dict:
+    """
+    Simulate the rest of the season `runs` times.
+
+    Returns arrays over players: "win" and "podium" probabilities and the
+    "expected" final total.
+    """
+    players = len(inputs.totals)
+    n_drivers = len(inputs.log_strength)
+    top5 = np.array(TOP5_TABLE, dtype=np.int16)
+    extra = np.array(EXTRA_PICK_TABLE + [[0] * (MAX_POSITION + 1)], dtype=np.int16)
+    win = np.zeros(players)
+    podium = np.zeros(players)
+    points = np.zeros(players)
+
+    chunk = max(1, chunk_cells // max(players, 1))
+    done = 0
+    while done < runs:
+        size = min(chunk, runs - done)
+        # players x simulations; each round adds one gather per pick slot.
+        totals = np.repeat(inputs.totals[:, None].astype(np.int16), size, axis=1)
+        sims = np.arange(size)
+        for round_index in range(inputs.rounds):
+            positions = sample_positions(rng, inputs.log_strength, inputs.dnf_rate, size)
+            # in_top5[driver, sim]; the extra last row stands for any driver not on the roster.
+            in_top5 = np.zeros((n_drivers + 1, size), dtype=np.intp)
+            in_top5[:n_drivers] = np.where(positions <= 5, positions, 0).T
+            # Unsent picks are drawn again for every simulation.
+            round_picks = _sample_picks(rng, inputs, round_index, size, chunk_cells)
+            # points[pick, sim] for each slot, read at the flat offset pick * size + sim.
+            tables = [top5[in_top5, slot] for slot in range(1, 6)] + [
+                extra[_extra_actual(positions, driver)].T for driver in (inputs.alonso, inputs.sainz)
+            ]
+            for slot, table in enumerate(tables):
+                cells = round_picks[slot].astype(np.intp)
+                cells *= size
+                cells += sims
+                totals += np.take(table.ravel(), cells)
+
+        leaders = totals == totals.max(axis=0)
+        win += (leaders / leaders.sum(axis=0)).sum(axis=1)
+        if players > 3:
+            third = np.partition(totals, players - 3, axis=0)[players - 3]
+            podium += (totals >= third).sum(axis=1)
+        else:
+            podium += size
+        points += totals.sum(axis=1, dtype=np.int64)
+        done += size
+
+    return {"win": win / runs, "podium": podium / runs, "expected": points / runs}
+
+
+def load_inputs(season) -> SimulationInputs:
+    """Read standings, picks and stored results for `season` into arrays."""
+    roster = driver_roster()
+    index = {driver.pk: i for i, driver in enumerate(roster.drivers)}
+    codes = [driver.code.upper() for driver in roster.drivers]
+    unknown = len(roster.drivers)  # never in a simulated top five
+
+    standings = list(
+        SeasonStanding.objects.filter(season=season)
+        .order_by("rank", "user__username")
+        .values_list("user_id", "user__username", "total", "rank")
+    )
+    player_index = {user_id: i for i, (user_id, *_) in enumerate(standings)}
+
+    season_gps = list(GrandPrix.objects.filter(season_year=season, cancelled=False))
+    remaining = [gp for gp in season_gps if not gp.has_results] if len(roster.drivers) >= 5 else []
+    round_index = {gp.pk: i for i, gp in enumerate(remaining)}
+
+    # Model fit: weighted top fives and the Alonso/Sainz DNF rate.
+    finishes, weights, extra_positions = [], [], []
+    scored_gps = GrandPrix.objects.filter(
+        season_year__gt=season - HISTORY_SEASONS, season_year__lte=season, result_p5__isnull=False
+    ).values_list(
+        "season_year", "result_p1_id", "result_p2_id", "result_p3_id", "result_p4_id", "result_p5_id",
+        "result_alonso_pos", "result_sainz_pos",
+    )
+    for year, *top5, alonso_pos, sainz_pos in scored_gps:
+        finishes.append([index.get(driver_id, -1) for driver_id in top5])
+        weights.append(HISTORY_DECAY ** (season - year))
+        extra_positions += [pos for pos in (alonso_pos, sainz_pos) if pos is not None]
+    log_strength = fit_strengths(
+        np.array(finishes, dtype=np.int64).reshape(-1, 5), np.array(weights), len(roster.drivers)
+    )
+    dnfs = sum(1 for pos in extra_positions if pos == 0)
+    dnf_rate = (dnfs + DNF_PRIOR_RATE * DNF_PRIOR_WEIGHT) / (len(extra_positions) + DNF_PRIOR_WEIGHT)
+
+    # Each player's picks: sent ones for unraced GPs, hit rate on scored ones.
+    picks = np.full((len(standings), len(remaining), 7), -1, dtype=np.int16)
+    hits = np.zeros(len(standings))
+    slots = np.zeros(len(standings))
+    guesses = [[[], []] for _ in standings]
+    rows = Prediction.objects.filter(event__season_year=season).values_list(
+        "user_id", "event_id", "p1_id", "p2_id", "p3_id", "p4_id", "p5_id", "alonso_pos_guess", "sainz_pos_guess",
+        "event__result_p1_id", "event__result_p2_id", "event__result_p3_id", "event__result_p4_id",
+        "event__result_p5_id", "score",
+    )
+    for user_id, event_id, *fields in rows.iterator(chunk_size=2000):
+        player = player_index.get(user_id)
+        if player is None:  # standings not refreshed yet
+            continue
+        top5, alonso_guess, sainz_guess, results, score = fields[:5], fields[5], fields[6], fields[7:12], fields[12]
+        guesses[player][0].append(alonso_guess)
+        guesses[player][1].append(sainz_guess)
+        if event_id in round_index:
+            picks[player, round_index[event_id]] = [index.get(d, unknown) for d in top5] + [alonso_guess, sainz_guess]
+        elif score is not None:
+            hits[player] += len(set(top5) & set(results))
+            slots[player] += 5
+
+    mean_hit_rate = hits.sum() / slots.sum() if slots.sum() else DEFAULT_HIT_RATE
+    hit_rate = (hits + ACCURACY_PRIOR_SLOTS * mean_hit_rate) / (slots + ACCURACY_PRIOR_SLOTS)
+
+    # Unsent Alonso/Sainz guesses: the player's usual guess, else where the model ranks the driver.
+    strength_rank = {
+        code: 1 + int((log_strength > log_strength[codes.index(code)]).sum()) if code in codes else 0
+        for code in (ALONSO_CODE, SAINZ_CODE)
+    }
+    default_guesses = np.array([
+        [
+            int(np.median(past)) if past else strength_rank[code]
+            for past, code in zip(player_guesses, (ALONSO_CODE, SAINZ_CODE))
+        ]
+        for player_guesses in guesses
+    ], dtype=np.int16).reshape(-1, 2)
+
+    return SimulationInputs(
+        usernames=tuple(username for _, username, _, _ in standings),
+        ranks=tuple(rank for *_, rank in standings),
+        totals=np.array([total for _, _, total, _ in standings], dtype=np.int16),
+        sharpness=PICK_SHARPNESS * hit_rate,
+        picks=picks,
+        default_guesses=default_guesses,
+        log_strength=log_strength,
+        dnf_rate=dnf_rate,
+        alonso=codes.index(ALONSO_CODE) if ALONSO_CODE in codes else -1,
+        sainz=codes.index(SAINZ_CODE) if SAINZ_CODE in codes else -1,
+    )
+
+
+def simulate_season(season, runs=SIMULATION_RUNS, seed=None) -> SeasonForecast:
+    """Forecast the final standings of `season` from `runs` simulated seasons."""
+    if not SIMULATION_AVAILABLE:
+        raise RuntimeError("NumPy is required for season simulations")
+    inputs = load_inputs(season)
+    if not inputs.usernames:
+        return SeasonForecast(season, runs, inputs.rounds, ())
+    outcome = run_simulation(inputs, runs, np.random.default_rng(seed))
+
+    leader_total = int(inputs.totals.max())
+    reachable = inputs.rounds * MAX_ROUND_POINTS
+    # sorted() is stable, so equally likely players stay in standings order.
+    players = sorted(
+        (
+            PlayerOutlook(
+                username=username,
+                rank=rank,
+                total=int(total),
+                expected=round(float(expected), 1),
+                win=float(win),
+                podium=float(podium),
+                alive=int(total) + reachable >= leader_total,
+            )
+            for username, rank, total, expected, win, podium in zip(
+                inputs.usernames, inputs.ranks, inputs.totals,
+                outcome["expected"], outcome["win"], outcome["podium"],
+            )
+        ),
+        key=lambda p: (-p.win, -p.podium),
+    )
+    return SeasonForecast(season, runs, inputs.rounds, tuple(players))
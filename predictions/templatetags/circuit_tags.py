@@ -1,11 +1,66 @@
 """Template tags for circuit images."""
+import threading
+from pathlib import Path
+
 from django import template
 from django.conf import settings
 from django.templatetags.static import static
-from pathlib import Path
 
 register = template.Library()
 
+CIRCUITS_DIR = Path(settings.BASE_DIR) / "static" / "img" / "circuits"
+
+# Later entries win, so a pixel PNG takes precedence over the SVG.
+IMAGE_SOURCES = [("svg", ".svg"), ("pixel", ".png")]
+
+_manifest = None
+_manifest_mtimes = None
+_manifest_lock = threading.Lock()
+
+
+def _dir_mtimes():
+    mtimes = []
+    for folder, _ in IMAGE_SOURCES:
+        try:
+            mtimes.append((CIRCUITS_DIR / folder).stat().st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def _build_manifest():
+    """Map slug -> static URL (hashed in production) for every circuit image."""
+    manifest = {}
+    for folder, suffix in IMAGE_SOURCES:
+        directory = CIRCUITS_DIR / folder
+        if not directory.is_dir():
+            continue
+        for path in directory.iterdir():
+            if path.suffix == suffix:
+                manifest[path.stem] = static(f"img/circuits/{folder}/{path.name}")
+    return manifest
+
+
+def circuit_manifest():
+    """
+    Circuit image manifest, built once per process.
+
+    In DEBUG it is rebuilt when the image folders' mtime changes, so new
+    images show up without a restart; in production the folders are never
+    touched again after the first build.
+    """
+    global _manifest, _manifest_mtimes
+    if _manifest is not None and not settings.DEBUG:
+        return _manifest
+
+    mtimes = _dir_mtimes() if settings.DEBUG else None
+    if _manifest is None or mtimes != _manifest_mtimes:
+        with _manifest_lock:
+            if _manifest is None or mtimes != _manifest_mtimes:
+                _manifest = _build_manifest()
+                _manifest_mtimes = mtimes
+    return _manifest
+
 
 @register.simple_tag
 def circuit_image_url(slug):
@@ -15,17 +70,7 @@ def circuit_image_url(slug):
 
     Usage: {% circuit_image_url race.slug as circuit_url %}
     """
-    # Check for PNG first (pixel version)
-    png_path = Path(settings.BASE_DIR) / "static" / "img" / "circuits" / "pixel" / f"{slug}.png"
-    if png_path.exists():
-        return static(f"img/circuits/pixel/{slug}.png")
-
-    # Fall back to SVG
-    svg_path = Path(settings.BASE_DIR) / "static" / "img" / "circuits" / "svg" / f"{slug}.svg"
-    if svg_path.exists():
-        return static(f"img/circuits/svg/{slug}.svg")
-
-    return ""
+    return circuit_manifest().get(slug, "")
 
 
 @register.inclusion_tag("predictions/_circuit_slot.html")
@@ -35,26 +80,9 @@ def circuit_slot(slug, css_class=""):
 
     Usage: {% circuit_slot race.slug "track-slot" %}
     """
-    # Check for PNG first (pixel version)
-    png_path = Path(settings.BASE_DIR) / "static" / "img" / "circuits" / "pixel" / f"{slug}.png"
-    if png_path.exists():
-        return {
-            "image_url": static(f"img/circuits/pixel/{slug}.png"),
-            "has_image": True,
-            "css_class": css_class,
-        }
-
-    # Fall back to SVG
-    svg_path = Path(settings.BASE_DIR) / "static" / "img" / "circuits" / "svg" / f"{slug}.svg"
-    if svg_path.exists():
-        return {
-            "image_url": static(f"img/circuits/svg/{slug}.svg"),
-            "has_image": True,
-            "css_class": css_class,
-        }
-
+    image_url = circuit_manifest().get(slug, "")
     return {
-        "image_url": "",
-        "has_image": False,
+        "image_url": image_url,
+        "has_image": bool(image_url),
         "css_class": css_class,
     }
@@ -0,0 +1,124 @@
+"""Tests for the read-only JSON API and its conditional GET handling."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from predictions.models import Driver, GrandPrix, Prediction, Session, Team
+from predictions.pagination import encode_cursor
+from predictions.scoring import score_grand_prix
+
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team)
+            for i in range(1, 6)
+        ]
+        self.gp = GrandPrix.objects.create(season_year=2026, round=1, name="API GP", slug="api-gp")
+        self.quali = Session.objects.create(
+            event=self.gp, session_type="QUALI", start_utc=timezone.now() + timedelta(days=7), order=4
+        )
+        for username in ("ana", "bea"):
+            user = User.objects.create_user(username=username, password="testpass")
+            Prediction(
+                user=user, event=self.gp, alonso_pos_guess=1, sainz_pos_guess=0,
+                **{f"p{i}": driver for i, driver in enumerate(self.drivers, start=1)},
+            ).save(skip_lock_check=True)
+
+    def _lock_and_score(self):
+        self.quali.start_utc = timezone.now() - timedelta(hours=1)
+        self.quali.save()
+        self.gp.refresh_from_db()
+        for i, driver in enumerate(self.drivers, start=1):
+            setattr(self.gp, f"result_p{i}", driver)
+        self.gp.result_alonso_pos = 1
+        self.gp.result_sainz_pos = 0
+        self.gp.save()
+        score_grand_prix(self.gp)
+
+    def test_calendar_lists_season(self):
+        response = self.client.get(reverse("predictions:api_calendar"))
+        self.assertEqual(response["Content-Type"], "application/json")
+        races = response.json()["races"]
+        self.assertEqual([(r["slug"], r["has_results"]) for r in races], [("api-gp", False)])
+
+    def test_matching_etag_is_304_with_one_query(self):
+        url = reverse("predictions:api_calendar")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):  # only the data version
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_is_304(self):
+        url = reverse("predictions:api_standings")
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag(self):
+        url = reverse("predictions:api_calendar")
+        etag = self.client.get(url)["ETag"]
+        self.gp.name = "Renamed GP"
+        self.gp.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["races"][0]["name"], "Renamed GP")
+
+    def test_picks_hidden_until_lock(self):
+        response = self.client.get(reverse("predictions:api_race_picks", args=[self.gp.slug]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_picks_and_results_after_scoring(self):
+        self._lock_and_score()
+        picks = self.client.get(reverse("predictions:api_race_picks", args=[self.gp.slug])).json()["picks"]
+        self.assertEqual([(p["username"], p["rank"]) for p in picks], [("ana", 1), ("bea", 1)])
+        self.assertEqual(picks[0]["top5"], ["D01", "D02", "D03", "D04", "D05"])
+
+        race = self.client.get(reverse("predictions:api_race", args=[self.gp.slug])).json()
+        self.assertEqual(race["results"]["top5"], ["D01", "D02", "D03", "D04", "D05"])
+
+    def test_unscored_picks_page_by_username(self):
+        self._lock_and_score()
+        Prediction.objects.update(score=None, rank=None)
+        url = reverse("predictions:api_race_picks", args=[self.gp.slug])
+        with patch("predictions.api.API_PAGE_SIZE", 1):
+            first = self.client.get(url).json()
+            response = self.client.get(url, {"desde": first["next"]})
+        self.assertEqual(response.status_code, 200)
+        second = response.json()
+        self.assertEqual(
+            [(p["username"], p["rank"]) for p in first["picks"] + second["picks"]], [("ana", None), ("bea", None)]
+        )
+        self.assertIsNone(second["next"])
+
+    def test_malformed_cursors_return_the_first_page(self):
+        self._lock_and_score()
+        pages = [
+            (reverse("predictions:api_standings"), "standings", [["a"], [1], ["x", "ana"], [1, None]]),
+            (reverse("predictions:api_race_picks", args=[self.gp.slug]), "picks", [["a"], [1, "ana"], [1, "ana", "x"]]),
+        ]
+        for url, key, cursors in pages:
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, {"desde": encode_cursor(cursor)})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.json()[key][0]["username"], "ana")
+
+    def test_standings_pages_with_cursor(self):
+        self._lock_and_score()
+        with patch("predictions.api.API_PAGE_SIZE", 1):
+            first = self.client.get(reverse("predictions:api_standings")).json()
+            second = self.client.get(reverse("predictions:api_standings"), {"desde": first["next"]}).json()
+        self.assertEqual([r["username"] for r in first["standings"] + second["standings"]], ["ana", "bea"])
+        self.assertIsNone(second["next"])
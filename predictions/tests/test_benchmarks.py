@@ -0,0 +1,445 @@
+"""
+Opt-in performance benchmarks.
+
+Skipped by default; run with:
+    RUN_BENCHMARKS=1 python manage.py test predictions.tests.test_benchmarks
+
+ViewBenchmark seeds a full season and measures the main pages. Tune it with:
+    BENCHMARK_USERS       players seeded, one pick per GP each (default 5000)
+    BENCHMARK_ITERATIONS  warm requests timed per view (default 20)
+    BENCHMARK_OUTPUT      where the JSON results go (default .cache/benchmarks/views.json)
+    BENCHMARK_BUDGETS     budget file (default view_budgets.json next to this module)
+A view that goes over its budget for queries, p95 latency or peak memory
+fails the run.
+
+ApiBenchmark compares JSON API 304 revalidations with full responses.
+
+PickSubmitBenchmark fires BENCHMARK_SUBMITTERS players (default 300) at one
+GP from BENCHMARK_CONCURRENCY threads (default 16; forced to 1 on SQLite,
+which can't hold concurrent writers), each submitting twice, through the
+upsert and through the old read + full_clean + save path.
+
+SimulationBenchmark runs the season forecast engine for BENCHMARK_SIM_PLAYERS
+players (default 10000) x BENCHMARK_SIM_RUNS simulations (default 10000) x
+BENCHMARK_SIM_ROUNDS remaining GPs (default 10) on synthetic inputs.
+"""
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from predictions.models import (
+    Driver, GrandPrix, Prediction, ScoringKernel, Session, Team, invalidate_driver_roster,
+)
+from predictions.scoring import score_grand_prix
+from predictions.simulation import SIMULATION_AVAILABLE, SimulationInputs, run_simulation
+
+
+User = get_user_model()
+
+RUN_BENCHMARKS = os.getenv("RUN_BENCHMARKS") == "1"
+
+
+def seed_drivers(count=22):
+    team = Team.objects.create(name="Bench Team", slug="bench-team")
+    drivers = Driver.objects.bulk_create([
+        Driver(code=f"B{i:02d}", name=f"Bench Driver {i}", team=team)
+        for i in range(1, count + 1)
+    ])
+    invalidate_driver_roster()
+    return drivers
+
+
+def seed_predictions(gp, drivers, count, seed=2026):
+    """Bulk-create `count` users with one random prediction each for `gp`."""
+    rng = random.Random(seed)
+    users = User.objects.bulk_create([
+        User(username=f"bench-{gp.pk}-{i}") for i in range(count)
+    ])
+    predictions = []
+    for user in users:
+        top5 = rng.sample(drivers, 5)
+        predictions.append(Prediction(
+            user=user,
+            event=gp,
+            p1=top5[0], p2=top5[1], p3=top5[2], p4=top5[3], p5=top5[4],
+            alonso_pos_guess=rng.randint(0, 22),
+            sainz_pos_guess=rng.randint(0, 22),
+        ))
+    Prediction.objects.bulk_create(predictions, batch_size=1000)
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class ScoringBenchmark(TestCase):
+    PREDICTIONS = 10_000
+
+    @classmethod
+    def setUpTestData(cls):
+        drivers = seed_drivers()
+        cls.gp = GrandPrix.objects.create(
+            season_year=2026, round=1, name="Bench GP", slug="bench-gp",
+            result_p1=drivers[0], result_p2=drivers[1], result_p3=drivers[2],
+            result_p4=drivers[3], result_p5=drivers[4],
+            result_alonso_pos=7, result_sainz_pos=0,
+        )
+        seed_predictions(cls.gp, drivers, cls.PREDICTIONS)
+
+    def test_bulk_scoring_10k(self):
+        result = score_grand_prix(self.gp)
+        rescore = score_grand_prix(self.gp)
+        print(
+            f"\n  score_grand_prix: {result.total} rows, {result.changed} changed "
+            f"in {result.elapsed:.3f}s; rescore {rescore.total} rows, {rescore.changed} changed "
+            f"in {rescore.elapsed:.3f}s"
+        )
+        self.assertEqual(result.total, self.PREDICTIONS)
+        self.assertEqual(rescore.total, 0)
+        self.assertEqual(rescore.changed, 0)
+
+    def test_per_row_save_10k_baseline(self):
+        started = time.perf_counter()
+        for pred in Prediction.objects.filter(event=self.gp).select_related("event"):
+            pred.score = pred.calculate_score()
+            pred.save(skip_lock_check=True)
+        elapsed = time.perf_counter() - started
+        print(f"\n  per-row save baseline: {self.PREDICTIONS} rows in {elapsed:.3f}s")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class ScoringKernelBenchmark(SimpleTestCase):
+    ROWS = 10_000
+
+    def test_per_row_cost_10k(self):
+        rng = random.Random(2026)
+        driver_ids = list(range(1, 23))
+        gp = GrandPrix(
+            result_p1_id=1, result_p2_id=2, result_p3_id=3, result_p4_id=4, result_p5_id=5,
+            result_alonso_pos=7, result_sainz_pos=0,
+        )
+        predictions = []
+        for _ in range(self.ROWS):
+            p1, p2, p3, p4, p5 = rng.sample(driver_ids, 5)
+            predictions.append(Prediction(
+                event=gp, p1_id=p1, p2_id=p2, p3_id=p3, p4_id=p4, p5_id=p5,
+                alonso_pos_guess=rng.randint(0, 22), sainz_pos_guess=rng.randint(0, 22),
+            ))
+        raw_rows = [pred._score_args() for pred in predictions]
+
+        kernel = ScoringKernel(gp)
+        started = time.perf_counter()
+        for args in raw_rows:
+            kernel.score(*args)
+        kernel_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for pred in predictions:
+            pred.calculate_score()
+            pred.score_breakdown()
+        wrapper_elapsed = time.perf_counter() - started
+
+        print(
+            f"\n  ScoringKernel.score: {kernel_elapsed / self.ROWS * 1e6:.2f} us/row; "
+            f"calculate_score + score_breakdown: {wrapper_elapsed / self.ROWS * 1e6:.2f} us/row"
+        )
+
+
+def seed_season(drivers, users, rounds=24, past=12, seed=2026):
+    """
+    Create `rounds` GPs, the first `past` already raced and scored, and one
+    random pick per user per GP. Returns the GPs ordered by round.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    gps = []
+    for rnd in range(1, rounds + 1):
+        race_start = now + timedelta(weeks=rnd - past) - timedelta(days=1)
+        finish = rng.sample(drivers, 5) if rnd <= past else [None] * 5
+        gp = GrandPrix.objects.create(
+            season_year=2026, round=rnd, name=f"Bench GP {rnd}", slug=f"bench-gp-{rnd}",
+            result_p1=finish[0], result_p2=finish[1], result_p3=finish[2],
+            result_p4=finish[3], result_p5=finish[4],
+            result_alonso_pos=rng.randint(0, 22) if rnd <= past else None,
+            result_sainz_pos=rng.randint(0, 22) if rnd <= past else None,
+        )
+        Session.objects.bulk_create([
+            Session(event=gp, session_type="FP1", start_utc=race_start - timedelta(days=2), order=1),
+            Session(event=gp, session_type="QUALI", start_utc=race_start - timedelta(days=1), order=4),
+            Session(event=gp, session_type="RACE", start_utc=race_start, order=5),
+        ])
+        gp.sync_schedule()
+        gps.append(gp)
+
+    for gp in gps:
+        picks = []
+        for user in users:
+            top5 = rng.sample(drivers, 5)
+            picks.append(Prediction(
+                user=user, event=gp,
+                p1=top5[0], p2=top5[1], p3=top5[2], p4=top5[3], p5=top5[4],
+                alonso_pos_guess=rng.randint(0, 22),
+                sainz_pos_guess=rng.randint(0, 22),
+            ))
+        Prediction.objects.bulk_create(picks, batch_size=1000)
+        if gp.has_results:
+            # Also materializes SeasonStanding for every scored user.
+            score_grand_prix(gp)
+    return gps
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class ViewBenchmark(TestCase):
+    USERS = int(os.getenv("BENCHMARK_USERS", "5000"))
+    ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", "20"))
+    OUTPUT = Path(os.getenv("BENCHMARK_OUTPUT", settings.BASE_DIR / ".cache" / "benchmarks" / "views.json"))
+    BUDGETS = Path(os.getenv("BENCHMARK_BUDGETS", Path(__file__).with_name("view_budgets.json")))
+
+    @classmethod
+    def setUpTestData(cls):
+        drivers = seed_drivers()
+        users = User.objects.bulk_create([
+            User(username=f"player-{i:05d}") for i in range(cls.USERS)
+        ])
+        cls.user = users[0]
+        cls.gps = seed_season(drivers, users)
+
+    def _views(self):
+        past = self.gps[0]
+        upcoming = GrandPrix.objects.next_event()
+        return {
+            "races": reverse("predictions:races"),
+            "race_detail": reverse("predictions:race_detail", args=[past.slug]),
+            "porras": reverse("predictions:porras"),
+            "leaderboard": reverse("predictions:leaderboard"),
+            "dashboard": reverse("predictions:dashboard"),
+            "pick": reverse("predictions:pick", args=[upcoming.slug]),
+        }
+
+    def _measure(self, url):
+        cache.clear()
+        # The query log is capped, so start every capture from an empty one.
+        connection.queries_log.clear()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as cold_queries:
+            response = self.client.get(url)
+        cold_ms = (time.perf_counter() - started) * 1000
+        # CaptureQueriesContext reads the log lazily; count before clearing it.
+        queries_cold = len(cold_queries)
+        self.assertEqual(response.status_code, 200, url)
+
+        timings = []
+        for _ in range(self.ITERATIONS):
+            started = time.perf_counter()
+            self.client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as warm_queries:
+            tracemalloc.start()
+            self.client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        queries = len(warm_queries)
+
+        return {
+            "url": url,
+            "cold_ms": round(cold_ms, 2),
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "queries_cold": queries_cold,
+            "queries": queries,
+            "peak_kib": round(peak / 1024),
+        }
+
+    def test_view_budgets(self):
+        self.client.force_login(self.user)
+        results = {name: self._measure(url) for name, url in self._views().items()}
+
+        self.OUTPUT.parent.mkdir(parents=True, exist_ok=True)
+        self.OUTPUT.write_text(json.dumps({
+            "timestamp": timezone.now().isoformat(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "users": self.USERS,
+            "grands_prix": len(self.gps),
+            "predictions": Prediction.objects.count(),
+            "iterations": self.ITERATIONS,
+            "views": results,
+        }, indent=2))
+
+        budgets = json.loads(self.BUDGETS.read_text())
+        over_budget = []
+        print(f"\n  {self.USERS} users x {len(self.gps)} GPs -> {self.OUTPUT}")
+        for name, result in results.items():
+            print(
+                f"  {name:<12} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+                f"cold {result['cold_ms']:>8.2f} ms  {result['queries']:>3} queries "
+                f"({result['queries_cold']} cold)  peak {result['peak_kib']:>7} KiB"
+            )
+            for metric, limit in budgets.get(name, {}).items():
+                if result[metric] > limit:
+                    over_budget.append(f"{name}.{metric} = {result[metric]} (budget {limit})")
+        if over_budget:
+            self.fail("Views over budget:\n  " + "\n  ".join(over_budget))
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class ApiBenchmark(TestCase):
+    """Requests per second for a 304 revalidation against full responses."""
+    USERS = int(os.getenv("BENCHMARK_USERS", "5000"))
+    ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", "20")) * 10
+
+    @classmethod
+    def setUpTestData(cls):
+        drivers = seed_drivers()
+        users = User.objects.bulk_create([
+            User(username=f"player-{i:05d}") for i in range(cls.USERS)
+        ])
+        cls.gps = seed_season(drivers, users)
+
+    def _throughput(self, url, **headers):
+        started = time.perf_counter()
+        for _ in range(self.ITERATIONS):
+            response = self.client.get(url, headers=headers)
+        return self.ITERATIONS / (time.perf_counter() - started), response.status_code
+
+    def test_not_modified_throughput(self):
+        cache.clear()
+        api_url = reverse("predictions:api_standings")
+        etag = self.client.get(api_url)["ETag"]
+
+        results = {
+            "api_304": self._throughput(api_url, if_none_match=etag),
+            "api_200": self._throughput(api_url),
+            "leaderboard_html": self._throughput(reverse("predictions:leaderboard")),
+            "race_picks_304": self._throughput(
+                reverse("predictions:api_race_picks", args=[self.gps[0].slug]),
+                if_none_match=self.client.get(
+                    reverse("predictions:api_race_picks", args=[self.gps[0].slug])
+                )["ETag"],
+            ),
+        }
+        print(f"\n  {self.USERS} users x {len(self.gps)} GPs, {self.ITERATIONS} requests each")
+        for name, (rps, status) in results.items():
+            print(f"  {name:<17} {rps:>8.0f} req/s  ({status})")
+
+        self.assertEqual(results["api_304"][1], 304)
+        self.assertEqual(results["race_picks_304"][1], 304)
+        self.assertGreater(results["api_304"][0], results["leaderboard_html"][0])
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class PickSubmitBenchmark(TransactionTestCase):
+    SUBMITTERS = int(os.getenv("BENCHMARK_SUBMITTERS", "300"))
+    CONCURRENCY = int(os.getenv("BENCHMARK_CONCURRENCY", "16"))
+
+    def setUp(self):
+        self.drivers = seed_drivers()
+        self.gp = GrandPrix.objects.create(season_year=2026, round=1, name="Bench GP", slug="bench-gp")
+        Session.objects.create(
+            event=self.gp, session_type="QUALI", start_utc=timezone.now() + timedelta(days=7), order=4
+        )
+        self.gp.refresh_from_db()
+        self.users = User.objects.bulk_create([
+            User(username=f"submitter-{i:05d}") for i in range(self.SUBMITTERS)
+        ])
+
+    def _upsert(self, user, top5):
+        Prediction.objects.submit(user.pk, self.gp, [d.pk for d in top5], 3, 0)
+
+    def _legacy(self, user, top5):
+        pred = Prediction.objects.filter(user=user, event=self.gp).first() or Prediction(user=user, event=self.gp)
+        pred.p1, pred.p2, pred.p3, pred.p4, pred.p5 = top5
+        pred.alonso_pos_guess, pred.sainz_pos_guess = 3, 0
+        pred.save()
+
+    def _run(self, submit):
+        Prediction.objects.all().delete()
+        rng = random.Random(2026)
+        # Every player submits twice, the second one racing the first.
+        jobs = [(user, rng.sample(self.drivers, 5)) for user in self.users for _ in range(2)]
+        errors = []
+
+        def work(job):
+            try:
+                submit(*job)
+            except Exception as exc:
+                errors.append(type(exc).__name__)
+            finally:
+                connections.close_all()
+
+        workers = 1 if connection.vendor == "sqlite" else self.CONCURRENCY
+        started = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(work, jobs))
+        elapsed = time.perf_counter() - started
+        return len(jobs) / elapsed, errors, workers
+
+    def test_submit_throughput(self):
+        upsert_rate, upsert_errors, workers = self._run(self._upsert)
+        self.assertEqual(upsert_errors, [])
+        self.assertEqual(Prediction.objects.count(), self.SUBMITTERS)
+        legacy_rate, legacy_errors, _ = self._run(self._legacy)
+        print(f"\n  {self.SUBMITTERS} players x 2 submits, {workers} thread(s) on {connection.vendor}")
+        print(f"  upsert            {upsert_rate:>8.0f} submits/s  errors: {len(upsert_errors)}")
+        print(
+            f"  read+clean+save   {legacy_rate:>8.0f} submits/s  errors: {len(legacy_errors)} "
+            f"{sorted(set(legacy_errors))}"
+        )
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+@unittest.skipUnless(SIMULATION_AVAILABLE, "NumPy is not installed")
+class SimulationBenchmark(SimpleTestCase):
+    PLAYERS = int(os.getenv("BENCHMARK_SIM_PLAYERS", "10000"))
+    RUNS = int(os.getenv("BENCHMARK_SIM_RUNS", "10000"))
+    ROUNDS = int(os.getenv("BENCHMARK_SIM_ROUNDS", "10"))
+
+    def test_forecast_10k_players_10k_runs(self):
+        import numpy as np
+
+        rng = np.random.default_rng(2026)
+        inputs = SimulationInputs(
+            usernames=tuple(f"player-{i:05d}" for i in range(self.PLAYERS)),
+            ranks=tuple(range(1, self.PLAYERS + 1)),
+            totals=np.sort(rng.integers(0, 600, self.PLAYERS))[::-1].astype(np.int16),
+            sharpness=rng.uniform(0.5, 2.5, self.PLAYERS),
+            picks=np.full((self.PLAYERS, self.ROUNDS, 7), -1, dtype=np.int16),
+            default_guesses=rng.integers(0, 23, (self.PLAYERS, 2)).astype(np.int16),
+            log_strength=np.sort(rng.normal(0, 1.2, 22))[::-1],
+            dnf_rate=0.1,
+            alonso=8,
+            sainz=10,
+        )
+        tracemalloc.start()
+        started = time.perf_counter()
+        outcome = run_simulation(inputs, self.RUNS, rng)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        cells = self.PLAYERS * self.RUNS * self.ROUNDS
+        print(f"\n  {self.PLAYERS} players x {self.RUNS} runs x {self.ROUNDS} GPs: {elapsed:.2f}s "
+              f"({cells / elapsed / 1e6:.0f}M pick scores/s, peak {peak / 2**20:.0f} MiB)")
+        self.assertAlmostEqual(outcome["win"].sum(), 1.0)
@@ -0,0 +1,83 @@
+"""Tests for the versioned page data cache."""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from predictions.caching import cache_stats
+from predictions.models import DataVersion, Driver, GrandPrix, Prediction, Session, Team
+
+
+User = get_user_model()
+
+
+class PageDataCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team)
+            for i in range(1, 6)
+        ]
+        self.gp = GrandPrix.objects.create(season_year=2026, round=1, name="Cache GP", slug="cache-gp")
+        Session.objects.create(
+            event=self.gp, session_type="FP1", start_utc=timezone.now() + timedelta(days=7), order=1
+        )
+        self.user = User.objects.create_user(username="cacher", password="testpass")
+
+    def _predict(self, user):
+        picks = {f"p{i}": driver for i, driver in enumerate(self.drivers, start=1)}
+        Prediction.objects.create(user=user, event=self.gp, alonso_pos_guess=1, **picks)
+
+    def test_second_hit_skips_schedule_query(self):
+        url = reverse("predictions:races")
+        self.client.get(url)
+        with self.assertNumQueries(1):  # only the data version
+            self.client.get(url)
+
+    def test_prediction_write_bumps_version(self):
+        before = DataVersion.objects.current(2026)
+        self._predict(self.user)
+        self.assertNotEqual(DataVersion.objects.current(2026), before)
+
+    def test_driver_write_bumps_every_season(self):
+        before = DataVersion.objects.current(2026)
+        self.drivers[0].save()
+        self.assertNotEqual(DataVersion.objects.current(2026), before)
+
+    def test_porras_sees_new_pick_after_write(self):
+        url = reverse("predictions:porras")
+        self.assertEqual(list(self.client.get(url).context["picks"]), [])
+        self._predict(self.user)
+        self.assertEqual(len(self.client.get(url).context["picks"]), 1)
+
+    def test_my_pick_is_not_shared(self):
+        self._predict(self.user)
+        url = reverse("predictions:races")
+        self.client.force_login(self.user)
+        self.assertTrue(self.client.get(url).context["events"][0]["has_pick"])
+
+        other = User.objects.create_user(username="other", password="testpass")
+        self.client.force_login(other)
+        self.assertFalse(self.client.get(url).context["events"][0]["has_pick"])
+
+    def test_stats_count_hits_and_misses(self):
+        url = reverse("predictions:leaderboard")
+        before = cache_stats()
+        self.client.get(url)
+        self.client.get(url)
+        after = cache_stats()
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+    def test_stats_endpoint_is_staff_only(self):
+        url = reverse("predictions:cache_stats")
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = User.objects.create_user(username="staff", password="testpass", is_staff=True)
+        self.client.force_login(staff)
+        self.assertIn("hits", self.client.get(url).json())
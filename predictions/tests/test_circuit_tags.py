@@ -0,0 +1,51 @@
+"""Tests for the circuit image manifest."""
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from predictions.templatetags import circuit_tags
+
+
+class CircuitManifestTests(SimpleTestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        (self.root / "svg").mkdir()
+        (self.root / "svg" / "monaco-gp.svg").write_text("<svg/>")
+        (self.root / "svg" / "spain-gp.svg").write_text("<svg/>")
+
+        patcher = mock.patch.object(circuit_tags, "CIRCUITS_DIR", self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        circuit_tags._manifest = None
+        self.addCleanup(setattr, circuit_tags, "_manifest", None)
+
+    def test_tags_resolve_from_manifest(self):
+        self.assertEqual(circuit_tags.circuit_image_url("monaco-gp"), "/static/img/circuits/svg/monaco-gp.svg")
+        self.assertEqual(circuit_tags.circuit_image_url("missing-gp"), "")
+        slot = circuit_tags.circuit_slot("missing-gp", "track-slot")
+        self.assertEqual(slot, {"image_url": "", "has_image": False, "css_class": "track-slot"})
+
+    def test_pixel_png_wins_over_svg(self):
+        (self.root / "pixel").mkdir()
+        (self.root / "pixel" / "spain-gp.png").write_bytes(b"")
+        self.assertEqual(circuit_tags.circuit_image_url("spain-gp"), "/static/img/circuits/pixel/spain-gp.png")
+        self.assertEqual(circuit_tags.circuit_image_url("monaco-gp"), "/static/img/circuits/svg/monaco-gp.svg")
+
+    @override_settings(DEBUG=False)
+    def test_manifest_is_built_once(self):
+        circuit_tags.circuit_image_url("monaco-gp")
+        with mock.patch.object(circuit_tags, "_build_manifest") as build:
+            for _ in range(24):
+                circuit_tags.circuit_slot("monaco-gp")
+        build.assert_not_called()
+
+    @override_settings(DEBUG=True)
+    def test_debug_rebuilds_when_directory_changes(self):
+        self.assertEqual(circuit_tags.circuit_image_url("italy-gp"), "")
+        (self.root / "pixel").mkdir()
+        (self.root / "pixel" / "italy-gp.png").write_bytes(b"")
+        self.assertEqual(circuit_tags.circuit_image_url("italy-gp"), "/static/img/circuits/pixel/italy-gp.png")
@@ -0,0 +1,95 @@
+"""Tests for the streaming prediction export."""
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from predictions.models import Driver, GrandPrix, Prediction, Team
+
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team) for i in range(1, 6)
+        ]
+        cls.staff = User.objects.create_user(username="admin", password="testpass", is_staff=True)
+        cls.player = User.objects.create_user(username="ana", password="testpass")
+        for round_num in (1, 2):
+            gp = GrandPrix.objects.create(
+                season_year=2026, round=round_num, name=f"GP {round_num}", slug=f"gp-{round_num}"
+            )
+            for user in (cls.staff, cls.player):
+                Prediction(
+                    user=user, event=gp, alonso_pos_guess=round_num, sainz_pos_guess=0, score=10 * round_num,
+                    **{f"p{i}": driver for i, driver in enumerate(drivers, start=1)},
+                ).save(skip_lock_check=True)
+
+    def _export(self, *args):
+        out = io.StringIO()
+        call_command("export_predictions", *args, stdout=out)
+        return out.getvalue()
+
+    def test_csv_has_header_and_one_row_per_prediction(self):
+        rows = list(csv.DictReader(io.StringIO(self._export())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            [(r["round"], r["username"]) for r in rows],
+            [("1", "admin"), ("1", "ana"), ("2", "admin"), ("2", "ana")],
+        )
+        self.assertEqual((rows[0]["p1"], rows[0]["p5"], rows[0]["score"]), ("D01", "D05", "10"))
+
+    def test_ndjson_filters_by_round(self):
+        lines = self._export("--format", "ndjson", "--season", "2026", "--round", "2").splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([r["username"] for r in records], ["admin", "ana"])
+        self.assertTrue(all(r["round"] == 2 and r["score"] == 20 for r in records))
+
+    def test_gzip_needs_output_file(self):
+        with self.assertRaises(CommandError):
+            self._export("--gzip")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "picks.csv.gz")
+            call_command("export_predictions", "--gzip", "-o", path, stderr=io.StringIO())
+            with gzip.open(path, "rt") as fh:
+                self.assertEqual(len(list(csv.DictReader(fh))), 4)
+
+    def test_endpoint_is_staff_only(self):
+        self.client.force_login(self.player)
+        response = self.client.get(reverse("predictions:export"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_endpoint_streams_gzip(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("predictions:export"), {"temporada": 2026, "ronda": 1, "gzip": "1"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn("predicciones-2026-r1.csv.gz", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b"".join(response.streaming_content)).decode())))
+        self.assertEqual([r["username"] for r in rows], ["admin", "ana"])
+
+    async def test_endpoint_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse("predictions:export"), {"temporada": 2026})
+        # An async iterator: Django sends it chunk by chunk instead of buffering it first.
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body.decode())))), 4)
+
+    def test_endpoint_rejects_bad_params(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse("predictions:export"), {"formato": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("predictions:export"), {"ronda": "x"}).status_code, 400)
@@ -0,0 +1,223 @@
+"""Tests for fetch_results against a local stub of the Jolpica API."""
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from predictions.jolpica import RateLimiter
+from predictions.models import Driver, GrandPrix, Prediction, Session, Team
+
+
+User = get_user_model()
+
+CLASSIFICATION = ["VER", "NOR", "LEC", "PIA", "RUS", "ALO", "SAI"]
+
+
+def results_payload(codes, dnf=()):
+    return {"MRData": {"RaceTable": {"Races": [{"Results": [
+        {
+            "position": str(pos),
+            "Driver": {"code": code},
+            "status": "Retired" if code in dnf else "Finished",
+        }
+        for pos, code in enumerate(codes, start=1)
+    ]}]}}}
+
+
+class StubJolpica(ThreadingHTTPServer):
+    """Serves /<year>/<round>/results/ from `payloads`, failing some rounds first."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.payloads = {}
+        self.failures = {}  # path -> number of 503s to return before succeeding
+        self.hits = {}
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            failing = server.failures.get(self.path, 0)
+            if failing:
+                server.failures[self.path] = failing - 1
+        if failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = server.payloads.get(self.path)
+        if payload is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchResultsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubJolpica()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.payloads.clear()
+        self.server.failures.clear()
+        self.server.hits.clear()
+        self.server.not_modified = 0
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = {
+            code: Driver.objects.create(code=code, name=code, team=team)
+            for code in CLASSIFICATION
+        }
+        self.user = User.objects.create_user(username="fetcher", password="testpass")
+        for rnd in range(1, 5):
+            gp = GrandPrix.objects.create(season_year=2026, round=rnd, name=f"GP {rnd}", slug=f"gp-{rnd}")
+            Session.objects.create(
+                event=gp, session_type="RACE", start_utc=timezone.now() - timedelta(days=30 - rnd), order=5
+            )
+            picks = {f"p{i}": self.drivers[code] for i, code in enumerate(CLASSIFICATION[:5], start=1)}
+            Prediction(
+                user=self.user, event=gp, alonso_pos_guess=6, sainz_pos_guess=0, **picks
+            ).save(skip_lock_check=True)
+            self.server.payloads[f"/2026/{rnd}/results/"] = results_payload(CLASSIFICATION, dnf={"SAI"})
+
+    def _run(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "fetch_results", "--api-url", self.server.base_url, "--rate", "0",
+            "--cache-dir", self.cache_dir, *args,
+            stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_concurrent_fetch_saves_every_round(self):
+        out, err = self._run("--concurrency", "4")
+        self.assertEqual(err, "")
+        for gp in GrandPrix.objects.all():
+            self.assertTrue(gp.has_results)
+            self.assertEqual(gp.result_alonso_pos, 6)
+            self.assertEqual(gp.result_sainz_pos, 0)
+        scores = set(Prediction.objects.values_list("score", flat=True))
+        self.assertEqual(scores, {80 + 16 + 2})
+
+    def test_transient_errors_are_retried(self):
+        self.server.failures["/2026/2/results/"] = 2
+        out, err = self._run("--concurrency", "2", "--round", "2")
+        self.assertEqual(err, "")
+        self.assertEqual(self.server.hits["/2026/2/results/"], 3)
+        self.assertTrue(GrandPrix.objects.get(round=2).has_results)
+
+    def test_failed_round_does_not_block_others(self):
+        del self.server.payloads["/2026/3/results/"]
+        out, err = self._run("--concurrency", "4")
+        self.assertIn("ERROR conectando con la API", err)
+        self.assertFalse(GrandPrix.objects.get(round=3).has_results)
+        self.assertEqual(GrandPrix.objects.filter(result_p1__isnull=False).count(), 3)
+
+    def test_unchanged_payload_is_revalidated_and_skipped(self):
+        # No classification yet, so the GP stays pending for the next run.
+        self.server.payloads["/2026/1/results/"] = {"MRData": {"RaceTable": {"Races": []}}}
+        self._run("--round", "1")
+
+        out, err = self._run("--round", "1")
+        self.assertEqual(self.server.not_modified, 1)
+        self.assertIn("Sin cambios", out)
+        self.assertNotIn("Sin resultados", out)
+
+    def test_force_reapplies_unchanged_payload(self):
+        self._run("--round", "1")
+        Prediction.objects.update(score=None, scored_version="")
+
+        out, err = self._run("--round", "1", "--force")
+        self.assertEqual(self.server.not_modified, 1)
+        self.assertNotIn("Sin cambios", out)
+        self.assertEqual(set(Prediction.objects.filter(event__round=1).values_list("score", flat=True)), {98})
+
+    def test_changed_payload_is_applied(self):
+        self._run("--round", "1")
+        self.server.payloads["/2026/1/results/"] = results_payload(["NOR", "VER", "LEC", "PIA", "RUS", "ALO", "SAI"])
+        out, err = self._run("--round", "1", "--force")
+        self.assertNotIn("Sin cambios", out)
+        self.assertEqual(GrandPrix.objects.get(round=1).result_p1.code, "NOR")
+
+    def test_full_classification_is_stored(self):
+        self._run("--round", "1")
+        rows = GrandPrix.objects.get(round=1).classification.order_by("position")
+        self.assertEqual([r.driver.code for r in rows], CLASSIFICATION)
+        self.assertEqual(rows.get(driver__code="SAI").classified_position, 0)
+
+    def test_offline_rescores_from_cache(self):
+        self._run("--round", "1")
+        # Lost scores, e.g. a restore: unstamped picks are rescored.
+        Prediction.objects.update(score=None, scored_version="")
+        self.server.payloads.clear()
+
+        out, err = self._run("--round", "1", "--force", "--offline")
+        self.assertEqual(err, "")
+        self.assertEqual(self.server.hits, {"/2026/1/results/": 1})
+        self.assertEqual(Prediction.objects.get(event__round=1).score, 80 + 16 + 2)
+
+    def test_offline_without_cached_response(self):
+        out, err = self._run("--round", "1", "--offline")
+        self.assertIn("sin respuesta en cache", err)
+        self.assertEqual(self.server.hits, {})
+
+
+class RateLimiterTests(SimpleTestCase):
+    def test_spaces_calls_across_threads(self):
+        limiter = RateLimiter(rate=50)
+        started = time.monotonic()
+        threads = [threading.Thread(target=limiter.wait) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # The first call goes straight through, the other five wait 20 ms each.
+        self.assertGreaterEqual(time.monotonic() - started, 5 / 50)
@@ -0,0 +1,188 @@
+"""Tests for the streaming archive reader and the import_archive command."""
+import io
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from predictions.archive import iter_races
+from predictions.management.commands.import_archive import Command as ImportCommand
+from predictions.models import Driver, GrandPrix, Prediction, Session, Team
+
+
+User = get_user_model()
+
+CLASSIFICATION = ["VER", "NOR", "LEC", "PIA", "RUS", "ALO", "SAI"]
+
+
+def archive_race(season, round_num, codes=CLASSIFICATION, dnf=(), sprint=False):
+    race = {
+        "season": str(season),
+        "round": str(round_num),
+        "raceName": f"Test Grand Prix {round_num}",
+        "Circuit": {"circuitId": f"c{round_num}", "Location": {"locality": "Town", "country": "Country"}},
+        "date": f"{season}-05-{round_num + 10:02d}",
+        "time": "13:00:00Z",
+        "FirstPractice": {"date": f"{season}-05-{round_num + 8:02d}", "time": "11:30:00Z"},
+        "Qualifying": {"date": f"{season}-05-{round_num + 9:02d}", "time": "15:00:00Z"},
+        "Results": [
+            {
+                "position": str(pos),
+                "Driver": {"driverId": code.lower(), "code": code, "givenName": "Piloto", "familyName": code},
+                "status": "Retired" if code in dnf else "Finished",
+            }
+            for pos, code in enumerate(codes, start=1)
+        ],
+    }
+    if sprint:
+        race["Sprint"] = {"date": race["FirstPractice"]["date"], "time": "16:00:00Z"}
+    return race
+
+
+def season_dump(races):
+    return {"MRData": {"series": "f1", "RaceTable": {"season": races[0]["season"], "Races": races}}}
+
+
+class IterRacesTests(SimpleTestCase):
+    def test_streams_every_race_across_chunks_and_documents(self):
+        text = "\n".join(
+            json.dumps(season_dump([archive_race(season, r) for r in range(1, 4)]), indent=2)
+            for season in (2021, 2022)
+        )
+        races = list(iter_races(io.StringIO(text), read_size=7))
+        self.assertEqual([(r["season"], r["round"]) for r in races][:4], [
+            ("2021", "1"), ("2021", "2"), ("2021", "3"), ("2022", "1"),
+        ])
+        self.assertEqual(len(races), 6)
+        self.assertEqual(races[5], archive_race(2022, 3))
+
+    def test_truncated_archive_raises(self):
+        text = json.dumps(season_dump([archive_race(2021, 1), archive_race(2021, 2)]))
+        stream = io.StringIO(text[:-200])
+        with self.assertRaises(ValueError):
+            list(iter_races(stream, read_size=64))
+
+
+class ImportArchiveCommandTests(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.checkpoint = self.tmp / "checkpoint.json"
+        team = Team.objects.create(name="Aston Martin", slug="aston-martin")
+        Driver.objects.create(code="ALO", name="Fernando Alonso", team=team)
+
+    def write_archive(self, races, name="archive.json"):
+        path = self.tmp / name
+        path.write_text(json.dumps(season_dump(races)))
+        return path
+
+    def run_import(self, path, **options):
+        out = StringIO()
+        call_command("import_archive", str(path), checkpoint=str(self.checkpoint), stdout=out, **options)
+        return out.getvalue()
+
+    def test_imports_calendar_sessions_and_results(self):
+        path = self.write_archive([archive_race(2021, 1, dnf={"SAI"}), archive_race(2021, 2, sprint=True)])
+        self.run_import(path, batch_size=1)
+
+        gp = GrandPrix.objects.get(season_year=2021, round=1)
+        self.assertEqual((gp.slug, gp.country, gp.circuit), ("test-grand-prix-1-2021", "Country", "Town"))
+        self.assertEqual(
+            [gp.result_p1.code, gp.result_p5.code, gp.result_alonso_pos, gp.result_sainz_pos],
+            ["VER", "RUS", 6, 0],
+        )
+        self.assertIsNotNone(gp.deadline_utc)
+        self.assertEqual(gp.race_start_utc.isoformat(), "2021-05-11T13:00:00+00:00")
+        sessions = GrandPrix.objects.get(round=2).sessions.values_list("session_type", flat=True)
+        self.assertEqual(list(sessions), ["FP1", "SPRINT", "QUALI", "RACE"])
+
+        # Missing drivers are added as inactive; existing ones keep their data.
+        self.assertFalse(Driver.objects.get(code="VER").active)
+        self.assertEqual(Driver.objects.get(code="ALO").name, "Fernando Alonso")
+
+    def test_finished_file_is_skipped_until_restart(self):
+        path = self.write_archive([archive_race(2021, 1)])
+        self.run_import(path)
+        self.assertIn("ya importado", self.run_import(path))
+        out = self.run_import(path, restart=True)
+        self.assertIn("Events: 0 nuevos, 0 actualizados, 1 sin cambios", out)
+        self.assertEqual(Session.objects.count(), 3)
+
+    def test_resumes_after_interruption(self):
+        path = self.write_archive([archive_race(2021, r) for r in range(1, 6)])
+        original = ImportCommand._import_batch
+        calls = []
+
+        def flaky(command, races):
+            calls.append(len(races))
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return original(command, races)
+
+        with patch.object(ImportCommand, "_import_batch", flaky), self.assertRaises(KeyboardInterrupt):
+            self.run_import(path, batch_size=2)
+        # The first batch is committed; the interrupted one rolled back.
+        self.assertEqual(GrandPrix.objects.count(), 2)
+
+        with patch.object(ImportCommand, "_import_batch", side_effect=original, autospec=True) as resumed:
+            out = self.run_import(path, batch_size=2)
+        self.assertIn("reanudando tras 2 carreras", out)
+        self.assertEqual([len(call.args[1]) for call in resumed.call_args_list], [2, 1])
+        self.assertEqual(GrandPrix.objects.count(), 5)
+
+    def test_existing_gp_is_updated_and_rescored(self):
+        drivers = {code: Driver.objects.get_or_create(code=code, defaults={"name": code})[0] for code in CLASSIFICATION}
+        gp = GrandPrix.objects.create(season_year=2026, round=1, name="Australian Grand Prix", slug="australia-gp")
+        user = User.objects.create_user(username="ana", password="testpass")
+        Prediction(
+            user=user, event=gp, alonso_pos_guess=6, sainz_pos_guess=7,
+            **{f"p{i}": drivers[code] for i, code in enumerate(CLASSIFICATION[:5], start=1)},
+        ).save(skip_lock_check=True)
+
+        self.run_import(self.write_archive([archive_race(2026, 1)]))
+        self.assertEqual(GrandPrix.objects.filter(season_year=2026).count(), 1)
+        gp.refresh_from_db()
+        self.assertTrue(gp.has_results)
+        self.assertGreater(Prediction.objects.get(user=user).score, 0)
+
+    def test_archived_seasons_stay_out_of_current_season_totals(self):
+        drivers = {code: Driver.objects.get_or_create(code=code, defaults={"name": code})[0] for code in CLASSIFICATION}
+        picks = {f"p{i}": drivers[code] for i, code in enumerate(CLASSIFICATION[:5], start=1)}
+        user = User.objects.create_user(username="ana", password="testpass")
+        current = GrandPrix.objects.create(season_year=2026, round=1, name="GP 2026", slug="gp-2026")
+        Prediction(user=user, event=current, alonso_pos_guess=6, sainz_pos_guess=0, score=10, **picks).save(
+            skip_lock_check=True
+        )
+        self.run_import(self.write_archive([archive_race(2021, r) for r in range(1, 4)]))
+        # A pick on an archived GP, e.g. from an older copy of the game.
+        Prediction(
+            user=user, event=GrandPrix.objects.get(season_year=2021, round=1),
+            alonso_pos_guess=6, sainz_pos_guess=0, score=50, **picks,
+        ).save(skip_lock_check=True)
+        cache.clear()
+
+        self.client.force_login(user)
+        dashboard = self.client.get(reverse("predictions:dashboard")).context
+        self.assertEqual(
+            [dashboard[k] for k in ("total_races", "total_picks", "missing_picks", "total_points")], [1, 1, 0, 10]
+        )
+        self.assertEqual(self.client.get(reverse("predictions:leaderboard")).context["total_races"], 1)
+
+    def test_invalid_archive_reports_progress(self):
+        path = self.tmp / "broken.json"
+        path.write_text(json.dumps(season_dump([archive_race(2021, 1), {"season": "2021"}])))
+        with self.assertRaisesMessage(CommandError, "tras 0 carreras"):
+            self.run_import(path)
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            self.run_import(self.tmp / "nope.json")
@@ -0,0 +1,81 @@
+"""Tests for the database job queue and the run_worker command."""
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from predictions import jobs
+from predictions.models import JOB_BACKOFF, Job
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        patcher = patch.dict(jobs.HANDLERS, {"record": self.record, "explode": self.explode})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, value):
+        self.calls.append(value)
+        return f"ok {value}"
+
+    def explode(self):
+        raise jobs.JobError("API caida")
+
+    def test_enqueue_reuses_a_waiting_job(self):
+        first = jobs.enqueue("record", value=1)
+        self.assertEqual(jobs.enqueue("record", value=1), first)
+        self.assertNotEqual(jobs.enqueue("record", value=2), first)
+        with self.assertRaises(ValueError):
+            jobs.enqueue("nope")
+
+    def test_claim_takes_due_jobs_in_order(self):
+        later = Job.objects.create(kind="record", args={"value": 2}, run_after=timezone.now() + timedelta(hours=1))
+        first = jobs.enqueue("record", value=1)
+
+        job = Job.objects.claim("w1")
+        self.assertEqual(job, first)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.RUNNING, 1, "w1"))
+        # Running and future jobs are not handed out again.
+        self.assertIsNone(Job.objects.claim("w2"))
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+
+    def test_stale_running_job_is_reclaimed(self):
+        Job.objects.create(
+            kind="record", args={"value": 1}, status=Job.RUNNING, attempts=1,
+            locked_by="dead", locked_at=timezone.now() - timedelta(hours=1),
+        )
+        job = Job.objects.claim("w2")
+        self.assertEqual((job.locked_by, job.attempts), ("w2", 2))
+
+    def test_failure_backs_off_then_gives_up(self):
+        job = Job.objects.create(kind="explode", max_attempts=2)
+        before = timezone.now()
+        self.assertFalse(jobs.run_job(Job.objects.claim("w")))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (Job.QUEUED, "API caida"))
+        self.assertGreaterEqual(job.run_after, before + JOB_BACKOFF)
+
+        Job.objects.update(run_after=timezone.now())
+        jobs.run_job(Job.objects.claim("w"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_worker_drains_the_queue(self):
+        for value in (1, 2, 3):
+            jobs.enqueue("record", value=value)
+        Job.objects.create(kind="unknown")
+        out, err = StringIO(), StringIO()
+        call_command("run_worker", once=True, stdout=out, stderr=err)
+
+        self.assertEqual(sorted(self.calls), [1, 2, 3])
+        self.assertIn("3 trabajo(s) completados, 1 con error", out.getvalue())
+        self.assertEqual(Job.objects.get(kind="unknown").status, Job.FAILED)
+        self.assertEqual(
+            set(Job.objects.filter(kind="record").values_list("result", flat=True)), {"ok 1", "ok 2", "ok 3"}
+        )
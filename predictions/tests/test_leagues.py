@@ -0,0 +1,132 @@
+"""Tests for private leagues and their precomputed standings."""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from predictions.models import (
+    Driver, GrandPrix, League, LeagueMembership, LeagueStanding, Prediction, Session, Team,
+)
+from predictions.pagination import encode_cursor
+from predictions.scoring import score_grand_prix
+
+
+User = get_user_model()
+
+
+class LeagueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team)
+            for i in range(1, 7)
+        ]
+        self.gp = GrandPrix.objects.create(
+            season_year=2026, round=1, name="League GP", slug="league-gp",
+            result_p1=self.drivers[0], result_p2=self.drivers[1], result_p3=self.drivers[2],
+            result_p4=self.drivers[3], result_p5=self.drivers[4],
+            result_alonso_pos=3, result_sainz_pos=0,
+        )
+        Session.objects.create(
+            event=self.gp, session_type="QUALI", start_utc=timezone.now() - timedelta(hours=2), order=4
+        )
+        Session.objects.create(
+            event=self.gp, session_type="RACE", start_utc=timezone.now() + timedelta(days=1), order=5
+        )
+        self.ana = self._predict("ana", self.drivers[1:6])
+        self.bea = self._predict("bea", self.drivers[:5])
+        self.outsider = self._predict("outsider", self.drivers[:5])
+
+        self.league = League.objects.create(name="Oficina", created_by=self.ana)
+        LeagueMembership.objects.create(league=self.league, user=self.ana)
+        LeagueMembership.objects.create(league=self.league, user=self.bea)
+
+    def _predict(self, username, top5):
+        user = User.objects.create_user(username=username, password="testpass")
+        Prediction(
+            user=user, event=self.gp, alonso_pos_guess=3, sainz_pos_guess=0,
+            **{f"p{i}": driver for i, driver in enumerate(top5, start=1)},
+        ).save(skip_lock_check=True)
+        return user
+
+    def _league_ranks(self):
+        return dict(
+            LeagueStanding.objects.filter(league=self.league, season=2026)
+            .values_list("user__username", "rank")
+        )
+
+    def test_joining_copies_season_standing(self):
+        self.assertEqual(self._league_ranks(), {"ana": 1, "bea": 2})
+
+    def test_scoring_reranks_league_members_only(self):
+        score_grand_prix(self.gp)
+        self.assertEqual(self._league_ranks(), {"bea": 1, "ana": 2})
+        bea = LeagueStanding.objects.get(league=self.league, user=self.bea)
+        self.assertEqual(bea.total, Prediction.objects.get(user=self.bea).score)
+
+    def test_leaving_drops_standing(self):
+        LeagueMembership.objects.get(league=self.league, user=self.bea).delete()
+        self.assertEqual(self._league_ranks(), {"ana": 1})
+
+    def test_join_by_code(self):
+        self.client.force_login(self.outsider)
+        response = self.client.post(reverse("predictions:league_join"), {"code": self.league.join_code.lower()})
+        self.assertRedirects(response, reverse("predictions:league_leaderboard", args=[self.league.slug]))
+        self.assertIn("outsider", self._league_ranks())
+
+    def test_pages_are_members_only(self):
+        self.client.force_login(self.outsider)
+        for url in (
+            reverse("predictions:league_leaderboard", args=[self.league.slug]),
+            reverse("predictions:league_porras", args=[self.league.slug]),
+            reverse("predictions:league_race_detail", args=[self.league.slug, self.gp.slug]),
+        ):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_malformed_cursors_start_from_the_top(self):
+        score_grand_prix(self.gp)
+        self.client.force_login(self.ana)
+        for url in (
+            reverse("predictions:league_leaderboard", args=[self.league.slug]),
+            reverse("predictions:league_porras", args=[self.league.slug]),
+            reverse("predictions:league_race_detail", args=[self.league.slug, self.gp.slug]),
+        ):
+            for cursor in (["s", 1], ["x", 1], [1, "ayer", 2], [None]):
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, {"desde": encode_cursor(cursor)})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(response.context["is_first_page"])
+
+    def test_league_leaderboard_reads_league_standings(self):
+        score_grand_prix(self.gp)
+        self.client.force_login(self.ana)
+        url = reverse("predictions:league_leaderboard", args=[self.league.slug])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        usernames = [row["username"] for row in response.context["users_data"]]
+        self.assertEqual(usernames, ["bea", "ana"])
+        self.assertEqual(response.context["active_players"], 2)
+        self.assertFalse(any("predictions_seasonstanding" in q["sql"] for q in queries.captured_queries))
+
+    def test_league_race_detail_ranks_within_league(self):
+        score_grand_prix(self.gp)
+        self.client.force_login(self.ana)
+        response = self.client.get(reverse("predictions:league_race_detail", args=[self.league.slug, self.gp.slug]))
+        picks = response.context["picks"]
+        self.assertEqual([(p.user.username, p.league_rank) for p in picks], [("bea", 1), ("ana", 2)])
+        self.assertEqual(response.context["my_pick"].league_rank, 2)
+
+    def test_league_porras_lists_members(self):
+        self.client.force_login(self.ana)
+        response = self.client.get(reverse("predictions:league_porras", args=[self.league.slug]))
+        self.assertEqual([p.user.username for p in response.context["picks"]], ["ana", "bea"])
+
+    def test_reserved_slug_is_skipped(self):
+        league = League.objects.create(name="Nueva", created_by=self.ana)
+        self.assertEqual(league.slug, "nueva-2")
@@ -0,0 +1,113 @@
+"""Tests for the live score stream and its brokers."""
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from predictions.live import SUBSCRIBER_QUEUE_SIZE, DatabaseBroker, LocalBroker, get_broker
+from predictions.models import Driver, GrandPrix, LiveEvent, Prediction, Team
+from predictions.scoring import score_grand_prix
+
+
+User = get_user_model()
+
+LOCAL_BROKER = "predictions.live.LocalBroker"
+
+
+class LocalBrokerTests(SimpleTestCase):
+    async def test_publish_from_another_thread_reaches_every_subscriber(self):
+        broker = LocalBroker()
+        first, second = broker.subscribe(), broker.subscribe()
+        thread = threading.Thread(target=broker.publish, args=({"type": "scores", "gp": "x"},))
+        thread.start()
+        thread.join()
+        self.assertEqual((await asyncio.wait_for(first.get(), 1))["gp"], "x")
+        self.assertEqual((await asyncio.wait_for(second.get(), 1))["gp"], "x")
+
+    async def test_closed_subscription_is_dropped(self):
+        broker = LocalBroker()
+        broker.subscribe().close()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_stalled_subscriber_drops_overflow(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe()
+        for i in range(SUBSCRIBER_QUEUE_SIZE + 5):
+            broker.publish({"type": "scores", "n": i})
+        await asyncio.sleep(0)
+        self.assertEqual(subscription.queue.qsize(), SUBSCRIBER_QUEUE_SIZE)
+
+
+class DatabaseBrokerTests(TestCase):
+    async def test_poll_fans_out_new_rows_once(self):
+        broker = DatabaseBroker(poll_interval=3600)
+        subscription = broker.subscribe()
+        # Let the poller record the starting point before anything is published.
+        await asyncio.sleep(0.05)
+        await sync_to_async(broker.publish)({"type": "scores", "gp": "db"})
+        loop = asyncio.get_running_loop()
+
+        await broker.poll_once(loop)
+        await broker.poll_once(loop)
+        self.assertEqual((await asyncio.wait_for(subscription.get(), 1))["gp"], "db")
+        self.assertTrue(subscription.queue.empty())
+        subscription.close()
+        broker._pollers[loop].cancel()
+
+
+class ScoringPublishTests(TestCase):
+    def test_scoring_publishes_deltas_after_commit(self):
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        drivers = [Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team) for i in range(1, 6)]
+        gp = GrandPrix.objects.create(
+            season_year=2026, round=1, name="Live GP", slug="live-gp",
+            result_p1=drivers[0], result_p2=drivers[1], result_p3=drivers[2],
+            result_p4=drivers[3], result_p5=drivers[4], result_alonso_pos=1, result_sainz_pos=0,
+        )
+        user = User.objects.create_user(username="ana", password="testpass")
+        Prediction(
+            user=user, event=gp, alonso_pos_guess=1, sainz_pos_guess=0,
+            **{f"p{i}": driver for i, driver in enumerate(drivers, start=1)},
+        ).save(skip_lock_check=True)
+
+        with patch("predictions.live.get_broker") as broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                score_grand_prix(gp)
+                broker.return_value.publish.assert_not_called()
+        event = broker.return_value.publish.call_args.args[0]
+        score = Prediction.objects.get(user=user).score
+        self.assertEqual((event["gp"], event["changed"], event["truncated"]), ("live-gp", 1, False))
+        self.assertEqual(event["deltas"], [{"username": "ana", "score": score, "total": score, "rank": 1}])
+
+    def test_default_broker_writes_outbox(self):
+        get_broker().publish({"type": "scores"})
+        self.assertEqual(LiveEvent.objects.get().payload, {"type": "scores"})
+
+
+@override_settings(LIVE_BROKER=LOCAL_BROKER)
+class LiveStreamViewTests(TestCase):
+    async def test_stream_delivers_published_event(self):
+        response = await self.async_client.get(reverse("predictions:live_events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+
+        next_chunk = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        get_broker().publish({"type": "scores", "gp": "live-gp"})
+        chunk = (await asyncio.wait_for(next_chunk, 1)).decode()
+        self.assertTrue(chunk.startswith("event: scores\ndata: "))
+        self.assertEqual(json.loads(chunk.split("data: ", 1)[1])["gp"], "live-gp")
+
+        # A client disconnect cancels the pending read, which must unsubscribe.
+        waiting = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(get_broker().subscriber_count(), 0)
@@ -0,0 +1,48 @@
+"""Tests for the full race classification and the result fields derived from it."""
+from decimal import Decimal
+
+from django.test import TestCase
+
+from predictions.models import DataVersion, Driver, GrandPrix, RaceResult, Team
+
+CODES = ["VER", "NOR", "LEC", "PIA", "RUS", "HAM", "ALO", "SAI"]
+
+
+class RaceResultTests(TestCase):
+    def setUp(self):
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = {code: Driver.objects.create(code=code, name=code, team=team) for code in CODES}
+        self.gp = GrandPrix.objects.create(season_year=2026, round=1, name="Test GP", slug="test-gp")
+
+    def classification(self, codes, dnf=()):
+        return {self.gp.pk: [
+            RaceResult(
+                gp=self.gp, driver=self.drivers[code], position=pos,
+                status="Retired" if code in dnf else "Finished", points=Decimal(max(0, 26 - pos * 2)),
+            )
+            for pos, code in enumerate(codes, start=1)
+        ]}
+
+    def test_replace_is_idempotent(self):
+        self.assertEqual(RaceResult.objects.replace(self.classification(CODES)), {self.gp.pk})
+        self.assertEqual(RaceResult.objects.replace(self.classification(CODES)), set())
+        self.assertEqual(self.gp.classification.count(), len(CODES))
+
+    def test_results_are_derived_from_the_classification(self):
+        RaceResult.objects.replace(self.classification(CODES, dnf={"SAI"}))
+        version = DataVersion.objects.current(2026)
+        changed = GrandPrix.objects.filter(pk=self.gp.pk).sync_results()
+
+        self.assertEqual(changed, [self.gp])
+        self.gp.refresh_from_db()
+        self.assertEqual([getattr(self.gp, f"result_p{i}").code for i in range(1, 6)], CODES[:5])
+        self.assertEqual((self.gp.result_alonso_pos, self.gp.result_sainz_pos), (7, 0))
+        self.assertNotEqual(DataVersion.objects.current(2026), version)
+        # Nothing to write the second time round.
+        self.assertEqual(GrandPrix.objects.filter(pk=self.gp.pk).sync_results(), [])
+
+    def test_absent_driver_counts_as_dnf(self):
+        RaceResult.objects.replace(self.classification([c for c in CODES if c != "ALO"]))
+        GrandPrix.objects.filter(pk=self.gp.pk).sync_results()
+        self.gp.refresh_from_db()
+        self.assertEqual((self.gp.result_alonso_pos, self.gp.result_sainz_pos), (0, 7))
@@ -1,10 +1,14 @@
 from datetime import timedelta
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
 from django.utils import timezone
 
 from predictions.models import Driver, GrandPrix, Prediction, Session, Team
+from predictions.scoring import score_grand_prix, score_season
 
 
 User = get_user_model()
@@ -58,3 +62,129 @@ class ScoringRulesTests(TestCase):
         self.assertEqual(breakdown["alonso"], 2)
         self.assertEqual(breakdown["sainz"], 2)
         self.assertEqual(total, 84)
+
+    def test_kernel_extra_pick_rules(self):
+        self.gp.result_alonso_pos = 4
+        self.gp.result_sainz_pos = 15
+        kernel = self.gp.scoring_kernel
+        top5 = [d.pk for d in self.drivers[:5]]
+
+        def extras(alonso, sainz):
+            _, breakdown = kernel.score(top5, alonso, sainz)
+            return breakdown["alonso"], breakdown["sainz"]
+
+        self.assertEqual(extras(4, 15), (24, 0))   # exact: double points / none outside top 10
+        self.assertEqual(extras(9, 14), (12, 0))   # both inside top 10: real points
+        self.assertEqual(extras(11, 0), (0, 0))
+        self.assertEqual(extras(0, 16), (0, 0))
+
+    def test_kernel_top5_half_points_for_wrong_slot(self):
+        kernel = self.gp.scoring_kernel
+        swapped = [self.drivers[1].pk, self.drivers[0].pk, self.drivers[5].pk,
+                   self.drivers[3].pk, self.drivers[4].pk]
+        total, breakdown = kernel.score(swapped, 0, 0)
+        self.assertEqual(
+            [breakdown[f"p{i}"] for i in range(1, 6)],
+            [18 // 2, 25 // 2, 0, 12, 10],
+        )
+        self.assertEqual(total, sum(breakdown.values()))
+
+    def test_kernel_rebuilt_when_results_change(self):
+        kernel = self.gp.scoring_kernel
+        self.assertIs(self.gp.scoring_kernel, kernel)
+        self.gp.result_alonso_pos = 1
+        self.assertIsNot(self.gp.scoring_kernel, kernel)
+
+
+class BulkScoringTests(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=self.team)
+            for i in range(1, 7)
+        ]
+        self.gp = GrandPrix.objects.create(
+            season_year=2026,
+            round=78,
+            name="Bulk GP",
+            slug="bulk-gp",
+            result_p1=self.drivers[0],
+            result_p2=self.drivers[1],
+            result_p3=self.drivers[2],
+            result_p4=self.drivers[3],
+            result_p5=self.drivers[4],
+            result_alonso_pos=3,
+            result_sainz_pos=0,
+        )
+        self.perfect = self._create_prediction("perfect", self.drivers[:5], alonso=3, sainz=0)
+        self.shuffled = self._create_prediction("shuffled", self.drivers[1:6], alonso=7, sainz=4)
+
+    def _create_prediction(self, username, top5, alonso, sainz):
+        user = User.objects.create_user(username=username, password="testpass")
+        picks = {f"p{i}": driver for i, driver in enumerate(top5, start=1)}
+        prediction = Prediction(
+            user=user, event=self.gp, alonso_pos_guess=alonso, sainz_pos_guess=sainz, **picks
+        )
+        prediction.save(skip_lock_check=True)
+        return prediction
+
+    def test_matches_calculate_score(self):
+        result = score_grand_prix(self.gp)
+
+        self.assertEqual(result.total, 2)
+        self.assertEqual(result.changed, 2)
+        for prediction in (self.perfect, self.shuffled):
+            prediction.refresh_from_db()
+            self.assertEqual(prediction.score, prediction.calculate_score())
+
+    def test_rescoring_unchanged_results_writes_nothing(self):
+        score_grand_prix(self.gp)
+        # One SELECT plus the transaction savepoint pair, no UPDATE.
+        with self.assertNumQueries(3):
+            result = score_grand_prix(self.gp)
+        self.assertEqual(result.changed, 0)
+
+    def test_only_out_of_date_picks_are_rescored(self):
+        score_grand_prix(self.gp)
+        self.assertEqual(score_grand_prix(self.gp).total, 0)
+
+        # A changed pick is rescored on its own...
+        self.shuffled.p1 = self.drivers[0]
+        self.shuffled.p2 = self.drivers[5]
+        self.shuffled.save(skip_lock_check=True)
+        result = score_grand_prix(self.gp)
+        self.assertEqual((result.total, result.changed), (1, 1))
+
+        # ...and changed results make every pick out of date.
+        self.gp.result_alonso_pos = 7
+        self.gp.save()
+        self.assertEqual(score_grand_prix(self.gp).total, 2)
+        self.perfect.refresh_from_db()
+        self.assertEqual(self.perfect.scored_version, self.gp.result_version)
+
+    def test_season_scoring_skips_current_gps(self):
+        later = GrandPrix.objects.create(season_year=2026, round=79, name="Unraced GP", slug="unraced-gp")
+        Prediction(
+            user=self.perfect.user, event=later, alonso_pos_guess=1, sainz_pos_guess=0,
+            **{f"p{i}": driver for i, driver in enumerate(self.drivers[:5], start=1)},
+        ).save(skip_lock_check=True)
+
+        self.assertEqual(score_season(2026).total, 2)
+        # Nothing changed since: a single read, and unraced picks stay unscored.
+        with self.assertNumQueries(1):
+            self.assertEqual(score_season(2026).total, 0)
+        self.assertIsNone(Prediction.objects.get(event=later).score)
+
+    def test_admin_action_queues_batch_scorer(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "testpass")
+        self.client.force_login(admin_user)
+        self.client.post(
+            reverse("admin:predictions_grandprix_changelist"),
+            {"action": "calculate_scores", "_selected_action": [self.gp.pk]},
+        )
+        self.perfect.refresh_from_db()
+        self.assertIsNone(self.perfect.score)
+
+        call_command("run_worker", once=True, stdout=StringIO())
+        self.perfect.refresh_from_db()
+        self.assertEqual(self.perfect.score, self.perfect.calculate_score())
@@ -1,14 +1,20 @@
 """Tests for seed_2026 management command and model logic."""
+import json
+import tempfile
 from datetime import datetime, time, timedelta, timezone as dt_timezone
 from io import StringIO
+from pathlib import Path
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from predictions.models import Team, Driver, GrandPrix, Session, Prediction
+from predictions.models import Team, Driver, GrandPrix, Session, Prediction, compute_deadline
 
 
 User = get_user_model()
@@ -69,6 +75,66 @@ class SeedCommandTests(TestCase):
         self.assertTrue(alo.active)
 
 
+class SeedBulkUpsertTests(TestCase):
+    """seed_2026 writes in bulk and only touches what changed."""
+
+    def _seed(self, *args):
+        out = StringIO()
+        call_command("seed_2026", *args, stdout=out)
+        return out.getvalue()
+
+    def _calendar(self, events):
+        path = Path(self.tmp.name) / f"calendar-{len(list(Path(self.tmp.name).iterdir()))}.json"
+        path.write_text(json.dumps(events))
+        return str(path)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_reports_counts(self):
+        output = self._seed()
+        self.assertIn("Teams: 11 nuevos, 0 actualizados, 0 sin cambios", output)
+        self.assertIn("Events: 24 nuevos", output)
+
+        output = self._seed()
+        self.assertIn("Drivers: 0 nuevos, 0 actualizados, 22 sin cambios", output)
+        self.assertIn("Sessions: 0 nuevos, 0 actualizados", output)
+
+    def test_rerun_query_count_is_constant(self):
+        self._seed()
+        with CaptureQueriesContext(connection) as queries:
+            self._seed()
+        # One read per table, the GP id map and the transaction savepoint pair.
+        self.assertLessEqual(len(queries), 8)
+
+    def test_multiple_calendars_and_updates(self):
+        self._seed()
+        gp = GrandPrix.objects.get(round=1)
+        start = gp.sessions.get(session_type="FP1").start_utc
+        moved = self._calendar([{
+            "season_year": 2026, "round": 1, "name": "Renamed GP", "slug": gp.slug,
+            "sessions": [{"type": "FP1", "start_utc": (start + timedelta(days=7)).isoformat(), "order": 1}],
+        }])
+        future = self._calendar([{
+            "season_year": 2027, "round": 1, "name": "GP 2027", "slug": "gp-2027",
+            "sessions": [{"type": "FP1", "start_utc": "2027-03-05T01:30:00Z", "order": 1}],
+        }])
+
+        output = self._seed(moved, future)
+        self.assertIn("Events: 1 nuevos, 1 actualizados, 0 sin cambios", output)
+        self.assertIn("Sessions: 1 nuevos, 1 actualizados, 0 sin cambios", output)
+        gp.refresh_from_db()
+        self.assertEqual(gp.name, "Renamed GP")
+        # The denormalized deadline followed the moved session.
+        self.assertEqual(gp.deadline_utc, compute_deadline(gp.quali_start_utc, start + timedelta(days=7)))
+        self.assertIsNotNone(GrandPrix.objects.get(slug="gp-2027").deadline_utc)
+
+    def test_missing_calendar_fails(self):
+        with self.assertRaises(CommandError):
+            self._seed("--season", "1999")
+
+
 class DeadlineValidationTests(TestCase):
     """Test prediction deadline validation."""
 
@@ -0,0 +1,140 @@
+"""Tests for the Monte Carlo season forecast."""
+import unittest
+from dataclasses import replace
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from predictions.models import Driver, GrandPrix, Prediction, Team, invalidate_driver_roster
+from predictions.scoring import score_grand_prix
+from predictions.simulation import (
+    MAX_ROUND_POINTS, SIMULATION_AVAILABLE, SimulationInputs, fit_strengths, load_inputs,
+    run_simulation, simulate_season,
+)
+
+if SIMULATION_AVAILABLE:
+    import numpy as np
+
+
+User = get_user_model()
+
+needs_numpy = unittest.skipUnless(SIMULATION_AVAILABLE, "NumPy is not installed")
+
+
+def inputs(totals, rounds):
+    players = len(totals)
+    return SimulationInputs(
+        usernames=tuple(f"p{i}" for i in range(players)),
+        ranks=tuple(range(1, players + 1)),
+        totals=np.array(totals, dtype=np.int16),
+        sharpness=np.full(players, 1.0),
+        picks=np.full((players, rounds, 7), -1, dtype=np.int16),
+        default_guesses=np.zeros((players, 2), dtype=np.int16),
+        log_strength=np.zeros(8),
+        dnf_rate=0.1,
+        alonso=0,
+        sainz=1,
+    )
+
+
+@needs_numpy
+class SimulationEngineTests(SimpleTestCase):
+    def test_fit_ranks_the_usual_winner_first(self):
+        finishes = np.array([[2, 0, 1, 3, 4]] * 6 + [[0, 2, 1, -1, 3]] * 2)
+        strength = fit_strengths(finishes, np.ones(len(finishes)), 6)
+        self.assertEqual(list(np.argsort(-strength)[:3]), [2, 0, 1])
+        # Drivers never in a top five still keep some chance.
+        self.assertTrue(np.isfinite(strength[5]))
+
+    def test_finished_season_is_decided_by_the_standings(self):
+        outcome = run_simulation(inputs([50, 50, 10, 5], rounds=0), 100, np.random.default_rng(0))
+        self.assertEqual(list(outcome["win"]), [0.5, 0.5, 0.0, 0.0])
+        self.assertEqual(list(outcome["podium"]), [1.0, 1.0, 1.0, 0.0])
+        self.assertEqual(list(outcome["expected"]), [50, 50, 10, 5])
+
+    def test_probabilities_are_consistent(self):
+        outcome = run_simulation(
+            inputs([100, 90, 80, 0, 0], rounds=3), 1000, np.random.default_rng(1), chunk_cells=640
+        )
+        self.assertAlmostEqual(outcome["win"].sum(), 1.0)
+        self.assertGreaterEqual(outcome["podium"].sum(), 3.0)
+        self.assertTrue((outcome["expected"] >= [100, 90, 80, 0, 0]).all())
+        self.assertGreater(outcome["win"][0], outcome["win"][3])
+
+    def test_missing_picks_give_stable_probabilities_across_seeds(self):
+        # Equal players with no picks sent: only a draw per simulation evens them out.
+        unsent = replace(inputs([0] * 4, rounds=2), log_strength=np.linspace(2, 0, 8))
+        wins = np.array([
+            run_simulation(unsent, 2000, np.random.default_rng(seed))["win"] for seed in range(5)
+        ])
+        self.assertLess((wins.max(axis=0) - wins.min(axis=0)).max(), 0.06)
+        np.testing.assert_allclose(wins.mean(axis=0), 0.25, atol=0.03)
+
+    def test_out_of_reach_player_never_wins(self):
+        outcome = run_simulation(
+            inputs([MAX_ROUND_POINTS + 1, 0], rounds=1), 500, np.random.default_rng(2)
+        )
+        self.assertEqual(outcome["win"][1], 0.0)
+
+
+@needs_numpy
+class SimulateSeasonTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        codes = ["VER", "NOR", "LEC", "PIA", "RUS", "ALO", "SAI"]
+        self.drivers = [Driver.objects.create(code=code, name=code, team=team) for code in codes]
+        invalidate_driver_roster()
+        self.raced = GrandPrix.objects.create(
+            season_year=2026, round=1, name="Raced GP", slug="raced-gp",
+            **{f"result_p{i}": driver for i, driver in enumerate(self.drivers[:5], start=1)},
+            result_alonso_pos=6, result_sainz_pos=0,
+        )
+        self.next_gp = GrandPrix.objects.create(season_year=2026, round=2, name="Next GP", slug="next-gp")
+        self.users = [User.objects.create_user(username=name, password="testpass") for name in ("ana", "bea", "carl")]
+        for user, top5 in zip(self.users, (self.drivers[:5], self.drivers[1:6], self.drivers[2:7])):
+            self.predict(user, self.raced, top5)
+        self.predict(self.users[2], self.next_gp, self.drivers[2:7], alonso=4)
+        score_grand_prix(self.raced)
+
+    def predict(self, user, gp, top5, alonso=6):
+        Prediction(
+            user=user, event=gp, alonso_pos_guess=alonso, sainz_pos_guess=0,
+            **{f"p{i}": driver for i, driver in enumerate(top5, start=1)},
+        ).save(skip_lock_check=True)
+
+    def test_load_inputs_keeps_sent_picks(self):
+        data = load_inputs(2026)
+        self.assertEqual(data.usernames, ("ana", "bea", "carl"))
+        self.assertEqual(data.rounds, 1)
+        carl = data.usernames.index("carl")
+        # Roster indexes follow Driver's name ordering: ALO LEC NOR PIA RUS SAI VER.
+        self.assertEqual(data.picks[carl, 0].tolist(), [1, 3, 4, 0, 5, 4, 0])
+        self.assertTrue((data.picks[:carl, 0] == -1).all())
+        # ana's perfect top five makes her picks sharper than carl's.
+        self.assertGreater(data.sharpness[0], data.sharpness[carl])
+
+    def test_forecast_covers_every_player(self):
+        forecast = simulate_season(2026, runs=500, seed=1)
+        self.assertEqual(forecast.remaining_rounds, 1)
+        self.assertEqual({p.username for p in forecast.players}, {"ana", "bea", "carl"})
+        self.assertAlmostEqual(sum(p.win for p in forecast.players), 1.0)
+        self.assertEqual(forecast.players[0].username, "ana")
+        self.assertTrue(all(p.alive for p in forecast.players))
+
+    def test_page_is_cached_per_data_version(self):
+        url = reverse("predictions:forecast")
+        response = self.client.get(url)
+        self.assertContains(response, "ana")
+        with self.assertNumQueries(1):  # the data version
+            self.client.get(url)
+
+    def test_command_prints_probabilities(self):
+        out = StringIO()
+        call_command("simulate_season", runs=200, seed=3, stdout=out)
+        self.assertIn("1 carrera(s) por disputar, 3 jugador(es)", out.getvalue())
+        self.assertIn("gana", out.getvalue())
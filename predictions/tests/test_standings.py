@@ -0,0 +1,157 @@
+"""Tests for the materialized season standings."""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from predictions.models import Driver, GrandPrix, Prediction, SeasonStanding, Team
+from predictions.pagination import encode_cursor
+from predictions.scoring import score_grand_prix
+
+
+User = get_user_model()
+
+
+class StandingsTestCase(TestCase):
+    """Three players on one scored GP plus a registered user with no pick."""
+
+    def setUp(self):
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team)
+            for i in range(1, 7)
+        ]
+        self.gp = GrandPrix.objects.create(
+            season_year=2026,
+            round=1,
+            name="Standings GP",
+            slug="standings-gp",
+            result_p1=self.drivers[0],
+            result_p2=self.drivers[1],
+            result_p3=self.drivers[2],
+            result_p4=self.drivers[3],
+            result_p5=self.drivers[4],
+            result_alonso_pos=3,
+            result_sainz_pos=0,
+        )
+        self.early = self._predict("early", self.drivers[1:6])
+        self.winner = self._predict("winner", self.drivers[:5])
+        self.late = self._predict("late", self.drivers[1:6])
+        self.idle = User.objects.create_user(username="idle", password="testpass")
+
+    def _predict(self, username, top5):
+        user = User.objects.create_user(username=username, password="testpass")
+        picks = {f"p{i}": driver for i, driver in enumerate(top5, start=1)}
+        Prediction(user=user, event=self.gp, alonso_pos_guess=3, sainz_pos_guess=0, **picks).save(
+            skip_lock_check=True
+        )
+        return user
+
+
+class SeasonStandingTests(StandingsTestCase):
+    def test_new_prediction_creates_standing(self):
+        standing = SeasonStanding.objects.get(user=self.early, season=2026)
+        self.assertEqual(standing.picks, 1)
+        self.assertEqual(standing.total, 0)
+
+    def test_scoring_updates_totals_and_ranks(self):
+        score_grand_prix(self.gp)
+        ranked = list(
+            SeasonStanding.objects.filter(season=2026).order_by("rank").values_list("user__username", flat=True)
+        )
+        # Ties on total are broken by the earliest first pick.
+        self.assertEqual(ranked, ["winner", "early", "late"])
+        winner = SeasonStanding.objects.get(user=self.winner)
+        self.assertEqual(winner.total, Prediction.objects.get(user=self.winner).score)
+
+    def test_leaderboard_reads_standings(self):
+        score_grand_prix(self.gp)
+        response = self.client.get(reverse("predictions:leaderboard"))
+        usernames = [row["username"] for row in response.context["users_data"]]
+        self.assertEqual(usernames, ["winner", "early", "late", "idle"])
+        self.assertEqual(response.context["active_players"], 3)
+
+    def test_rebuild_command_fixes_drift(self):
+        score_grand_prix(self.gp)
+        SeasonStanding.objects.filter(user=self.late).update(total=999)
+        out = StringIO()
+        call_command("rebuild_standings", "--check", stdout=out)
+        self.assertIn("1 jugador(es) desincronizados", out.getvalue())
+
+        call_command("rebuild_standings", stdout=StringIO())
+        late = SeasonStanding.objects.get(user=self.late)
+        self.assertEqual(late.total, Prediction.objects.get(user=self.late).score)
+        self.assertEqual(late.rank, 3)
+
+    def test_exact_ties_share_a_rank(self):
+        score_grand_prix(self.gp)
+        SeasonStanding.objects.filter(user__in=[self.early, self.late]).update(first_pick=timezone.now())
+        SeasonStanding.objects.rerank(2026)
+        ranks = dict(SeasonStanding.objects.values_list("user__username", "rank"))
+        self.assertEqual(ranks, {"winner": 1, "early": 2, "late": 2})
+
+
+class LeaderboardPaginationTests(StandingsTestCase):
+    def _usernames(self, url):
+        response = self.client.get(url)
+        return [row["username"] for row in response.context["users_data"]], response.context["next_cursor"]
+
+    def test_keyset_pages_continue_into_idle_players(self):
+        score_grand_prix(self.gp)
+        url = reverse("predictions:leaderboard")
+        with mock.patch("predictions.views.LEADERBOARD_PAGE_SIZE", 2):
+            first, cursor = self._usernames(url)
+            second, last = self._usernames(f"{url}?desde={cursor}")
+        self.assertEqual(first, ["winner", "early"])
+        self.assertEqual(second, ["late", "idle"])
+        self.assertEqual(last, "")
+
+    def test_page_ending_on_last_standing_links_to_idle_players(self):
+        score_grand_prix(self.gp)
+        url = reverse("predictions:leaderboard")
+        with mock.patch("predictions.views.LEADERBOARD_PAGE_SIZE", 3):
+            first, cursor = self._usernames(url)
+            second, _ = self._usernames(f"{url}?desde={cursor}")
+        self.assertEqual(first, ["winner", "early", "late"])
+        self.assertEqual(second, ["idle"])
+
+    def test_page_query_count_does_not_grow_with_players(self):
+        score_grand_prix(self.gp)
+        url = reverse("predictions:leaderboard")
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            # Data version + one page of standings; the summary is cached.
+            with mock.patch("predictions.views.LEADERBOARD_PAGE_SIZE", 1):
+                self.client.get(url)
+
+    def test_around_me_window(self):
+        score_grand_prix(self.gp)
+        self.client.force_login(self.late)
+        with mock.patch("predictions.views.AROUND_ME_RADIUS", 1):
+            usernames, _ = self._usernames(reverse("predictions:leaderboard") + "?mi_posicion=1")
+        self.assertEqual(usernames, ["early", "late"])
+
+    def test_around_me_without_standing_falls_back_to_first_page(self):
+        score_grand_prix(self.gp)
+        self.client.force_login(self.idle)
+        response = self.client.get(reverse("predictions:leaderboard") + "?mi_posicion=1")
+        self.assertFalse(response.context["around_me"])
+        self.assertEqual(response.context["users_data"][0]["username"], "winner")
+
+    def test_mangled_cursor_starts_from_the_top(self):
+        score_grand_prix(self.gp)
+        usernames, _ = self._usernames(reverse("predictions:leaderboard") + "?desde=%%%")
+        self.assertEqual(usernames, ["winner", "early", "late", "idle"])
+
+    def test_malformed_cursor_values_start_from_the_top(self):
+        score_grand_prix(self.gp)
+        url = reverse("predictions:leaderboard")
+        for cursor in [["s", 1], ["s", "x", "y"], ["s", None, "early"], ["u", 1, 2], ["u", ["a"]], [1], ["x", 1, "a"]]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {"desde": encode_cursor(cursor)})
+                self.assertTrue(response.context["is_first_page"])
+                self.assertEqual(response.context["users_data"][0]["username"], "winner")
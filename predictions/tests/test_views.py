@@ -0,0 +1,493 @@
+"""Tests for view query cost, the denormalized GP schedule and ticket attendance."""
+import threading
+from contextlib import nullcontext
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from predictions.models import Driver, GrandPrix, Prediction, Session, Team, Ticket, TicketAttendee
+from predictions.pagination import encode_cursor
+from predictions.scoring import score_grand_prix
+
+
+User = get_user_model()
+
+
+def create_season(first_round, count):
+    """Create `count` GPs with a full weekend of sessions each."""
+    base = timezone.now() + timedelta(days=30)
+    for rnd in range(first_round, first_round + count):
+        gp = GrandPrix.objects.create(
+            season_year=2026,
+            round=rnd,
+            name=f"GP {rnd}",
+            slug=f"gp-{rnd}",
+        )
+        start = base + timedelta(weeks=rnd)
+        Session.objects.bulk_create([
+            Session(event=gp, session_type="FP1", start_utc=start, order=1),
+            Session(event=gp, session_type="QUALI", start_utc=start + timedelta(days=1), order=4),
+            Session(event=gp, session_type="RACE", start_utc=start + timedelta(days=2), order=5),
+        ])
+        # bulk_create skips Session.save(), so sync the schedule columns here.
+        gp.sync_schedule()
+
+
+class RacesQueryCountTests(TestCase):
+    """The races page must not run per-GP queries."""
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_races_query_count_is_constant_anonymous(self):
+        url = reverse("predictions:races")
+        create_season(1, 24)
+        small = self._count_queries(url)
+        create_season(25, 216)
+        large = self._count_queries(url)
+        self.assertEqual(small, large)
+        # Data version + a single query over the denormalized schedule columns
+        self.assertEqual(large, 2)
+
+    def test_races_query_count_is_constant_logged_in(self):
+        user = User.objects.create_user(username="racer", password="testpass")
+        self.client.force_login(user)
+        url = reverse("predictions:races")
+        create_season(1, 24)
+        small = self._count_queries(url)
+        create_season(25, 216)
+        large = self._count_queries(url)
+        self.assertEqual(small, large)
+
+    def test_session_accessors_use_prefetch_cache(self):
+        create_season(1, 3)
+        gps = list(GrandPrix.objects.prefetch_related("sessions"))
+        with self.assertNumQueries(0):
+            for gp in gps:
+                self.assertIsNotNone(gp.fp1_start_utc)
+                self.assertIsNotNone(gp.race_start_utc)
+                self.assertIsNotNone(gp.deadline_utc)
+                self.assertFalse(gp.is_locked)
+
+    def test_session_accessors_memoized_without_prefetch(self):
+        create_season(1, 1)
+        gp = GrandPrix.objects.get()
+        with self.assertNumQueries(1):
+            gp.fp1_start_utc
+            gp.quali_start_utc
+            gp.race_start_utc
+            gp.deadline_utc
+            gp.is_locked
+
+
+class ScheduleColumnsTests(TestCase):
+    """race_start_utc / quali_start_utc / deadline_utc follow Session writes."""
+
+    def setUp(self):
+        self.gp = GrandPrix.objects.create(season_year=2026, round=1, name="GP 1", slug="gp-1")
+        self.race_start = timezone.now() + timedelta(days=10)
+
+    def test_session_save_updates_columns(self):
+        Session.objects.create(event=self.gp, session_type="RACE", start_utc=self.race_start, order=5)
+        gp = GrandPrix.objects.get(pk=self.gp.pk)
+        self.assertEqual(gp.race_start_utc, self.race_start)
+        self.assertIsNone(gp.deadline_utc)
+
+    def test_deadline_falls_back_to_fp1(self):
+        fp1 = self.race_start - timedelta(days=2)
+        Session.objects.create(event=self.gp, session_type="FP1", start_utc=fp1, order=1)
+        self.assertEqual(GrandPrix.objects.get(pk=self.gp.pk).deadline_utc, fp1 - timedelta(hours=24))
+
+    def test_session_delete_clears_columns(self):
+        race = Session.objects.create(event=self.gp, session_type="RACE", start_utc=self.race_start, order=5)
+        race.delete()
+        self.assertIsNone(GrandPrix.objects.get(pk=self.gp.pk).race_start_utc)
+
+    def test_next_event_is_single_query(self):
+        create_season(2, 24)
+        with self.assertNumQueries(1):
+            gp = GrandPrix.objects.next_event()
+        self.assertEqual(gp.round, 2)
+
+    def test_next_event_skips_cancelled(self):
+        create_season(2, 3)
+        GrandPrix.objects.filter(round=2).update(cancelled=True)
+        self.assertEqual(GrandPrix.objects.next_event().round, 3)
+
+
+class PickTableTests(TestCase):
+    """race_detail and porras page their pick tables and pin the viewer's pick."""
+
+    def setUp(self):
+        cache.clear()
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        drivers = [Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team) for i in range(1, 7)]
+        self.gp = GrandPrix.objects.create(
+            season_year=2026, round=1, name="GP 1", slug="gp-1",
+            result_p1=drivers[0], result_p2=drivers[1], result_p3=drivers[2],
+            result_p4=drivers[3], result_p5=drivers[4],
+            result_alonso_pos=3, result_sainz_pos=0,
+        )
+        # Quali has started, so the GP is locked but porras still shows it.
+        Session.objects.create(
+            event=self.gp, session_type="QUALI", start_utc=timezone.now() - timedelta(hours=2), order=4
+        )
+        Session.objects.create(
+            event=self.gp, session_type="RACE", start_utc=timezone.now() + timedelta(days=1), order=5
+        )
+        self.users = {}
+        # Two perfect picks tie for first, the rest score less.
+        for username, top5 in [
+            ("ana", drivers[:5]), ("bea", drivers[:5]), ("carlos", drivers[1:6]), ("dani", drivers[1:6]),
+        ]:
+            user = User.objects.create_user(username=username, password="testpass")
+            Prediction(
+                user=user, event=self.gp, alonso_pos_guess=3, sainz_pos_guess=0,
+                **{f"p{i}": driver for i, driver in enumerate(top5, start=1)},
+            ).save(skip_lock_check=True)
+            self.users[username] = user
+        score_grand_prix(self.gp)
+        self.url = reverse("predictions:race_detail", args=[self.gp.slug])
+
+    def test_ranks_are_stored_with_ties(self):
+        ranks = dict(Prediction.objects.values_list("user__username", "rank"))
+        self.assertEqual(ranks, {"ana": 1, "bea": 1, "carlos": 3, "dani": 3})
+
+    def test_race_detail_pages_by_rank(self):
+        with mock.patch("predictions.views.PICKS_PAGE_SIZE", 3):
+            first = self.client.get(self.url).context
+            second = self.client.get(f"{self.url}?desde={first['next_cursor']}").context
+        self.assertEqual([p.user.username for p in first["picks"]], ["ana", "bea", "carlos"])
+        self.assertEqual([p.user.username for p in second["picks"]], ["dani"])
+        self.assertEqual(second["next_cursor"], "")
+
+    def test_results_saved_but_not_scored_page_by_submission(self):
+        Prediction.objects.update(score=None, rank=None)
+        with mock.patch("predictions.views.PICKS_PAGE_SIZE", 3):
+            first = self.client.get(self.url).context
+            response = self.client.get(f"{self.url}?desde={first['next_cursor']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.user.username for p in first["picks"]], ["ana", "bea", "carlos"])
+        self.assertEqual([p.user.username for p in response.context["picks"]], ["dani"])
+
+    def test_username_filter(self):
+        picks = self.client.get(f"{self.url}?usuario=AR").context["picks"]
+        self.assertEqual([p.user.username for p in picks], ["carlos"])
+
+    def test_own_pick_is_pinned_off_page(self):
+        self.client.force_login(self.users["dani"])
+        with mock.patch("predictions.views.PICKS_PAGE_SIZE", 1):
+            response = self.client.get(self.url)
+        self.assertEqual([p.user.username for p in response.context["picks"]], ["ana"])
+        self.assertEqual(response.context["my_pick"].rank, 3)
+        self.assertContains(response, "pick-row-pinned")
+
+    def test_porras_pages_by_username(self):
+        url = reverse("predictions:porras")
+        with mock.patch("predictions.views.PICKS_PAGE_SIZE", 2):
+            first = self.client.get(url).context
+            second = self.client.get(f"{url}?desde={first['next_cursor']}").context
+        self.assertEqual([p.user.username for p in first["picks"]], ["ana", "bea"])
+        self.assertEqual([p.user.username for p in second["picks"]], ["carlos", "dani"])
+
+    def test_malformed_cursors_start_from_the_top(self):
+        pages = [
+            # rank, submitted_at, id
+            (self.url, [["x"], [1], [1, "2026-01-01T00:00:00+00:00"], [1, "ayer", 2], [None] * 3, [[1], {}, 2]]),
+            # username
+            (reverse("predictions:porras"), [[], ["ana", 1], [None], [["ana"]]]),
+        ]
+        for url, cursors in pages:
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, {"desde": encode_cursor(cursor)})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(response.context["is_first_page"])
+                    self.assertEqual(response.context["picks"][0].user.username, "ana")
+
+    def test_page_query_count_does_not_grow_with_players(self):
+        url = reverse("predictions:porras")
+        with mock.patch("predictions.views.PICKS_PAGE_SIZE", 2):
+            with CaptureQueriesContext(connection) as two_rows:
+                self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as four_rows:
+            self.client.get(url)
+        self.assertEqual(len(two_rows), len(four_rows))
+
+
+class PickFormTests(TestCase):
+    """Submitting a pick costs a fixed number of queries, whatever the roster size."""
+
+    def setUp(self):
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team) for i in range(1, 23)
+        ]
+        create_season(1, 1)
+        self.gp = GrandPrix.objects.get(round=1)
+        self.user = User.objects.create_user(username="picker", password="testpass")
+        self.client.force_login(self.user)
+        self.url = reverse("predictions:pick", args=[self.gp.slug])
+
+    def _post(self, offset=0):
+        data = {f"p{i}": self.drivers[i - 1 + offset].pk for i in range(1, 6)}
+        data.update(alonso_pos_guess="3", sainz_pos_guess="0")
+        return self.client.post(self.url, data)
+
+    def test_form_uses_roster_without_queries(self):
+        from predictions.forms import PredictionForm
+        PredictionForm(event=self.gp)  # warm the roster
+        with self.assertNumQueries(0):
+            form = PredictionForm(
+                {"p1": self.drivers[0].pk, "p2": self.drivers[1].pk, "p3": self.drivers[2].pk,
+                 "p4": self.drivers[3].pk, "p5": self.drivers[4].pk,
+                 "alonso_pos_guess": "1", "sainz_pos_guess": "0"},
+                event=self.gp,
+            )
+            self.assertTrue(form.is_valid(), form.errors)
+            str(form["p1"])
+
+    def test_roster_reloads_after_driver_save(self):
+        self._post()
+        self.drivers[5].name = "Renamed"
+        self.drivers[5].save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Renamed (Test Team)")
+
+    def test_rejects_repeated_and_inactive_drivers(self):
+        data = {f"p{i}": self.drivers[0].pk for i in range(1, 6)}
+        data.update(alonso_pos_guess="3", sainz_pos_guess="0")
+        response = self.client.post(self.url, data)
+        self.assertContains(response, "No puedes repetir pilotos")
+
+        self.drivers[5].active = False
+        self.drivers[5].save()
+        response = self._post(offset=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Prediction.objects.exists())
+
+    def test_rejects_after_deadline(self):
+        self.gp.deadline_utc = timezone.now() - timedelta(minutes=1)
+        GrandPrix.objects.filter(pk=self.gp.pk).update(deadline_utc=self.gp.deadline_utc)
+        self._post()
+        self.assertFalse(Prediction.objects.exists())
+
+    def test_submission_query_count(self):
+        self._post()  # warm the roster
+        Prediction.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as created:
+            response = self._post()
+        self.assertRedirects(response, reverse("predictions:dashboard"), fetch_redirect_response=False)
+
+        with CaptureQueriesContext(connection) as updated:
+            response = self._post(offset=1)
+        self.assertRedirects(response, reverse("predictions:dashboard"), fetch_redirect_response=False)
+        self.assertEqual(Prediction.objects.get().p1_id, self.drivers[1].pk)
+
+        # session, user, GP, the upsert and the data version bump, plus the
+        # SAVEPOINT/RELEASE pair the test transaction adds around atomic().
+        self.assertEqual(len(updated), 7)
+        # A first pick also inserts and reranks the player's season standing.
+        self.assertEqual(len(created), 16)
+
+
+class PickSubmitTests(TestCase):
+    def setUp(self):
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team) for i in range(1, 8)
+        ]
+        create_season(1, 1)
+        self.gp = GrandPrix.objects.get(round=1)
+        self.user = User.objects.create_user(username="picker", password="testpass")
+
+    def _submit(self, offset=0, **kwargs):
+        top5 = [d.pk for d in self.drivers[offset:offset + 5]]
+        return Prediction.objects.submit(self.user.pk, self.gp, top5, 3, 0, **kwargs)
+
+    def test_insert_then_update_same_row(self):
+        pk, created = self._submit()
+        self.assertTrue(created)
+        first = Prediction.objects.get()
+        self.assertEqual(first.rank, None)
+        self.assertEqual(self.user.season_standings.get().picks, 1)
+
+        same_pk, created = self._submit(offset=2)
+        self.assertEqual((same_pk, created), (pk, False))
+        pred = Prediction.objects.get()
+        self.assertEqual(pred.p1_id, self.drivers[2].pk)
+        self.assertEqual(pred.submitted_at, first.submitted_at)
+        self.assertGreater(pred.updated_at, first.updated_at)
+
+    def test_deadline_is_checked_in_the_statement(self):
+        # The GP instance still says "open"; the row in the database decides.
+        late = self.gp.deadline_utc + timedelta(seconds=1)
+        with self.assertRaises(ValidationError):
+            self._submit(now=late)
+        self.assertFalse(Prediction.objects.exists())
+
+        self._submit()
+        with self.assertRaises(ValidationError):
+            self._submit(offset=2, now=late)
+        self.assertEqual(Prediction.objects.get().p1_id, self.drivers[0].pk)
+
+    def test_cancelled_gp_rejects(self):
+        GrandPrix.objects.filter(pk=self.gp.pk).update(cancelled=True)
+        with self.assertRaises(ValidationError):
+            self._submit()
+
+
+class PickThreadsTestCase(TransactionTestCase):
+    """Submits for one player and GP from several threads, each on its own connection."""
+    SUBMITTERS = 8
+
+    def setUp(self):
+        team = Team.objects.create(name="Test Team", slug="test-team")
+        self.drivers = [
+            Driver.objects.create(code=f"D{i:02d}", name=f"Driver {i}", team=team) for i in range(1, 8)
+        ]
+        create_season(1, 1)
+        self.gp = GrandPrix.objects.get(round=1)
+        self.user = User.objects.create_user(username="picker", password="testpass")
+
+    def _submit_from_threads(self, offsets, serialize=False):
+        """
+        Start a submit per offset together; with `serialize` they take turns.
+        Returns the offsets in the order their submits finished.
+        """
+        barrier = threading.Barrier(len(offsets))
+        turn = threading.Lock() if serialize else nullcontext()
+        outcomes, finished, errors = [], [], []
+
+        def submit(offset):
+            try:
+                barrier.wait()
+                top5 = [d.pk for d in self.drivers[offset:offset + 5]]
+                with turn:
+                    outcomes.append(Prediction.objects.submit(self.user.pk, self.gp, top5, 3, 0))
+                    finished.append(offset)
+            except Exception as exc:  # surfaced below
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(offset,)) for offset in offsets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Prediction.objects.count(), 1)
+        self.assertEqual({pk for pk, _ in outcomes}, {Prediction.objects.get().pk})
+        self.assertEqual(sum(created for _, created in outcomes), 1)
+        return finished
+
+
+class PickResubmitThreadsTests(PickThreadsTestCase):
+    """
+    Runs on any database: the threads' submits take turns, so each one after
+    the first meets the row another connection committed.
+    """
+
+    def test_later_submits_update_the_committed_row(self):
+        last = self._submit_from_threads([0, 1, 2], serialize=True)[-1]
+        pick = Prediction.objects.get()
+        self.assertEqual([pick.p1_id, pick.p5_id], [self.drivers[last].pk, self.drivers[last + 4].pk])
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class PickConcurrencyTests(PickThreadsTestCase):
+    """
+    Simultaneous submits for the same player and GP end in one row, no
+    IntegrityError. Needs a server database: SQLite's shared-cache test
+    database fails concurrent writers with "table is locked" instead of
+    making them wait.
+    """
+
+    def test_double_submit_race(self):
+        self._submit_from_threads([i % 3 for i in range(self.SUBMITTERS)])
+
+
+class TicketTests(TestCase):
+    def setUp(self):
+        self.gp = GrandPrix.objects.create(season_year=2026, round=1, name="Ticket GP", slug="ticket-gp")
+        self.users = [User.objects.create_user(username=f"fan{i}", password="testpass") for i in range(3)]
+        self.client.force_login(self.users[0])
+
+    def _tickets(self, count):
+        return [
+            Ticket.objects.create(title=f"Grada {i}", event=self.gp, created_by=self.users[1])
+            for i in range(count)
+        ]
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("predictions:tickets"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        tickets = self._tickets(2)
+        small, _ = self._list_queries()
+        for ticket in self._tickets(20) + tickets:
+            for user in self.users:
+                TicketAttendee.objects.toggle(ticket.pk, user.pk)
+        large, response = self._list_queries()
+        self.assertEqual(small, large)
+        self.assertContains(response, "3 apuntados")
+        self.assertContains(response, ">Vas<", count=22)
+
+    def test_toggle_keeps_the_count(self):
+        ticket = self._tickets(1)[0]
+        url = reverse("predictions:ticket_attend", args=[ticket.pk])
+        self.client.post(url)
+        self.assertTrue(TicketAttendee.objects.filter(ticket=ticket, user=self.users[0]).exists())
+        self.assertTrue(TicketAttendee.objects.toggle(ticket.pk, self.users[1].pk))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.attendee_count, 2)
+
+        self.client.post(url)
+        self.assertFalse(TicketAttendee.objects.toggle(ticket.pk, self.users[1].pk))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.attendee_count, 0)
+
+    def test_every_delete_path_keeps_the_count(self):
+        ticket = self._tickets(1)[0]
+        attendees = [TicketAttendee.objects.create(ticket=ticket, user=user) for user in self.users]
+
+        # A stale instance deleted twice only counts once.
+        stale = TicketAttendee.objects.get(pk=attendees[0].pk)
+        attendees[0].delete()
+        stale.delete()
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.attendee_count, 2)
+
+        self.users[2].delete()
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.attendee_count, 1)
+
+        TicketAttendee.objects.filter(ticket=ticket).delete()
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.attendee_count, 0)
+
+    def test_editing_a_ticket_keeps_the_count(self):
+        ticket = self._tickets(1)[0]
+        TicketAttendee.objects.create(ticket=ticket, user=self.users[2])
+        ticket.title = "Grada principal"
+        ticket.save()
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.title, ticket.attendee_count), ("Grada principal", 1))
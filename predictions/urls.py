@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "predictions"
 
@@ -11,10 +11,25 @@ urlpatterns = [
     path("races/<slug:slug>/", views.race_detail, name="race_detail"),
     path("races/<slug:slug>/pick/", views.pick, name="pick"),
     path("leaderboard/", views.leaderboard, name="leaderboard"),
+    path("leaderboard/simulacion/", views.forecast, name="forecast"),
     path("porras/", views.porras, name="porras"),
     path("noticias/<int:pk>/", views.news_detail, name="news_detail"),
     path("tickets/", views.tickets, name="tickets"),
     path("tickets/nueva/", views.ticket_create, name="ticket_create"),
     path("tickets/<int:pk>/", views.ticket_detail, name="ticket_detail"),
     path("tickets/<int:pk>/apuntarme/", views.ticket_attend, name="ticket_attend"),
+    path("ligas/", views.leagues, name="leagues"),
+    path("ligas/nueva/", views.league_create, name="league_create"),
+    path("ligas/unirme/", views.league_join, name="league_join"),
+    path("ligas/<slug:slug>/", views.league_leaderboard, name="league_leaderboard"),
+    path("ligas/<slug:slug>/porras/", views.league_porras, name="league_porras"),
+    path("ligas/<slug:slug>/races/<slug:gp_slug>/", views.league_race_detail, name="league_race_detail"),
+    path("ligas/<slug:slug>/salir/", views.league_leave, name="league_leave"),
+    path("estado/cache/", views.cache_stats_view, name="cache_stats"),
+    path("estado/exportar/", views.export_view, name="export"),
+    path("en-directo/", views.live_events, name="live_events"),
+    path("api/calendario/", api.calendar, name="api_calendar"),
+    path("api/clasificacion/", api.standings, name="api_standings"),
+    path("api/carreras/<slug:slug>/", api.race, name="api_race"),
+    path("api/carreras/<slug:slug>/porras/", api.race_picks, name="api_race_picks"),
 ]
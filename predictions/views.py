@@ -1,14 +1,32 @@
+import asyncio
+import json
 from datetime import timedelta
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, get_user_model
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, Min
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Exists, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 
-from .models import GrandPrix, Prediction, NewsPost, Driver, Ticket, TicketAttendee
-from .forms import PredictionForm, SignupForm, TicketForm
+from .caching import cache_stats, cached_page_data
+from .export import EXPORT_FORMATS, export_filename, stream_export
+from .live import get_broker
+from .models import (
+    CURRENT_SEASON, LEADERBOARD_ORDERING, PRESEASON_ORDERING, DataVersion, GrandPrix, League,
+    LeagueMembership, LeagueStanding, Prediction, NewsPost, Driver, SeasonStanding, Ticket,
+    TicketAttendee,
+)
+from .pagination import clean_key, decode_cursor, encode_cursor, keyset_page, keyset_window, row_key
+from .simulation import SIMULATION_AVAILABLE, simulate_season
+from .forms import JoinLeagueForm, LeagueForm, PredictionForm, SignupForm, TicketForm
 
 User = get_user_model()
 
@@ -23,13 +41,7 @@ def home(request):
     news = NewsPost.objects.all()[:6]
 
     # Next GP (first with race_start_utc in future)
-    now = timezone.now()
-    next_event = None
-    for gp in GrandPrix.objects.prefetch_related("sessions").filter(cancelled=False):
-        race_start = gp.race_start_utc
-        if race_start and race_start > now:
-            next_event = gp
-            break
+    next_event = GrandPrix.objects.next_event()
 
     return render(request, "predictions/home.html", {
         "news": news,
@@ -46,6 +58,8 @@ def signup(request):
         form = SignupForm(request.POST)
         if form.is_valid():
             user = form.save()
+            # New players show up on the cached leaderboard
+            DataVersion.objects.bump(CURRENT_SEASON)
             login(request, user)
             messages.success(request, f"Cuenta creada. Bienvenido, {user.username}!")
             return redirect("predictions:home")
@@ -60,7 +74,8 @@ def dashboard(request):
     """User dashboard with total points, next race, and recent predictions."""
     user = request.user
     now = timezone.now()
-    user_predictions = Prediction.objects.filter(user=user)
+    # Archived seasons have GPs (and maybe picks) of their own.
+    user_predictions = Prediction.objects.filter(user=user, event__season_year=CURRENT_SEASON)
 
     # Total points
     total_points = user_predictions.filter(score__isnull=False).aggregate(
@@ -68,20 +83,16 @@ def dashboard(request):
     )["total"] or 0
     total_picks = user_predictions.count()
     scored_picks = user_predictions.filter(score__isnull=False).count()
-    total_races = GrandPrix.objects.filter(cancelled=False).count()
+    total_races = GrandPrix.objects.filter(season_year=CURRENT_SEASON, cancelled=False).count()
     missing_picks = max(total_races - total_picks, 0)
 
     # Next race (first event with RACE session in future)
-    next_event = None
+    next_event = GrandPrix.objects.next_event(now)
     user_prediction = None
-    for gp in GrandPrix.objects.prefetch_related("sessions").filter(cancelled=False):
-        race_start = gp.race_start_utc
-        if race_start and race_start > now:
-            next_event = gp
-            user_prediction = user_predictions.filter(event=gp).select_related(
-                "p1", "p2", "p3", "p4", "p5"
-            ).first()
-            break
+    if next_event:
+        user_prediction = user_predictions.filter(event=next_event).select_related(
+            "p1", "p2", "p3", "p4", "p5"
+        ).first()
 
     # Recent predictions (last 5)
     recent_predictions = user_predictions.select_related(
@@ -101,82 +112,203 @@ def dashboard(request):
     return render(request, "predictions/dashboard.html", context)
 
 
+def _schedule_status(event, now):
+    if event["cancelled"]:
+        return "CANCELLED"
+    if event["deadline"] is None or now >= event["deadline"]:
+        return "CLOSED"
+    return "OPEN"
+
+
 def races(request):
     """List all events with status and user pick info."""
-    events = []
     now = timezone.now()
     user = request.user
 
-    # Get user's predictions if logged in
-    user_predictions = {}
+    def build_schedule():
+        return [
+            {
+                "gp": gp,
+                "race_start": gp.race_start_utc,
+                "deadline": gp.deadline_utc,
+                "cancelled": gp.cancelled,
+            }
+            for gp in GrandPrix.objects.filter(season_year=CURRENT_SEASON)
+        ]
+
+    schedule = cached_page_data("races", CURRENT_SEASON, build_schedule)
+
+    # Get user's predictions if logged in (kept out of the shared cache)
+    user_scores = {}
     if user.is_authenticated:
-        for pred in Prediction.objects.filter(user=user).select_related("event"):
-            user_predictions[pred.event_id] = {"score": pred.score}
-
-    for gp in GrandPrix.objects.prefetch_related("sessions").all():
-        race_start = gp.race_start_utc
-        deadline = gp.deadline_utc
-        is_locked = gp.is_locked
-        pred_data = user_predictions.get(gp.id)
-
-        if gp.cancelled:
-            status = "CANCELLED"
-        elif is_locked:
-            status = "CLOSED"
-        else:
-            status = "OPEN"
+        user_scores = dict(
+            Prediction.objects.filter(user=user).values_list("event_id", "score")
+        )
 
+    events = []
+    for event in schedule:
+        gp_id = event["gp"].id
         events.append({
-            "gp": gp,
-            "race_start": race_start,
-            "deadline": deadline,
-            "status": status,
-            "has_pick": pred_data is not None,
-            "user_score": pred_data["score"] if pred_data else None,
+            **event,
+            "status": _schedule_status(event, now),
+            "has_pick": gp_id in user_scores,
+            "user_score": user_scores.get(gp_id),
         })
 
     return render(request, "predictions/races.html", {"events": events})
 
 
-def race_detail(request, slug):
-    """Detail view for a Grand Prix."""
-    gp = get_object_or_404(
-        GrandPrix.objects.prefetch_related("sessions"),
-        slug=slug
-    )
+PICKS_PAGE_SIZE = 50
+# Prediction.rank is only stored once the GP is scored.
+RANKED_PICK_ORDERING = ["rank", "submitted_at", "id"]
+UNRANKED_PICK_ORDERING = ["submitted_at", "id"]
+# League tables rank among members only, so they page by score itself.
+LEAGUE_PICK_ORDERING = ["-score", "submitted_at", "id"]
+PORRAS_ORDERING = ["user__username"]
+
+
+def _pick_table(request, gp, name, ordering, my_pick, league=None, unscored_ordering=None):
+    """
+    One keyset page of the picks for `gp`, optionally filtered by
+    ?usuario=, plus the viewer's own pick pinned above it. Unfiltered pages
+    are shared through the page data cache.
+
+    With a league only its members' picks are read, and once the GP is
+    scored each row carries `league_rank`, its RANK() inside the league.
+    With `unscored_ordering`, `ordering` sorts by score or rank and is only
+    used once every pick of the GP has them (see _scored_page).
+    """
+    # gp.prediction_set shares `gp` (and its scoring kernel) with every row
+    picks = gp.prediction_set.select_related("user", "p1", "p2", "p3", "p4", "p5")
+    if league is not None:
+        picks = picks.filter(user__league_memberships__league=league)
+        if gp.has_results:
+            if my_pick is not None and my_pick.score is not None:
+                my_pick.league_rank = picks.filter(score__gt=my_pick.score).count() + 1
+            picks = picks.annotate(league_rank=_league_rank(gp, league))
+    username = request.GET.get("usuario", "").strip()
+    cursor = request.GET.get("desde")
+    orderings = [ordering] if unscored_ordering is None else [ordering, unscored_ordering]
+
+    def page_of(queryset):
+        if unscored_ordering is None:
+            after = decode_cursor(cursor, Prediction, ordering)
+            return keyset_page(queryset, ordering, PICKS_PAGE_SIZE, after=after)
+        return _scored_page(queryset, gp, ordering, unscored_ordering, cursor)
+
+    if username:
+        page = page_of(picks.filter(user__username__icontains=username))
+    else:
+        valid = any(decode_cursor(cursor, Prediction, o) is not None for o in orderings)
+        page = cached_page_data(
+            name,
+            gp.season_year,
+            lambda: page_of(picks),
+            gp.pk,
+            league.pk if league is not None else "",
+            cursor if valid else "",
+        )
 
-    sessions = gp.sessions.all().order_by("order", "start_utc")
+    return {
+        "picks": page.rows,
+        "next_cursor": page.next_cursor,
+        "is_first_page": page.is_first,
+        "username_filter": username,
+        "my_pick": my_pick,
+    }
 
-    user_prediction = None
-    if request.user.is_authenticated:
-        user_prediction = Prediction.objects.filter(
-            user=request.user, event=gp
-        ).select_related("p1", "p2", "p3", "p4", "p5").first()
 
-    ranked_picks = []
-    if gp.is_locked:
-        picks_qs = list(
-            Prediction.objects.filter(event=gp)
-            .select_related("user", "p1", "p2", "p3", "p4", "p5")
-            .order_by("-score", "submitted_at")
+def _scored_page(picks, gp, ordering, unscored_ordering, cursor):
+    """
+    Page `picks` by `ordering`, which reads score or rank, or by
+    `unscored_ordering` while any pick of `gp` has them NULL (between
+    saving results and scoring): a keyset cursor can't carry a NULL.
+    Whether any pick is unscored rides along the page query.
+    """
+    unscored = gp.unscored_picks()
+    page = keyset_page(
+        picks.annotate(gp_unscored=Exists(unscored)),
+        ordering,
+        PICKS_PAGE_SIZE,
+        after=decode_cursor(cursor, Prediction, ordering),
+    )
+    if (not page.rows[0].gp_unscored) if page.rows else not unscored.exists():
+        return page
+    after = decode_cursor(cursor, Prediction, unscored_ordering)
+    return keyset_page(picks, unscored_ordering, PICKS_PAGE_SIZE, after=after)
+
+
+def _league_rank(gp, league):
+    """
+    RANK() of each pick among the league's picks for `gp`: one plus the
+    number of members who scored more. A correlated count keeps the rank
+    right on filtered pages, where a window would only see the page's rows.
+    """
+    higher = (
+        Prediction.objects.filter(
+            event=gp, user__league_memberships__league=league, score__gt=OuterRef("score")
         )
-        rank = 1
-        for i, pick in enumerate(picks_qs):
-            if i > 0 and pick.score != picks_qs[i - 1].score:
-                rank = i + 1
-            ranked_picks.append((rank, pick))
+        .order_by()
+        .values("event")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    return Coalesce(Subquery(higher), 0) + 1
+
+
+def _my_pick(request, gp):
+    if not request.user.is_authenticated:
+        return None
+    return (
+        gp.prediction_set.filter(user=request.user)
+        .select_related("user", "p1", "p2", "p3", "p4", "p5")
+        .first()
+    )
+
+
+def _result_top5_ids(gp):
+    if not gp.has_results:
+        return set()
+    return {gp.result_p1_id, gp.result_p2_id, gp.result_p3_id, gp.result_p4_id, gp.result_p5_id}
+
+
+RESULT_DRIVERS = ["result_p1", "result_p2", "result_p3", "result_p4", "result_p5"]
+
 
-    result_top5_ids = set()
-    if gp.has_results:
-        result_top5_ids = {gp.result_p1_id, gp.result_p2_id, gp.result_p3_id, gp.result_p4_id, gp.result_p5_id}
+def _race_detail_context(request, gp, league=None):
+    # Session.Meta.ordering already sorts by order/start_utc, so this reads
+    # straight from the prefetch cache.
+    sessions = gp.sessions.all()
 
-    return render(request, "predictions/race_detail.html", {
+    user_prediction = _my_pick(request, gp)
+
+    context = {
         "gp": gp,
         "sessions": sessions,
         "user_prediction": user_prediction,
-        "ranked_picks": ranked_picks,
-        "result_top5_ids": result_top5_ids,
-    })
+        "picks": [],
+        "result_top5_ids": _result_top5_ids(gp),
+        "league": league,
+    }
+    if gp.is_locked:
+        if league is not None:
+            ordering = LEAGUE_PICK_ORDERING if gp.has_results else UNRANKED_PICK_ORDERING
+            name = "league_race_detail"
+        else:
+            ordering = RANKED_PICK_ORDERING if gp.has_results else UNRANKED_PICK_ORDERING
+            name = "race_detail"
+        unscored_ordering = UNRANKED_PICK_ORDERING if gp.has_results else None
+        context.update(_pick_table(request, gp, name, ordering, user_prediction, league, unscored_ordering))
+    return context
+
+
+def race_detail(request, slug):
+    """Detail view for a Grand Prix."""
+    gp = get_object_or_404(
+        GrandPrix.objects.prefetch_related("sessions").select_related(*RESULT_DRIVERS),
+        slug=slug
+    )
+    return render(request, "predictions/race_detail.html", _race_detail_context(request, gp))
 
 
 @login_required
@@ -191,27 +323,29 @@ def pick(request, slug):
             "locked": True,
         })
 
-    # Get existing prediction or None
-    prediction = Prediction.objects.filter(
-        user=request.user, event=gp
-    ).select_related("p1", "p2", "p3", "p4", "p5").first()
-
+    form = None
     if request.method == "POST":
-        form = PredictionForm(request.POST, instance=prediction)
+        form = PredictionForm(request.POST, event=gp)
         if form.is_valid():
-            pred = form.save(commit=False)
-            pred.user = request.user
-            pred.event = gp
-            pred.alonso_pos_guess = int(form.cleaned_data["alonso_pos_guess"])
-            pred.sainz_pos_guess = int(form.cleaned_data["sainz_pos_guess"])
+            data = form.cleaned_data
             try:
-                pred.save()
+                Prediction.objects.submit(
+                    request.user.pk, gp, [data[f"p{i}"] for i in range(1, 6)],
+                    data["alonso_pos_guess"], data["sainz_pos_guess"],
+                )
                 messages.success(request, f"Seleccion guardada para {gp.name}")
                 return redirect("predictions:dashboard")
-            except Exception as e:
-                form.add_error(None, str(e))
-    else:
-        form = PredictionForm(instance=prediction)
+            except ValidationError as e:
+                # The deadline passed between loading the GP and the write.
+                form.add_error(None, e)
+
+    # Get existing prediction or None
+    prediction = Prediction.objects.filter(
+        user=request.user, event=gp
+    ).select_related("p1", "p2", "p3", "p4", "p5").first()
+
+    if form is None:
+        form = PredictionForm(instance=prediction, event=gp)
 
     return render(request, "predictions/pick.html", {
         "gp": gp,
@@ -226,59 +360,52 @@ def news_detail(request, pk):
     return render(request, "predictions/news_detail.html", {"post": post})
 
 
-def porras(request):
-    """Public board: all picks for the current/next race."""
+def _porras_context(request, league=None):
     now = timezone.now()
 
     # Show current race until 48h after the GP, then switch to next one
-    gp = None
     switch_at = None
-    for g in GrandPrix.objects.prefetch_related("sessions").filter(cancelled=False):
-        race_start = g.race_start_utc
-        if race_start and race_start + timedelta(hours=48) > now:
-            gp = g
-            if race_start < now:
-                # Race already happened, we're in the 48h window
-                switch_at = race_start + timedelta(hours=48)
-            break
+    gp = GrandPrix.objects.select_related(*RESULT_DRIVERS).next_event(now - timedelta(hours=48))
+    if gp and gp.race_start_utc < now:
+        # Race already happened, we're in the 48h window
+        switch_at = gp.race_start_utc + timedelta(hours=48)
 
     # If all races are done (season finished), show the last one
     if gp is None:
-        gp = GrandPrix.objects.prefetch_related("sessions").filter(cancelled=False).last()
+        gp = GrandPrix.objects.filter(cancelled=False).last()
 
-    picks = []
+    context = {"gp": gp, "picks": [], "switch_at": switch_at, "league": league}
     if gp:
-        picks = (
-            Prediction.objects.filter(event=gp)
-            .select_related("user", "p1", "p2", "p3", "p4", "p5")
-            .order_by("user__username")
-        )
+        name = "league_porras" if league is not None else "porras"
+        context.update(_pick_table(request, gp, name, PORRAS_ORDERING, _my_pick(request, gp), league))
+        context["result_top5_ids"] = _result_top5_ids(gp)
+    return context
 
-    result_top5_ids = set()
-    if gp and gp.has_results:
-        result_top5_ids = {gp.result_p1_id, gp.result_p2_id, gp.result_p3_id, gp.result_p4_id, gp.result_p5_id}
 
-    return render(request, "predictions/porras.html", {
-        "gp": gp,
-        "picks": picks,
-        "switch_at": switch_at,
-        "result_top5_ids": result_top5_ids,
-    })
+def porras(request):
+    """Public board: all picks for the current/next race."""
+    return render(request, "predictions/porras.html", _porras_context(request))
 
 
 def tickets(request):
     """List all ticket proposals."""
-    all_tickets = Ticket.objects.select_related("event", "created_by").prefetch_related("attendees").all()
+    # One query whatever the number of tickets: counts are a column and the
+    # user's own sign-ups an EXISTS annotation.
+    all_tickets = Ticket.objects.select_related("event", "created_by").with_attending(request.user)
     return render(request, "predictions/tickets.html", {"tickets": all_tickets})
 
 
 def ticket_detail(request, pk):
     """Detail view for a ticket proposal."""
-    ticket = get_object_or_404(Ticket.objects.select_related("event", "created_by").prefetch_related("attendees__user"), pk=pk)
-    is_attending = ticket.is_attending(request.user)
+    ticket = get_object_or_404(
+        Ticket.objects.select_related("event", "created_by")
+        .prefetch_related("attendees__user")
+        .with_attending(request.user),
+        pk=pk,
+    )
     return render(request, "predictions/ticket_detail.html", {
         "ticket": ticket,
-        "is_attending": is_attending,
+        "is_attending": ticket.attending,
     })
 
 
@@ -304,52 +431,312 @@ def ticket_attend(request, pk):
     if request.method != "POST":
         return redirect("predictions:ticket_detail", pk=pk)
     ticket = get_object_or_404(Ticket, pk=pk)
-    attendee = TicketAttendee.objects.filter(ticket=ticket, user=request.user).first()
-    if attendee:
-        attendee.delete()
-        messages.success(request, "Te has desapuntado.")
-    else:
-        TicketAttendee.objects.create(ticket=ticket, user=request.user)
+    if TicketAttendee.objects.toggle(ticket.pk, request.user.pk):
         messages.success(request, "Apuntado! Nos vemos en la carrera.")
+    else:
+        messages.success(request, "Te has desapuntado.")
     return redirect("predictions:ticket_detail", pk=pk)
 
 
-def leaderboard(request):
-    """Leaderboard ranking by total points. Shows all registered users."""
-    has_scored_predictions = Prediction.objects.filter(score__isnull=False).exists()
-
-    # Aggregate scores per user (only users who have predictions)
-    stats_by_user = {
-        row["user_id"]: row
-        for row in Prediction.objects.values("user_id").annotate(
-            total_score=Sum("score"),
-            picks_count=Count("id"),
-            first_pick=Min("submitted_at"),
-        )
+LEADERBOARD_PAGE_SIZE = 50
+AROUND_ME_RADIUS = 5
+FORECAST_PAGE_SIZE = 50
+
+
+def _leaderboard_summary(season, standings):
+    return {
+        "has_scored_predictions": Prediction.objects.filter(
+            event__season_year=season, score__isnull=False
+        ).exists(),
+        "total_races": GrandPrix.objects.filter(season_year=season, cancelled=False).count(),
+        "active_players": standings.count(),
     }
 
-    # Build list for ALL registered users
-    users_data = []
-    for user in User.objects.all().order_by("username"):
-        stats = stats_by_user.get(user.pk)
-        users_data.append({
-            "username": user.username,
-            "total_score": stats["total_score"] or 0 if stats else 0,
-            "picks_count": stats["picks_count"] if stats else 0,
-            "first_pick": stats["first_pick"] if stats else None,
-        })
 
-    if has_scored_predictions:
-        users_data.sort(key=lambda x: (-x["total_score"], x["first_pick"] or timezone.now()))
-    else:
-        users_data.sort(key=lambda x: (-x["picks_count"], x["username"]))
+def _leaderboard_rows(standings, idle, ordering, cursor, size):
+    """
+    One page of the leaderboard: players with a standing in `ordering`,
+    then players without a pick this season by username. Cursors start
+    with "s" or "u" to say which of the two lists they point into.
+    """
+    standings = standings.values("rank", "total", "picks", "first_pick", "user__username")
+    idle = idle.values("username")
+    segment, after = _leaderboard_cursor(cursor, standings.model, ordering)
+
+    rows, next_cursor = [], ""
+    if segment == "s":
+        page = keyset_page(standings, ordering, size, after=after, prefix=["s"])
+        rows = [_standing_row(row) for row in page.rows]
+        next_cursor = page.next_cursor
+        if next_cursor:
+            return rows, next_cursor
+        after = None
+        if len(rows) == size:
+            # The standings end exactly on this page; idle players start the next one.
+            return rows, encode_cursor(["u"]) if idle.exists() else ""
+
+    page = keyset_page(idle, ["username"], size - len(rows), after=after, prefix=["u"])
+    rows += [_idle_row(row["username"]) for row in page.rows]
+    return rows, page.next_cursor
+
+
+def _leaderboard_cursor(cursor, model, ordering):
+    """(segment, key) of a decoded leaderboard cursor; ("s", None), the top, unless it is valid."""
+    if cursor == ["u"]:
+        return "u", None
+    if cursor and cursor[0] in ("s", "u"):
+        model, fields = (model, ordering) if cursor[0] == "s" else (User, ["username"])
+        after = clean_key(model, fields, cursor[1:])
+        if after is not None:
+            return cursor[0], after
+    return "s", None
+
+
+def _around_me(standings, ordering, user, radius):
+    """The rows within `radius` places of `user`, or [] if they have no standing."""
+    standings = standings.values("rank", "total", "picks", "first_pick", "user__username")
+    mine = standings.filter(user=user).first()
+    if mine is None:
+        return []
+    return [
+        _standing_row(row)
+        for row in keyset_window(standings, ordering, row_key(mine, ordering), radius)
+    ]
+
+
+def _standing_row(row):
+    return {
+        "rank": row["rank"],
+        "username": row["user__username"],
+        "total_score": row["total"],
+        "picks_count": row["picks"],
+        "first_pick": row["first_pick"],
+    }
 
-    total_races = GrandPrix.objects.filter(cancelled=False).count()
-    active_players = sum(1 for data in users_data if data["picks_count"] > 0)
 
-    return render(request, "predictions/leaderboard.html", {
+def _idle_row(username):
+    return {"rank": None, "username": username, "total_score": 0, "picks_count": 0, "first_pick": None}
+
+
+def _render_leaderboard(request, summary, standings, idle, extra=None):
+    context = dict(summary, **(extra or {}))
+    ordering = LEADERBOARD_ORDERING if context["has_scored_predictions"] else PRESEASON_ORDERING
+
+    around_me = request.GET.get("mi_posicion") == "1" and request.user.is_authenticated
+    cursor = decode_cursor(request.GET.get("desde"))
+    users_data, next_cursor = [], ""
+    if around_me:
+        users_data = _around_me(standings, ordering, request.user, AROUND_ME_RADIUS)
+    if not users_data:
+        around_me = False
+        users_data, next_cursor = _leaderboard_rows(standings, idle, ordering, cursor, LEADERBOARD_PAGE_SIZE)
+
+    context.update({
         "users_data": users_data,
-        "total_races": total_races,
-        "has_scored_predictions": has_scored_predictions,
-        "active_players": active_players,
+        "next_cursor": next_cursor,
+        "is_first_page": _leaderboard_cursor(cursor, standings.model, ordering) == ("s", None) and not around_me,
+        "around_me": around_me,
+    })
+    return render(request, "predictions/leaderboard.html", context)
+
+
+def leaderboard(request):
+    """
+    Leaderboard ranking by total points, LEADERBOARD_PAGE_SIZE rows at a time.
+    ?mi_posicion=1 shows the logged-in player and the players around them.
+    """
+    season = CURRENT_SEASON
+    standings = SeasonStanding.objects.filter(season=season)
+    summary = cached_page_data("leaderboard", season, lambda: _leaderboard_summary(season, standings))
+    idle = User.objects.exclude(season_standings__season=season)
+    return _render_leaderboard(request, summary, standings, idle)
+
+
+def forecast(request):
+    """
+    Each player's chances of winning the season or making the podium, from
+    simulating the remaining GPs. Rebuilt once per data version.
+    """
+    season = CURRENT_SEASON
+    context = {"available": SIMULATION_AVAILABLE, "rows": [], "mine": None}
+    if SIMULATION_AVAILABLE:
+        # A fixed seed keeps the numbers steady until the data changes.
+        result = cached_page_data("forecast", season, lambda: simulate_season(season, seed=season))
+        rows = list(result.players[:FORECAST_PAGE_SIZE])
+        username = request.user.username if request.user.is_authenticated else None
+        context.update({
+            "forecast": result,
+            "rows": rows,
+            "mine": next(
+                (p for p in result.players[FORECAST_PAGE_SIZE:] if p.username == username), None
+            ),
+        })
+    return render(request, "predictions/forecast.html", context)
+
+
+def _member_league(request, slug):
+    """The league `slug` if the logged-in user belongs to it, else 404."""
+    return get_object_or_404(League, slug=slug, memberships__user=request.user)
+
+
+@login_required
+def leagues(request):
+    """The user's leagues, plus forms to create or join one."""
+    memberships = request.user.league_memberships.select_related("league").order_by("league__name")
+    return render(request, "predictions/leagues.html", {
+        "memberships": memberships,
+        "league_form": LeagueForm(),
+        "join_form": JoinLeagueForm(),
+    })
+
+
+@login_required
+def league_create(request):
+    if request.method != "POST":
+        return redirect("predictions:leagues")
+    form = LeagueForm(request.POST)
+    if form.is_valid():
+        league = form.save(commit=False)
+        league.created_by = request.user
+        league.save()
+        LeagueMembership.objects.create(league=league, user=request.user)
+        messages.success(request, f"Liga '{league.name}' creada. Codigo de invitacion: {league.join_code}")
+        return redirect("predictions:league_leaderboard", slug=league.slug)
+    return render(request, "predictions/leagues.html", {
+        "memberships": request.user.league_memberships.select_related("league").order_by("league__name"),
+        "league_form": form,
+        "join_form": JoinLeagueForm(),
     })
+
+
+@login_required
+def league_join(request):
+    if request.method != "POST":
+        return redirect("predictions:leagues")
+    form = JoinLeagueForm(request.POST)
+    if form.is_valid():
+        league = form.league
+        _, created = LeagueMembership.objects.get_or_create(league=league, user=request.user)
+        if created:
+            messages.success(request, f"Te has unido a {league.name}.")
+        return redirect("predictions:league_leaderboard", slug=league.slug)
+    return render(request, "predictions/leagues.html", {
+        "memberships": request.user.league_memberships.select_related("league").order_by("league__name"),
+        "league_form": LeagueForm(),
+        "join_form": form,
+    })
+
+
+@login_required
+def league_leave(request, slug):
+    if request.method != "POST":
+        return redirect("predictions:league_leaderboard", slug=slug)
+    league = _member_league(request, slug)
+    LeagueMembership.objects.get(league=league, user=request.user).delete()
+    messages.success(request, f"Has salido de {league.name}.")
+    return redirect("predictions:leagues")
+
+
+@login_required
+def league_leaderboard(request, slug):
+    """Leaderboard of one league, read from its precomputed standings."""
+    league = _member_league(request, slug)
+    season = CURRENT_SEASON
+    standings = LeagueStanding.objects.filter(league=league, season=season)
+    summary = cached_page_data(
+        "league_leaderboard", season, lambda: _leaderboard_summary(season, standings), league.pk
+    )
+    idle = User.objects.filter(league_memberships__league=league).exclude(
+        pk__in=standings.values("user_id")
+    )
+    return _render_leaderboard(request, summary, standings, idle, {"league": league})
+
+
+@login_required
+def league_porras(request, slug):
+    league = _member_league(request, slug)
+    return render(request, "predictions/porras.html", _porras_context(request, league))
+
+
+@login_required
+def league_race_detail(request, slug, gp_slug):
+    league = _member_league(request, slug)
+    gp = get_object_or_404(
+        GrandPrix.objects.prefetch_related("sessions").select_related(*RESULT_DRIVERS),
+        slug=gp_slug
+    )
+    return render(request, "predictions/race_detail.html", _race_detail_context(request, gp, league))
+
+
+@staff_member_required
+def cache_stats_view(request):
+    """Page cache hit/miss counters for this worker."""
+    return JsonResponse(cache_stats())
+
+
+@staff_member_required
+def export_view(request):
+    """Stream predictions as CSV/NDJSON; ?temporada=, ?ronda=, ?formato=, ?gzip=1."""
+    fmt = request.GET.get("formato", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Formato no soportado.")
+    try:
+        season = int(request.GET["temporada"]) if request.GET.get("temporada") else None
+        round_num = int(request.GET["ronda"]) if request.GET.get("ronda") else None
+    except ValueError:
+        return HttpResponseBadRequest("Temporada y ronda deben ser numeros.")
+    compress = request.GET.get("gzip") == "1"
+
+    content_type = "application/gzip" if compress else (
+        "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson"
+    )
+    content = stream_export(fmt, season=season, round_num=round_num, compress=compress)
+    if isinstance(request, ASGIRequest):
+        # Under ASGI Django would read a sync iterator whole before sending it.
+        content = _iterate_in_thread(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    filename = export_filename(fmt, season, round_num, compress)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+async def _iterate_in_thread(iterator):
+    """
+    Async iterator over a sync one, taking each chunk in the sync thread so
+    its database cursor stays on one connection.
+    """
+    next_chunk = sync_to_async(next)
+    done = object()
+    try:
+        while (chunk := await next_chunk(iterator, done)) is not done:
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+async def live_events(request):
+    """
+    Server-sent events with score and standings deltas as GPs are scored.
+    Needs an ASGI server: each open stream is a coroutine waiting on the
+    broker, not a worker thread.
+    """
+    async def stream():
+        subscription = get_broker().subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), settings.LIVE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let a proxy hold events back
+    return response